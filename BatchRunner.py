@@ -0,0 +1,200 @@
+# Batch Runner
+#
+# Runs the per-well workflow (load, clean, box plots, histogram/KDE, NPLS-RHOB crossplot, log tracks and the
+# shaded GR log) over a directory or glob of LAS files, spreading the wells across a process pool.
+#
+# Every well gets its own output folder named after the LAS file, holding the same PNGs the scripts write into
+# Boxplot/, Histograms/, Log Plot/ and Scatter-Cross plots/. Workers are recycled after a fixed number of wells
+# and can be given an address-space limit, so a single huge or corrupt file cannot grow a worker without bound.
+# A summary of per-stage timings and failures is printed and written to <out>/summary.json. Figures go through
+# the shared RenderCache, so re-running a batch only renders the wells whose data or settings changed.
+# With LOG_PROFILE set (see Profiler) every stage of every well is also profiled in the workers and the
+# timeline is written to <out>/profile.json, with a per-stage table after the summary. With --templates each
+# worker builds every figure layout once (FigureTemplates) and only swaps the data for each of its wells.
+#
+# Usage:
+#     python BatchRunner.py Data --out Batch
+#     python BatchRunner.py "Data/KGS/*.las" --out Batch --workers 16 --memory-limit-mb 2048
+#     python BatchRunner.py Data --out Batch --no-cache
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import time
+import traceback
+
+import FigureTemplates
+import LasCache
+import LogPlots
+import Profiler
+import RenderCache
+
+
+def find_las_files(source):
+    # A directory means every .las file inside it; anything else is treated as a glob pattern.
+    if os.path.isdir(source):
+        pattern = os.path.join(source, '*')
+        return sorted(path for path in glob.glob(pattern) if path.lower().endswith('.las'))
+    return sorted(glob.glob(source, recursive=True))
+
+
+def well_id(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def process_well(path, out_dir, dpi=300, use_cache=True, use_templates=False):
+    result = {'well': well_id(path), 'path': path, 'ok': False, 'stages': {}, 'error': None, 'cache': None}
+    stages = result['stages']
+    start = time.perf_counter()
+
+    def timed(stage, func, *args, **kwargs):
+        stage_start = time.perf_counter()
+        with Profiler.stage(stage):
+            value = func(*args, **kwargs)
+        stages[stage] = time.perf_counter() - stage_start
+        return value
+
+    try:
+        with Profiler.stage('well', well=result['well']):
+            las = timed('load', LasCache.load_las, path)
+            df = timed('frame', las.df)
+
+            well_dir = os.path.join(out_dir, result['well'])
+            os.makedirs(well_dir, exist_ok=True)
+            cache = RenderCache.RenderCache() if use_cache else None
+            for filename, figure in LogPlots.FIGURES.items():
+                render = FigureTemplates.renderer(figure) if use_templates else figure
+                if cache:
+                    # Keyed on the LogPlots function: a template draws the same PNG, so both share the entry.
+                    timed(figure.__name__, cache.render, render, df, os.path.join(well_dir, filename),
+                          key_render=figure, dpi=dpi)
+                else:
+                    timed(figure.__name__, render, df, os.path.join(well_dir, filename), dpi=dpi)
+        result['cache'] = cache.stats() if cache else None
+        result['ok'] = True
+    except Exception:
+        result['error'] = traceback.format_exc()
+
+    result['seconds'] = time.perf_counter() - start
+    # The profiled stages travel back to the parent with the result (an empty list when profiling is off).
+    result['profile'] = Profiler.drain()
+    return result
+
+
+def _limit_worker_memory(limit_mb):
+    # Runs once in every worker process.
+    if limit_mb:
+        import resource
+        limit = int(limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run_batch(paths, out_dir, workers=None, max_tasks_per_child=16, memory_limit_mb=None, dpi=300,
+              use_cache=True, use_templates=False):
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = []
+    profile = []
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                max_tasks_per_child=max_tasks_per_child,
+                                                initializer=_limit_worker_memory,
+                                                initargs=(memory_limit_mb,)) as pool:
+        futures = {pool.submit(process_well, path, out_dir, dpi, use_cache, use_templates): path for path in paths}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except Exception:
+                # The worker itself died (e.g. killed after hitting its memory limit).
+                path = futures[future]
+                result = {'well': well_id(path), 'path': path, 'ok': False, 'stages': {},
+                          'seconds': None, 'error': traceback.format_exc(), 'cache': None}
+            profile.extend(result.pop('profile', []))
+            results.append(result)
+            status = 'ok' if result['ok'] else 'FAILED'
+            print(f"[{len(results)}/{len(paths)}] {result['well']}: {status}", flush=True)
+
+    summary = summarize(results, time.perf_counter() - start)
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    if profile:
+        summary['profile'] = profile
+        summary['profile_path'] = Profiler.write_trace(os.path.join(out_dir, 'profile.json'), profile)
+    return summary
+
+
+def summarize(results, wall_time):
+    succeeded = [r for r in results if r['ok']]
+    stage_totals = {}
+    for result in succeeded:
+        for stage, seconds in result['stages'].items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+    cache = {'hits': 0, 'misses': 0, 'bytes_reused': 0}
+    for result in succeeded:
+        for name in cache:
+            cache[name] += (result['cache'] or {}).get(name, 0)
+
+    return {
+        'wells': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'wall_time': wall_time,
+        'stage_totals': stage_totals,
+        'cache': cache,
+        'failures': [{'well': r['well'], 'path': r['path'], 'error': r['error']}
+                     for r in results if not r['ok']],
+        'results': sorted(results, key=lambda r: r['well']),
+    }
+
+
+def print_summary(summary):
+    print()
+    print(f"Wells: {summary['wells']}   succeeded: {summary['succeeded']}   failed: {summary['failed']}   "
+          f"wall time: {summary['wall_time']:.1f} s")
+    total = sum(summary['stage_totals'].values())
+    if total:
+        print(f"{'Stage':<16}{'Total (s)':>12}{'Share':>8}")
+        for stage, seconds in sorted(summary['stage_totals'].items(), key=lambda item: -item[1]):
+            print(f'{stage:<16}{seconds:>12.2f}{seconds / total:>8.0%}')
+    cache = summary['cache']
+    if cache['hits'] + cache['misses']:
+        print(f"Render cache: {cache['hits']} hits, {cache['misses']} misses, "
+              f"{cache['bytes_reused'] / 1e6:.1f} MB reused")
+    for failure in summary['failures']:
+        last_line = failure['error'].strip().splitlines()[-1]
+        print(f"FAILED {failure['path']}: {last_line}")
+    if summary.get('profile'):
+        Profiler.print_summary(summary['profile'])
+        print(f"Profile: {summary['profile_path']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the standard well log figures for many LAS files.')
+    parser.add_argument('source', help='directory of LAS files or a glob pattern such as "Data/*.las"')
+    parser.add_argument('--out', default='Batch', help='output folder; one sub-folder per well')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--max-tasks-per-child', type=int, default=16,
+                        help='wells a worker processes before it is replaced')
+    parser.add_argument('--memory-limit-mb', type=int, default=None,
+                        help='address-space limit for each worker process')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--no-cache', action='store_true', help='render every figure, ignoring the render cache')
+    parser.add_argument('--templates', action='store_true',
+                        help='re-use one figure per layout in each worker instead of building one per well')
+    args = parser.parse_args(argv)
+
+    paths = find_las_files(args.source)
+    if not paths:
+        parser.error(f'no LAS files found in {args.source!r}')
+
+    summary = run_batch(paths, args.out, workers=args.workers, max_tasks_per_child=args.max_tasks_per_child,
+                        memory_limit_mb=args.memory_limit_mb, dpi=args.dpi, use_cache=not args.no_cache,
+                        use_templates=args.templates)
+    print_summary(summary)
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
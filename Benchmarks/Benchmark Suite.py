@@ -0,0 +1,261 @@
+# Benchmark Suite
+#
+# Times every stage of the per-well workflow on synthetic wells (SyntheticLas) of increasing size and keeps the
+# results per git commit, so a change that slows a stage down shows up against the previous run:
+#
+#     parse            LasReader.read_las
+#     parse (lasio)    lasio.read, as the tutorial scripts do
+#     df               las.df()
+#     dropna           df.dropna(), as the box plot script does
+#     statistics       df.describe() and the GR mean/P5/P95 of the histogram script
+#     kde              FastKDE.kde on GR
+#     box plot, histogram, crossplot, log tracks, shaded GR log      the LogPlots figures
+#     csv export, xlsx export                                       df.to_csv / df.to_excel
+#
+# Each (stage, size) is run until it has taken about a second or --repeat times, whichever comes first, and the
+# minimum and median are kept. Results go to .benchmarks/<commit>.json (with "-dirty" for uncommitted changes)
+# together with the Python/NumPy/pandas/matplotlib versions and the machine, and are compared with the newest
+# stored result of an earlier commit: stages that got slower by more than --threshold are flagged.
+# The synthetic LAS files are written once to .benchmarks/data and re-used. The parsed well and its frame are
+# only built when a selected stage needs them, and above LARGE_ROWS rows the parse, df, dropna, statistics and
+# kde stages read only LARGE_CURVES (depth and GR, 1.6 GB at 1e8 rows instead of about 14 GB for all 18 curves),
+# so the largest sizes fit in the memory of an ordinary machine.
+#
+# Run from the repository root:
+#     python "Benchmarks/Benchmark Suite.py"                                  # 1e3 .. 1e6 rows
+#     python "Benchmarks/Benchmark Suite.py" --sizes 1e7 1e8 --stages parse df dropna
+#     python "Benchmarks/Benchmark Suite.py" --compare abc1234 --fail-on-regression
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FastKDE
+import LasReader
+import LogPlots
+import SyntheticLas
+
+
+RESULTS_DIR = '.benchmarks'
+DEFAULT_SIZES = [1e3, 1e4, 1e5, 1e6]
+TARGET_SECONDS = 1.0
+
+# Wells longer than this are read with only these curves (the figure and export stages stop at 1e7 rows).
+LARGE_ROWS = 1e7
+LARGE_CURVES = ['GR']
+
+
+def _lasio_read(path):
+    import lasio
+    return lasio.read(path)
+
+
+def _statistics(df):
+    gr = df['GR'].dropna().to_numpy()
+    return df.describe(), gr.mean(), np.quantile(gr, [0.05, 0.95])
+
+
+# name: (input the stage needs, function, largest number of rows it is run for)
+STAGES = {
+    'parse': ('path', LasReader.read_las, None),
+    'parse (lasio)': ('path', _lasio_read, 1e6),
+    'df': ('las', lambda las: las.df(), None),
+    'dropna': ('df', lambda df: df.dropna(), None),
+    'statistics': ('df', _statistics, None),
+    'kde': ('df', lambda df: FastKDE.kde(df['GR'].dropna().to_numpy()), None),
+    'box plot': ('figure', LogPlots.box_plots, 1e7),
+    'histogram': ('figure', LogPlots.histogram_kde, 1e7),
+    'crossplot': ('figure', LogPlots.crossplot, 1e6),
+    'log tracks': ('figure', LogPlots.log_tracks, 1e7),
+    'shaded GR log': ('figure', LogPlots.shaded_gr_log, 1e7),
+    'csv export': ('output', lambda df, path: df.to_csv(path), 1e7),
+    'xlsx export': ('output', lambda df, path: df.to_excel(path), 1e5),
+}
+
+
+def synthetic_path(nrows):
+    directory = os.path.join(RESULTS_DIR, 'data')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'synthetic_{nrows}.las')
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        SyntheticLas.write_las(path, nrows, seed=0)
+        print(f'  wrote {path} ({os.path.getsize(path) / 1e6:.0f} MB) in {time.perf_counter() - start:.1f} s')
+    return path
+
+
+def measure(func, repeat):
+    times = []
+    while len(times) < repeat and (not times or sum(times) < TARGET_SECONDS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'runs': len(times)}
+
+
+def run_size(nrows, stages, repeat, dpi):
+    path = synthetic_path(nrows)
+    curves = LARGE_CURVES if nrows > LARGE_ROWS else None
+    inputs = {}
+
+    def las():
+        if 'las' not in inputs:
+            inputs['las'] = LasReader.read_las(path, curves=curves)
+        return inputs['las']
+
+    def df():
+        if 'df' not in inputs:
+            inputs['df'] = las().df()
+        return inputs['df']
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in stages:
+            kind, func, limit = STAGES[name]
+            if limit is not None and nrows > limit:
+                continue
+            # The input is built (once) before timing starts.
+            if kind == 'path':
+                call = lambda: func(path) if curves is None else func(path, curves=curves)
+            elif kind == 'las':
+                call = lambda well=las(): func(well)
+            elif kind == 'df':
+                call = lambda frame=df(): func(frame)
+            elif kind == 'figure':
+                call = lambda frame=df(): func(frame, os.path.join(tmp, 'figure.png'), dpi=dpi)
+            else:
+                extension = '.xlsx' if 'xlsx' in name else '.csv'
+                call = lambda frame=df(): func(frame, os.path.join(tmp, 'export' + extension))
+            try:
+                results[name] = measure(call, repeat)
+            except ImportError as error:
+                print(f'  {name}: skipped ({error})')
+                continue
+            print(f"  {name:<16}{nrows:>12,}{results[name]['min']:>12.4f} s")
+    return results
+
+
+# -------------------------------------------------------------------------------------------------------
+# Stored results
+
+def git(*args):
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def current_commit():
+    commit = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    dirty = bool(git('status', '--porcelain', '--untracked-files=no'))
+    return commit + ('-dirty' if dirty else '')
+
+
+def resolve_commit(name):
+    # A commit as the results are stored: abbreviated like `git rev-parse --short`, keeping a "-dirty" suffix.
+    revision, dirty, _ = name.partition('-dirty')
+    return (git('rev-parse', '--short', revision) or revision) + dirty
+
+
+def machine():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__, 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count()}
+
+
+def load_results(commit):
+    path = os.path.join(RESULTS_DIR, f'{commit}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def previous_results(commit):
+    # Newest stored result of an ancestor of HEAD, other than commit itself.
+    for revision in git('rev-list', '--abbrev-commit', '--max-count=500', 'HEAD').split():
+        for candidate in (revision, revision + '-dirty'):
+            if candidate != commit:
+                stored = load_results(candidate)
+                if stored is not None:
+                    return stored
+    return None
+
+
+def compare(current, baseline, threshold):
+    # Print the ratio of every stage to the baseline; returns the regressions.
+    if baseline['machine'] != current['machine']:
+        print('note: the baseline was measured on a different machine or library versions')
+    print(f"\nCompared with {baseline['commit']} ({baseline['date']}):")
+    print(f"  {'stage':<16}{'rows':>12}{'before (s)':>12}{'now (s)':>12}{'ratio':>8}")
+    regressions = []
+    for name, sizes in current['results'].items():
+        for size, now in sizes.items():
+            before = baseline['results'].get(name, {}).get(size)
+            if before is None:
+                continue
+            ratio = now['min'] / before['min']
+            flag = ''
+            if ratio > threshold:
+                flag = '  REGRESSION'
+                regressions.append((name, size, ratio))
+            elif ratio < 1 / threshold:
+                flag = '  faster'
+            print(f"  {name:<16}{int(size):>12,}{before['min']:>12.4f}{now['min']:>12.4f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time every workflow stage on synthetic wells.')
+    parser.add_argument('--sizes', type=float, nargs='*', default=DEFAULT_SIZES, help='rows, e.g. 1e3 1e6')
+    parser.add_argument('--stages', nargs='*', default=list(STAGES), choices=list(STAGES), metavar='STAGE')
+    parser.add_argument('--repeat', type=int, default=5, help='most runs per stage and size')
+    parser.add_argument('--dpi', type=int, default=100, help='dpi of the figure stages')
+    parser.add_argument('--compare', default=None, help='commit to compare with (default: the previous result)')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slow-down ratio reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--no-save', action='store_true', help='do not store the results')
+    args = parser.parse_args(argv)
+
+    commit = current_commit()
+    current = {'commit': commit, 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+               'machine': machine(), 'dpi': args.dpi, 'results': {}}
+    print(f'{commit}: {len(args.stages)} stages x {len(args.sizes)} sizes')
+    for size in args.sizes:
+        for name, result in run_size(int(size), args.stages, args.repeat, args.dpi).items():
+            current['results'].setdefault(name, {})[str(int(size))] = result
+
+    if not args.no_save:
+        # Merge with what is already stored for this commit, so runs of different sizes add up.
+        stored = load_results(commit) or {'results': {}}
+        for name, sizes in stored['results'].items():
+            for size, result in sizes.items():
+                current['results'].setdefault(name, {}).setdefault(size, result)
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(os.path.join(RESULTS_DIR, f'{commit}.json'), 'w') as f:
+            json.dump(current, f, indent=2)
+
+    baseline = load_results(resolve_commit(args.compare)) if args.compare else previous_results(commit)
+    if baseline is None:
+        print('\nNo earlier results to compare with.')
+        return 0
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) above {args.threshold:.2f}x')
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+# Benchmark: column-selective and lazy LAS loading
+#
+# The plotting scripts use 4 of the 18 curves. This times LasReader.read_las() and LasCache.load_las() with all
+# curves, with curves=[the four plotted curves], with one curve, and lazily with two curves touched, and
+# reports the peak memory of each (tracemalloc). The selected curves must equal the same columns of a full read.
+#
+# Run from the repository root:
+#     python "Benchmarks/Column Selection Benchmark.py"
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import LasCache
+import LasReader
+import SyntheticLas
+
+
+PLOTTED = ['GR', 'ILD', 'RHOB', 'NPLS']
+
+
+def use(las):
+    return las.df(curves=['GR', 'RHOB'] if isinstance(las.data, LasReader.LazyCurves) else None)
+
+
+def measure(func):
+    # Time without tracemalloc (it slows every allocation down), then repeat under it for the peak.
+    start = time.perf_counter()
+    frame = use(func())
+    seconds = time.perf_counter() - start
+    del frame
+    tracemalloc.start()
+    frame = use(func())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, frame
+
+
+def run(path):
+    full = LasReader.read_las(path).df()
+    LasCache.load_las(path)  # fill the cache
+
+    cases = [
+        ('read_las, all 18 curves', lambda: LasReader.read_las(path)),
+        ('read_las, 4 plotted curves', lambda: LasReader.read_las(path, curves=PLOTTED)),
+        ('read_las, GR only', lambda: LasReader.read_las(path, curves=['GR'])),
+        ('read_las lazy, GR + RHOB used', lambda: LasReader.read_las(path, lazy=True)),
+        ('load_las, all 18 curves', lambda: LasCache.load_las(path)),
+        ('load_las, 4 plotted curves', lambda: LasCache.load_las(path, curves=PLOTTED)),
+        ('load_las lazy, GR + RHOB used', lambda: LasCache.load_las(path, lazy=True)),
+    ]
+    print(f'{os.path.basename(path)}: {len(full):,} rows')
+    for label, func in cases:
+        seconds, peak, frame = measure(func)
+        assert frame.equals(full[frame.columns]), label
+        print(f'  {label:<32}{seconds:>9.3f} s{peak / 1e6:>10.1f} MB peak   {len(frame.columns):>2} columns')
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.environ['LAS_CACHE_DIR'] = os.path.join(tmp, 'cache')
+    run('Data/1044222726.las')
+    for nrows in (1_000_000,):
+        path = os.path.join(tmp, f'synthetic_{nrows}.las')
+        SyntheticLas.write_las(path, nrows, step=0.1)
+        run(path)
@@ -0,0 +1,105 @@
+# Benchmark: compact curve frames vs float64 DataFrames
+#
+# Compares a well held as las.df() with the same well as a CompactCurves.CompactFrame: the memory of each, and
+# the time and peak memory (tracemalloc) of the steps the scripts run on it: the GR statistics of the
+# histogram script (mean, P5, P95 of the non-null samples), the dropna + per-curve data of the box plot script,
+# and the box plot figure itself. The statistics must agree and both frames must give the same PNG.
+#
+# Run from the repository root:
+#     python "Benchmarks/Compact Curves Benchmark.py"
+#     python "Benchmarks/Compact Curves Benchmark.py" --rows 10000000
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CompactCurves
+import LasReader
+import LogPlots
+import SyntheticLas
+
+
+def measure(func):
+    # Time without tracemalloc (it slows every allocation down), then repeat under it for the peak.
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def gr_statistics_df(df):
+    values = df['GR'].dropna().to_numpy()
+    return [values.mean(), *np.quantile(values, [0.05, 0.95])]
+
+
+def gr_statistics_compact(frame):
+    stats = frame.statistics('GR')
+    return [stats['mean'], stats['p5'], stats['p95']]
+
+
+def box_data_df(df):
+    df = df.dropna()
+    return {curve: df[curve].to_numpy() for curve, _, _ in LogPlots.BOX_PLOT_CURVES}
+
+
+def box_data_compact(frame):
+    rows = frame.valid()
+    return {curve: frame.values(curve, rows=rows) for curve, _, _ in LogPlots.BOX_PLOT_CURVES}
+
+
+def run(label, las, tmp):
+    df = las.df()
+    start = time.perf_counter()
+    frame = CompactCurves.from_las(las)
+    encode = time.perf_counter() - start
+    df_bytes = df.memory_usage(deep=True).sum()
+    encodings = sorted(set(frame.encodings().values()))
+    print(f'{label}: {len(df):,} rows, {len(df.columns)} curves')
+    print(f'  float64 DataFrame      {df_bytes / 1e6:10.1f} MB')
+    print(f'  CompactFrame           {frame.nbytes / 1e6:10.1f} MB   ({df_bytes / frame.nbytes:.1f}x smaller, '
+          f"{', '.join(encodings)}; encoded in {encode:.2f} s)")
+
+    cases = [
+        ('GR mean/P5/P95', gr_statistics_df, gr_statistics_compact),
+        ('box plot dropna + data', box_data_df, box_data_compact),
+        ('box plot figure', lambda df: LogPlots.box_plots(df, os.path.join(tmp, 'df.png'), dpi=100),
+         lambda frame: LogPlots.box_plots(frame, os.path.join(tmp, 'compact.png'), dpi=100)),
+    ]
+    for name, on_df, on_compact in cases:
+        df_seconds, df_peak, expected = measure(lambda: on_df(df))
+        compact_seconds, compact_peak, result = measure(lambda: on_compact(frame))
+        if isinstance(expected, list):
+            assert np.allclose(expected, result, rtol=1e-12), (expected, result)
+        elif isinstance(expected, dict):
+            assert all(np.array_equal(expected[curve], result[curve]) for curve in expected)
+        print(f'  {name:<24}DataFrame {df_seconds:7.3f} s {df_peak / 1e6:8.1f} MB peak   '
+              f'CompactFrame {compact_seconds:7.3f} s {compact_peak / 1e6:8.1f} MB peak')
+    with open(os.path.join(tmp, 'df.png'), 'rb') as a, open(os.path.join(tmp, 'compact.png'), 'rb') as b:
+        assert a.read() == b.read(), 'box plots differ'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run('1044222726.las', LasReader.read_las('Data/1044222726.las'), tmp)
+        path = os.path.join(tmp, 'synthetic.las')
+        SyntheticLas.write_las(path, args.rows, step=0.1)
+        run(f'synthetic_{args.rows}.las', LasReader.read_las(path), tmp)
+
+
+if __name__ == '__main__':
+    main()
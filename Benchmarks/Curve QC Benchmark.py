@@ -0,0 +1,94 @@
+# Benchmark: vectorized curve QC vs per-curve pandas
+#
+# The straightforward way to QC a well is a loop over its curves with pandas: Series.quantile for the box plot
+# fences, the median of |x - median| for the robust z-score, a groupby over runs of equal values for flat lines
+# and shifted copies for spikes. CurveQC.check does the same tests for all curves at once. This times both on
+# 200 wells the size of the bundled one (as an ingest of a field would see them) and on one 1,000,000-row
+# synthetic well, and checks that they agree on every count.
+#
+# Run from the repository root:
+#     python "Benchmarks/Curve QC Benchmark.py"
+#     python "Benchmarks/Curve QC Benchmark.py" --wells 1000 --rows 100000
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CurveQC
+import LasReader
+import SyntheticLas
+
+
+def pandas_qc(df):
+    # Per-curve reference implementation of CurveQC's tests.
+    report = {}
+    for curve in df.columns:
+        s = df[curve]
+        q1, median, q3 = s.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        deviation = (s - median).abs()
+        scale = CurveQC.MAD_SCALE * deviation.median()
+        if scale == 0:
+            scale = CurveQC.MEAN_AD_SCALE * deviation.mean()
+
+        runs = s.ne(s.shift()).cumsum()
+        lengths = s.groupby(runs).transform('size').where(s.notna(), 0)
+        flat = lengths >= CurveQC.FLAT_RUN
+        flat_runs = runs[flat].nunique()
+
+        difference = s.diff()
+        jump = difference.abs()
+        spread = CurveQC.MAD_SCALE * jump.median()
+        if spread == 0:
+            spread = CurveQC.MEAN_AD_SCALE * jump.mean()
+        after = difference.shift(-1)
+        spikes = (difference * after < 0) & (np.minimum(jump, after.abs()) > CurveQC.SPIKE_K * spread)
+
+        report[curve] = {'nulls': int(s.isna().sum()), 'low': int((s < q1 - CurveQC.IQR_K * iqr).sum()),
+                         'high': int((s > q3 + CurveQC.IQR_K * iqr).sum()),
+                         'robust_z': int((deviation > CurveQC.Z_LIMIT * scale).sum()),
+                         'flat_runs': int(flat_runs), 'flat_samples': int(flat.sum()), 'spikes': int(spikes.sum())}
+    return report
+
+
+def agree(report, reference):
+    for curve, expected in reference.items():
+        row = report[curve]
+        assert all(row[key] == value for key, value in expected.items()), (curve, expected, row)
+
+
+def timed(func, items):
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return time.perf_counter() - start, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--wells', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    bundled = LasReader.read_las('Data/1044222726.las')
+    field = [SyntheticLas.synthetic_las(bundled[bundled.index_name].size, seed=seed) for seed in range(args.wells)]
+    field[0] = bundled
+    cases = [(f'{args.wells} wells x {field[0].df().shape[0]} rows', field),
+             (f'1 well x {args.rows:,} rows', [SyntheticLas.synthetic_las(args.rows, seed=1)])]
+
+    for label, wells in cases:
+        frames = [las.df() for las in wells]
+        pandas_time, reference = timed(pandas_qc, frames)
+        vectorized_time, results = timed(CurveQC.check, wells)
+        for result, expected in zip(results, reference):
+            agree(result.report, expected)
+        print(f'{label}:')
+        print(f'  pandas, curve by curve   {pandas_time:8.3f} s')
+        print(f'  CurveQC.check            {vectorized_time:8.3f} s   ({pandas_time / vectorized_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
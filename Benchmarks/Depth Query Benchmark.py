@@ -0,0 +1,62 @@
+# Benchmark: depth-window queries across wells
+#
+# "GR and RHOB between 2900 and 3000 ft for all wells" answered two ways: by loading every LAS file (from the
+# LasCache copy) and filtering its DataFrame, and by CurveStore.query_df(), which maps the window to row offsets
+# through the per-well depth index and reads only those rows. Both must return the same samples.
+#
+# Run from the repository root:
+#     python "Benchmarks/Depth Query Benchmark.py"
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CurveStore
+import LasCache
+import SyntheticLas
+
+
+WELLS = 20
+ROWS = 200_000
+CURVES = ['GR', 'RHOB']
+TOP, BASE = 2900.0, 3000.0
+
+
+def full_scan(paths):
+    frames = {}
+    for path in paths:
+        df = LasCache.load_las(path).df()
+        window = df.loc[(df.index >= TOP) & (df.index <= BASE), CURVES]
+        if len(window):
+            frames[os.path.splitext(os.path.basename(path))[0]] = window
+    return pd.concat(frames, names=['WELL', 'DEPTH'])
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.environ['LAS_CACHE_DIR'] = os.path.join(tmp, 'cache')
+    store = CurveStore.CurveStore(os.path.join(tmp, 'store'))
+    paths = []
+    for i in range(WELLS):
+        # Every other well starts a little deeper.
+        path = SyntheticLas.write_las(os.path.join(tmp, f'well_{i:03d}.las'), ROWS, step=0.1,
+                                      top=2800.0 + 10.0 * (i % 5), seed=i)
+        store.add_las(path)
+        LasCache.load_las(path)  # warm the parsed-LAS cache so the scan is not charged for parsing
+        paths.append(path)
+
+    start = time.perf_counter()
+    expected = full_scan(paths)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = store.query_df(CURVES, top=TOP, base=BASE)
+    query_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(actual, expected, check_names=False)
+    print(f'{WELLS} wells x {ROWS:,} rows, {len(actual):,} rows returned')
+    print(f'load + filter: {scan_time:8.3f} s   CurveStore.query_df: {query_time:8.4f} s   '
+          f'speed-up: {scan_time / query_time:6.1f}x')
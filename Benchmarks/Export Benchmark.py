@@ -0,0 +1,92 @@
+# Benchmark: well export formats
+#
+# Times the exports of Data Exploration.py (df.to_csv, df.to_excel) against the LasExport writers on the bundled
+# well and on synthetic wells, reports file sizes and read-back times, and checks that every format round-trips
+# the curves exactly. The Parquet and Feather files must also give back the header and the curve units.
+#
+# Run from the repository root:
+#     python "Benchmarks/Export Benchmark.py"
+#     python "Benchmarks/Export Benchmark.py" --rows 1000000 --skip-xlsx
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import LasExport
+import LasReader
+import SyntheticLas
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run(las_path, tmp, skip_xlsx):
+    las = LasReader.read_las(las_path)
+    df = las.df()
+    target = os.path.join(tmp, 'well')
+
+    # (label, writer, extension, reader returning a frame)
+    cases = [
+        ('pandas to_csv', lambda path: df.to_csv(path), '.csv', lambda path: pd.read_csv(path, index_col=0)),
+        ('LasExport.to_csv (stream)', lambda path: LasExport.to_csv(las_path, path), '.csv',
+         lambda path: pd.read_csv(path, index_col=0)),
+        ('LasExport.to_parquet', lambda path: LasExport.to_parquet(las_path, path), '.parquet',
+         lambda path: LasExport.read_parquet(path).df()),
+        ('LasExport.to_feather', lambda path: LasExport.to_feather(las_path, path), '.feather',
+         lambda path: LasExport.read_feather(path).df()),
+    ]
+    if not skip_xlsx:
+        cases[1:1] = [
+            ('pandas to_excel', lambda path: df.to_excel(path), '.xlsx',
+             lambda path: pd.read_excel(path, index_col=0)),
+            ('LasExport.to_xlsx (stream)', lambda path: LasExport.to_xlsx(las_path, path), '.xlsx',
+             lambda path: pd.read_excel(path, index_col=0, sheet_name='Sheet1')),
+        ]
+
+    print(f'{os.path.basename(las_path)}: {len(df):,} rows x {len(df.columns) + 1} curves')
+    print(f"  {'writer':<28}{'write (s)':>10}{'MB/s':>9}{'size (MB)':>11}{'read (s)':>10}")
+    for label, write, extension, read in cases:
+        path = target + extension
+        write_time, _ = timed(lambda: write(path))
+        read_time, back = timed(lambda: read(path))
+        pd.testing.assert_frame_equal(back, df, check_index_type=False, check_names=False)
+        size = os.path.getsize(path) / 1e6
+        print(f'  {label:<28}{write_time:>10.3f}{df.memory_usage().sum() / 1e6 / write_time:>9.1f}'
+              f'{size:>11.2f}{read_time:>10.3f}')
+        os.remove(path)
+
+    # The columnar files keep what the CSV/XLSX exports lose.
+    for write, read, extension in [(LasExport.to_parquet, LasExport.read_parquet, '.parquet'),
+                                   (LasExport.to_feather, LasExport.read_feather, '.feather')]:
+        write(las, target + extension)
+        back = read(target + extension)
+        assert back.well == las.well and back.params == las.params and back.curves == las.curves, extension
+        os.remove(target + extension)
+    print('  header and units round-trip: ok')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='*', default=[100_000, 1_000_000])
+    parser.add_argument('--skip-xlsx', action='store_true', help='leave out the (slow) XLSX writers')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run('Data/1044222726.las', tmp, args.skip_xlsx)
+        for nrows in args.rows:
+            path = os.path.join(tmp, f'synthetic_{nrows}.las')
+            SyntheticLas.write_las(path, nrows, step=0.1)
+            # XLSX is limited to 1,048,576 rows per sheet.
+            run(path, tmp, args.skip_xlsx or nrows >= 1_048_576)
+
+
+if __name__ == '__main__':
+    main()
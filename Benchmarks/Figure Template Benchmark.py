@@ -0,0 +1,64 @@
+# Benchmark: figure templates vs building every figure from scratch
+#
+# Renders the same wells twice for each layout that has a template: with the LogPlots function, which builds a
+# new figure per well, and with the FigureTemplates template, which is built once and only has its data
+# swapped per well. Both must write identical PNGs. The wells are the bundled one and synthetic wells of a few
+# thousand samples, i.e. the case of a batch over a field, where the figure set-up rather than the data
+# dominates.
+#
+# Run from the repository root:
+#     python "Benchmarks/Figure Template Benchmark.py"
+#     python "Benchmarks/Figure Template Benchmark.py" --wells 50 --rows 20000 --dpi 300
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FigureTemplates
+import LasReader
+import SyntheticLas
+
+
+def render_all(render, wells, directory, dpi):
+    os.makedirs(directory, exist_ok=True)
+    start = time.perf_counter()
+    for i, df in enumerate(wells):
+        render(df, os.path.join(directory, f'{i}.png'), dpi=dpi)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--wells', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wells = [LasReader.read_las('Data/1044222726.las').df()]
+        for seed in range(1, args.wells):
+            path = os.path.join(tmp, f'well_{seed}.las')
+            SyntheticLas.write_las(path, args.rows, step=0.5, top=2000.0 + 50 * seed, seed=seed)
+            wells.append(LasReader.read_las(path).df())
+
+        print(f'{len(wells)} wells, dpi={args.dpi}')
+        print(f"  {'figure':<16}{'new figure (s)':>16}{'template (s)':>14}{'speed-up':>10}")
+        for function, template in FigureTemplates.TEMPLATES.items():
+            name = function.__name__
+            fresh = render_all(function, wells, os.path.join(tmp, name, 'fresh'), args.dpi)
+            start = time.perf_counter()
+            reused = template()
+            build = time.perf_counter() - start
+            swapped = render_all(reused.render, wells, os.path.join(tmp, name, 'template'), args.dpi) + build
+            for i in range(len(wells)):
+                with open(os.path.join(tmp, name, 'fresh', f'{i}.png'), 'rb') as a, \
+                        open(os.path.join(tmp, name, 'template', f'{i}.png'), 'rb') as b:
+                    assert a.read() == b.read(), f'{name}: well {i} differs'
+            print(f'  {name:<16}{fresh:>16.2f}{swapped:>14.2f}{fresh / swapped:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# Benchmark: bulk well ingestion against a local stand-in server
+#
+# Starts a small HTTP server on 127.0.0.1 that plays the part of the KGS site: /well/<api> returns a well page
+# shaped like Data/KGS--Oil and Gas Wells--Specific Well--15-113-21342.html with two "Download" links to LAS
+# files, and the LAS files are served with Range support, a fixed latency per request, the occasional
+# "503 Service Unavailable" and, for some files, a connection that drops half way through the body.
+#
+# WellIngest then downloads every well one request at a time and with 8 requests in flight. Every file must
+# arrive byte for byte, the dropped transfers must have been resumed rather than restarted, and every LAS file
+# must have been parsed into the LasCache.
+#
+# Run from the repository root:
+#     python "Benchmarks/Ingest Benchmark.py"
+#     python "Benchmarks/Ingest Benchmark.py" --wells 50 --latency 0.1
+
+import argparse
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import WellIngest
+
+
+PAGE = """<html><head><title>KGS--Oil and Gas Wells--Specific Well--{api}</title></head><body>
+<p>API: {api}</p>
+<table><tr><td><a href="/logs/{name}-1.las">Download</a> <a href="/logs/{name}-1.las">this log</a></td></tr>
+<tr><td><a href="http://{host}/logs/{name}-2.las">Download</a></td></tr></table>
+<a href="http://www.kgs.ku.edu/index.html">Kansas Geological Survey</a>
+</body></html>
+"""
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection re-use is exercised
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        with server.lock:
+            server.requests += 1
+            count = server.requests
+            server.ranges += 'Range' in self.headers
+        if count % server.fail_every == 0:
+            return self._send(503, b'busy', {'Retry-After': '0'})
+
+        if self.path.startswith('/well/'):
+            api = self.path.rsplit('/', 1)[1]
+            body = PAGE.format(api=api, name=api.replace('-', ''), host=self.headers['Host']).encode()
+            return self._send(200, body, {'Content-Type': 'text/html; charset=utf-8'})
+
+        name = self.path.rsplit('/', 1)[1]
+        if not self.path.startswith('/logs/') or name not in server.files:
+            return self._send(404, b'not found')
+        content = server.files[name]
+        start = 0
+        if 'Range' in self.headers:
+            start = int(self.headers['Range'].split('=')[1].split('-')[0])
+            if start >= len(content):
+                return self._send(416, b'', {'Content-Range': f'bytes */{len(content)}'})
+        body = content[start:]
+        headers = {'Content-Type': 'application/octet-stream', 'Accept-Ranges': 'bytes'}
+        if start:
+            headers['Content-Range'] = f'bytes {start}-{len(content) - 1}/{len(content)}'
+        if start == 0 and zlib.crc32(name.encode()) % server.drop_every == 0:
+            # Promise the whole file, send half of it and hang up.
+            self.send_response(200)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self._send(206 if start else 200, body, headers)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(files, latency, fail_every, drop_every):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.files = files
+    server.latency = latency
+    server.fail_every = fail_every
+    server.drop_every = drop_every
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.ranges = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--wells', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the server waits per request')
+    args = parser.parse_args(argv)
+
+    with open('Data/1044222726.las', 'rb') as f:
+        las_bytes = f.read()
+    apis = [f'15-113-{21342 + i:05d}' for i in range(args.wells)]
+    # Every file differs a little, so the LasCache has one entry per file.
+    files = {f"{api.replace('-', '')}-{n}.las": las_bytes + f'# {api} run {n}\n'.encode()
+             for api in apis for n in (1, 2)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['LAS_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        server = start_server(files, args.latency, fail_every=17, drop_every=5)
+        page_url = f'http://127.0.0.1:{server.server_address[1]}/well/{{api}}'
+        print(f'{len(apis)} wells, {len(files)} LAS files of {len(las_bytes) / 1e3:.0f} kB, '
+              f'{args.latency * 1e3:.0f} ms per request')
+
+        for label, concurrency in [('one request at a time', 1), ('8 requests in flight', 8)]:
+            server.requests = server.ranges = 0
+            out = os.path.join(tmp, f'out-{concurrency}')
+            summary = WellIngest.ingest(apis, out, concurrency=concurrency, per_host=concurrency,
+                                        page_url=page_url, backoff=0.01)
+            counts = summary['counts']
+            assert counts['failed'] == 0, [r for r in summary['results'] if not r['ok']]
+            for name, content in files.items():
+                with open(os.path.join(out, name), 'rb') as f:
+                    assert f.read() == content, name
+            assert counts['files'] == counts['parsed'] == len(files), counts
+            assert counts['resumed'] > 0 and server.ranges >= counts['resumed'], counts
+            print(f"  {label:<24}{summary['wall_time']:>8.2f} s   {server.requests} requests, "
+                  f"{counts['retries']} retries, {counts['resumed']} resumed ({summary['client']})")
+
+        # A second run finds every file in place and only fetches the pages.
+        server.requests = 0
+        summary = WellIngest.ingest(apis, out, concurrency=8, page_url=page_url, backoff=0.01, parse=False)
+        assert summary['counts']['skipped'] == len(files) and server.requests < 2 * len(apis), summary['counts']
+        print(f"  re-run: {summary['counts']['skipped']} files already there, {server.requests} requests")
+        assert len(os.listdir(os.path.join(tmp, 'cache'))) == len(files)
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Benchmark: FastKDE vs scipy.stats.gaussian_kde
+#
+# Compares FastKDE.kde() with the exact Gaussian KDE that pandas' plot(kind='kde') uses, on the GR curve of the
+# bundled well and on larger synthetic samples. The script fails if the binned estimate differs from the exact
+# one by more than TOLERANCE (relative to the peak density) anywhere on the grid.
+#
+# Run from the repository root:
+#     python "Benchmarks/KDE Benchmark.py"
+
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.stats import gaussian_kde
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FastKDE
+import LasCache
+
+
+TOLERANCE = 1e-3
+
+
+def compare(label, values):
+    values = values[~np.isnan(values)]
+    grid = FastKDE.default_grid(values)
+
+    start = time.perf_counter()
+    exact = gaussian_kde(values)(grid)
+    scipy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, fast = FastKDE.kde(values, grid)
+    fast_time = time.perf_counter() - start
+
+    error = np.abs(fast - exact).max() / exact.max()
+    print(f'{label:<18} n={values.size:>10,}   scipy: {scipy_time:8.3f} s   FastKDE: {fast_time:8.4f} s   '
+          f'speed-up: {scipy_time / fast_time:8.1f}x   max error: {error:.2e}')
+    assert error <= TOLERANCE, f'{label}: relative error {error:.2e} above {TOLERANCE}'
+
+
+df = LasCache.load_las('Data/1044222726.las').df()
+compare('GR (bundled well)', df['GR'].to_numpy())
+
+rng = np.random.default_rng(0)
+for n in (10_000, 100_000, 1_000_000):
+    # A bimodal sand/shale-like GR distribution.
+    values = np.concatenate([rng.normal(30, 8, n // 2), rng.normal(110, 20, n - n // 2)])
+    compare('synthetic', values)
@@ -0,0 +1,45 @@
+# Benchmark: LasReader vs lasio
+#
+# Times lasio.read(...).df() against LasReader.read_las(...).df() on the bundled well and on synthetic
+# LAS files with millions of rows, and checks that both readers return the same DataFrame.
+#
+# Run from the repository root:
+#     python "Benchmarks/LAS Reader Benchmark.py"
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import lasio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import LasReader
+import SyntheticLas
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def compare(path, repeat):
+    lasio_time, expected = best_of(lambda: lasio.read(path).df(), repeat)
+    reader_time, actual = best_of(lambda: LasReader.read_las(path).df(), repeat)
+    pd.testing.assert_frame_equal(expected, actual)
+    print(f'{os.path.basename(path):<28} rows={len(actual):>9,}   lasio: {lasio_time:8.3f} s   '
+          f'LasReader: {reader_time:8.3f} s   speed-up: {lasio_time / reader_time:6.1f}x')
+
+
+compare('Data/1044222726.las', repeat=5)
+
+with tempfile.TemporaryDirectory() as tmp:
+    for nrows in (100_000, 1_000_000, 3_000_000):
+        path = os.path.join(tmp, f'synthetic_{nrows}.las')
+        SyntheticLas.write_las(path, nrows, step=0.1)
+        compare(path, repeat=1)
@@ -0,0 +1,73 @@
+# Accuracy check: KLL sketches vs exact quantiles
+#
+# Sketches the four box plot curves of the bundled well and of a synthetic "field" made of many wells, merges
+# the per-well sketches, and compares the sketch quantiles with exact np.quantile results. The comparison is
+# made in rank space (what fraction of the samples lies below the sketch answer), which is what the KLL error
+# bound guarantees. The script fails if any rank error exceeds the bound.
+#
+# Run from the repository root:
+#     python "Benchmarks/Quantile Sketch Accuracy.py"
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import LasCache
+import QuantileSketch
+
+
+CURVES = ['GR', 'RHOB', 'ILD', 'NPLS']
+QUANTILES = np.array([0.05, 0.25, 0.5, 0.75, 0.95])
+
+# Generous multiple of the ~1.7 / k expected rank error, so random seeds cannot make the check flaky.
+RANK_ERROR_BOUND = 4.0 / QuantileSketch.DEFAULT_K
+
+
+def rank_errors(values, sketch):
+    values = np.sort(values[~np.isnan(values)])
+    answers = np.atleast_1d(sketch.quantile(QUANTILES))
+    # With tied values an answer covers a range of ranks; it is exact if the quantile falls inside that range.
+    low = np.searchsorted(values, answers, side='left') / values.size
+    high = np.searchsorted(values, answers, side='right') / values.size
+    return np.maximum(0.0, np.maximum(low - QUANTILES, QUANTILES - high))
+
+
+def check(label, values, sketch):
+    errors = rank_errors(values, sketch)
+    exact = np.nanquantile(values, QUANTILES)
+    print(f'{label:<12} n={sketch.n:>10,}  retained={sum(l.size for l in sketch.levels):>5}  '
+          f'max rank error={errors.max():.4f}  P5 {exact[0]:9.3f} ~ {sketch.quantile(0.05):9.3f}  '
+          f'P95 {exact[-1]:9.3f} ~ {sketch.quantile(0.95):9.3f}')
+    assert errors.max() <= RANK_ERROR_BOUND, f'{label}: rank error {errors.max():.4f} above bound'
+
+
+df = LasCache.load_las('Data/1044222726.las').df()
+print('Bundled well')
+for curve, sketch in QuantileSketch.sketch_curves(df, CURVES).items():
+    check(curve, df[curve].to_numpy(), sketch)
+
+# A synthetic field: 500 wells of 20,000 samples each, each well with its own shift and spread, sketched
+# separately and merged, as the field box plots do.
+print('\nSynthetic field (500 wells, merged sketches)')
+rng = np.random.default_rng(1)
+wells = [rng.lognormal(mean=rng.normal(3.5, 0.4), sigma=rng.uniform(0.2, 0.8), size=20_000)
+         for _ in range(500)]
+
+start = time.perf_counter()
+sketches = [QuantileSketch.KllSketch(seed=i).update(values) for i, values in enumerate(wells)]
+build = time.perf_counter() - start
+
+start = time.perf_counter()
+field = QuantileSketch.merge_sketches(sketches)
+merge = time.perf_counter() - start
+
+check('GR (field)', np.concatenate(wells), field)
+print(f'sketching: {build:.2f} s   merging: {merge:.3f} s')
+
+# Round trip through the persisted form must not change any answer.
+restored = QuantileSketch.KllSketch.from_dict(field.to_dict())
+assert np.array_equal(restored.quantile(QUANTILES), field.quantile(QUANTILES))
+print('\nAll rank errors within', RANK_ERROR_BOUND)
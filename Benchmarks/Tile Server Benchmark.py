@@ -0,0 +1,79 @@
+# Benchmark: tile pyramid vs re-plotting the whole well
+#
+# Looking at a new depth window of Log Data Plot Viz.py's tracks means calling LogPlots.log_tracks() again on the
+# whole well. TileServer answers the same view with tiles: the first request for a tile renders just that depth
+# slice, later requests are read from the tile cache, and a client that already has the tile gets a
+# "304 Not Modified" from its ETag. This times all of them over HTTP for the bundled well and a synthetic
+# 1,000,000-row well, at the coarsest and the finest zoom level.
+#
+# Run from the repository root:
+#     python "Benchmarks/Tile Server Benchmark.py"
+
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import LasReader
+import LogPlots
+import SyntheticLas
+import TileServer
+
+
+def get(connection, url, headers=None):
+    start = time.perf_counter()
+    connection.request('GET', url, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    return time.perf_counter() - start, response, body
+
+
+def run(connection, well, tmp):
+    las = LasReader.read_las(os.path.join(tmp, 'wells', f"{well['name']}.las"))
+    start = time.perf_counter()
+    LogPlots.log_tracks(las.df(), os.path.join(tmp, 'tracks.png'), dpi=100)
+    replot = time.perf_counter() - start
+
+    print(f"{well['name']}: {well['samples']:,} samples, zoom 0-{well['max_zoom']}")
+    print(f'  re-plot log_tracks (dpi=100)     {replot * 1e3:9.1f} ms')
+    for z in sorted({0, well['max_zoom']}):
+        y = 2 ** z // 2
+        url = well['tile_url'].format(track='rhob-npls', z=z, y=y)
+        cold, response, body = get(connection, url)
+        assert response.status == 200 and body.startswith(b'\x89PNG'), response.status
+        assert 'immutable' in response.getheader('Cache-Control')
+        warm = min(get(connection, url)[0] for _ in range(20))
+        etag = response.getheader('ETag')
+        revalidate, response, _ = get(connection, url, {'If-None-Match': etag})
+        assert response.status == 304
+        print(f'  zoom {z:>2} tile, first request     {cold * 1e3:9.1f} ms   ({len(body) / 1e3:.0f} kB)')
+        print(f'  zoom {z:>2} tile, from tile cache   {warm * 1e3:9.1f} ms')
+        print(f'  zoom {z:>2} tile, 304 on ETag       {revalidate * 1e3:9.1f} ms')
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['LAS_CACHE_DIR'] = os.path.join(tmp, 'las_cache')
+        os.makedirs(os.path.join(tmp, 'wells'))
+        with open('Data/1044222726.las', 'rb') as source, \
+                open(os.path.join(tmp, 'wells', '1044222726.las'), 'wb') as copy:
+            copy.write(source.read())
+        SyntheticLas.write_las(os.path.join(tmp, 'wells', 'synthetic_1000000.las'), 1_000_000, step=0.1)
+
+        store = TileServer.TileStore(os.path.join(tmp, 'wells'), directory=os.path.join(tmp, 'tiles'))
+        server = TileServer.make_server(store, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+
+        _, response, body = get(connection, '/wells')
+        for well in json.loads(body):
+            run(connection, well, tmp)
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+# Compact Curve Frames
+#
+# las.df() holds every curve as float64 with NaN as the only null marker, and the box plot script's
+# df.dropna() then copies the whole frame to drop rows where any curve is null, plotted or not. CompactFrame is
+# an optional, smaller representation of the same well:
+#
+#     - LAS values are written with a fixed number of decimals, so a curve whose values are all n-decimal
+#       numbers spanning less than 65,535 steps (GR 0.00 .. 655.34, RHOB, NPLS, calipers, ...) is stored as
+#       int16 counts of 10^-n around an integer offset, and one with a wider range (conductivity in mmho/m) as
+#       int32 counts. Decoding gives back exactly the float64 values the parser produced. Curves that are not
+#       fixed-decimal numbers are stored as float32 (or float64, if asked for).
+#     - nulls are kept in a validity bitmap per curve (np.packbits, one bit per sample) instead of NaNs, so
+#       "rows where all of these curves are valid" is a bitwise AND of a few bitmaps
+#
+# That is 2 bytes and 1 bit per sample instead of 8 bytes for most curves: the bundled well takes a third of
+# the memory of las.df(). Statistics (counts, min/max, mean, quantiles, box plot statistics) are computed from
+# the stored integers or from the valid samples of one curve at a time, and LogPlots draws from a CompactFrame
+# directly; nothing is ever expanded into a full float64 frame or copied by dropna.
+#
+# Usage:
+#
+#     import CompactCurves
+#     frame = CompactCurves.from_las(LasCache.load_las("Data/1044222726.las"))
+#     frame.nbytes, frame.encodings()                      # {'GR': 'int16', 'LWTLB': 'int16', ...}
+#     frame.statistics('GR')                               # count, mean, min, P5, P25, median, P75, P95, max
+#     rows = frame.valid(['GR', 'RHOB'])                   # rows where both are present
+#     gr = frame.values('GR', rows=rows)                   # float64, just those rows
+#     LogPlots.box_plots(frame, 'Boxplot/GR-ILD-RHOB-NPLS-Boxplot.png')
+#     df = frame.df()                                      # back to the float64 frame, identical to las.df()
+
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+
+
+MAX_DECIMALS = 4
+INT16_SPAN = 65534            # largest max - min, in counts, that fits in int16 around the offset
+INT32_SPAN = 2 ** 32 - 2
+
+STATISTIC_QUANTILES = {'p5': 0.05, 'p25': 0.25, 'median': 0.5, 'p75': 0.75, 'p95': 0.95}
+
+
+def _popcount(bitmap):
+    if hasattr(np, 'bitwise_count'):  # NumPy 2.0 and later
+        return int(np.bitwise_count(bitmap).sum(dtype=np.int64))
+    return int(np.unpackbits(bitmap).sum(dtype=np.int64))
+
+
+class CompactCurve:
+
+    def __init__(self, data, bitmap, size, scale=None, offset=0):
+        self.data = data              # int16/int32 counts (value = (data + offset) / scale), or float32/float64
+        self.bitmap = bitmap          # np.packbits(valid, bitorder='little')
+        self.size = size
+        self.scale = scale
+        self.offset = offset
+
+    @classmethod
+    def encode(cls, values, float_dtype=np.float32):
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        bitmap = np.packbits(valid, bitorder='little')
+        present = values[valid]
+        if present.size:
+            for decimals in range(MAX_DECIMALS + 1):
+                scale = 10 ** decimals
+                counts = np.rint(present * scale)
+                if not np.array_equal(counts / scale, present):
+                    continue
+                low, high = counts.min(), counts.max()
+                for dtype, span in ((np.int16, INT16_SPAN), (np.int32, INT32_SPAN)):
+                    if high - low <= span:
+                        offset = int((low + high) // 2)
+                        data = np.zeros(values.size, dtype=dtype)
+                        data[valid] = counts - offset
+                        return cls(data, bitmap, values.size, scale, offset)
+                break
+        data = np.where(valid, values, 0.0).astype(float_dtype)
+        return cls(data, bitmap, values.size)
+
+    @property
+    def encoding(self):
+        return self.data.dtype.name
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.bitmap.nbytes
+
+    def valid(self):
+        return np.unpackbits(self.bitmap, count=self.size, bitorder='little').view(bool)
+
+    def count(self):
+        return _popcount(self.bitmap)
+
+    def decode(self, data):
+        # Stored values (any subset of self.data) as float64.
+        if self.scale is None:
+            return data.astype(np.float64)
+        return (data.astype(np.float64) + self.offset) / self.scale
+
+    def values(self, rows=None, dtype=np.float64):
+        # The curve with NaN for nulls; with rows (a boolean mask) only those rows, e.g. frame.valid([...]).
+        valid = self.valid()
+        if rows is None:
+            decoded = self.decode(self.data).astype(dtype, copy=False)
+        else:
+            valid = valid[rows]
+            decoded = self.decode(self.data[rows]).astype(dtype, copy=False)
+        if not valid.all():
+            decoded[~valid] = np.nan
+        return decoded
+
+    def valid_values(self):
+        return self.decode(self.data[self.valid()])
+
+
+class CompactFrame:
+
+    def __init__(self, depth, curves, index_name='DEPT'):
+        self.depth = np.asarray(depth, dtype=np.float64)
+        self.curves = curves          # {name: CompactCurve}, in column order
+        self.index_name = index_name
+
+    # ---------------------------------------------------------------------------------------------------
+    # The parts of the DataFrame interface the plots and scripts use
+
+    @property
+    def columns(self):
+        return list(self.curves)
+
+    @property
+    def index(self):
+        return pd.Index(self.depth, name=self.index_name)
+
+    def __len__(self):
+        return self.depth.size
+
+    def __contains__(self, name):
+        return name in self.curves
+
+    def __getitem__(self, name):
+        return self.curves[name]
+
+    @property
+    def nbytes(self):
+        return self.depth.nbytes + sum(curve.nbytes for curve in self.curves.values())
+
+    def encodings(self):
+        return {name: curve.encoding for name, curve in self.curves.items()}
+
+    def df(self, curves=None):
+        names = self.columns if curves is None else list(curves)
+        return pd.DataFrame({name: self.curves[name].values() for name in names}, index=self.index)
+
+    # ---------------------------------------------------------------------------------------------------
+    # Rows and values
+
+    def valid(self, curves=None):
+        # Boolean mask of the rows where every one of the curves (default: all) has a value, from a bitwise
+        # AND of their bitmaps. frame.valid() selects the same rows as df.dropna().
+        names = self.columns if curves is None else list(curves)
+        bitmap = self.curves[names[0]].bitmap.copy()
+        for name in names[1:]:
+            np.bitwise_and(bitmap, self.curves[name].bitmap, out=bitmap)
+        return np.unpackbits(bitmap, count=len(self), bitorder='little').view(bool)
+
+    def values(self, curve, rows=None, dtype=np.float64):
+        return self.curves[curve].values(rows, dtype)
+
+    def valid_values(self, curve):
+        # The curve's own non-null samples as float64, like df[curve].dropna().to_numpy().
+        return self.curves[curve].valid_values()
+
+    # ---------------------------------------------------------------------------------------------------
+    # Statistics
+
+    def statistics(self, curve, rows=None):
+        # count, mean, min, P5, P25, median, P75, P95 and max of the curve's valid samples (or of rows). Sorting
+        # and summing run on the integer counts; only the order statistics that are needed are decoded.
+        item = self.curves[curve]
+        data = item.data[item.valid() if rows is None else rows]
+        stats = {'count': int(data.size)}
+        if not data.size:
+            return dict(stats, mean=np.nan, min=np.nan, max=np.nan, **{key: np.nan for key in STATISTIC_QUANTILES})
+        if item.scale is None:
+            stats['mean'] = float(data.mean(dtype=np.float64))
+        else:
+            stats['mean'] = float((data.sum(dtype=np.int64) / data.size + item.offset) / item.scale)
+        ordered = np.sort(data)
+        positions = np.array(list(STATISTIC_QUANTILES.values())) * (data.size - 1)
+        needed = np.unique(np.concatenate([np.floor(positions), np.ceil(positions), [0, data.size - 1]]))
+        decoded = item.decode(ordered[needed.astype(np.intp)])
+        lookup = dict(zip(needed.astype(np.intp), decoded))
+        stats['min'] = float(lookup[0])
+        stats['max'] = float(lookup[data.size - 1])
+        for key, q in STATISTIC_QUANTILES.items():
+            position = q * (data.size - 1)
+            lo, hi = int(np.floor(position)), int(np.ceil(position))
+            stats[key] = float(lookup[lo] + (lookup[hi] - lookup[lo]) * (position - lo))
+        return stats
+
+    def box_stats(self, curves, rows='all', whis=1.5):
+        # {curve: matplotlib bxp statistics} for LogPlots.box_plots_from_stats. rows='all' uses the rows where
+        # every curve of the well is valid (what df.dropna() keeps in the box plot script), 'plotted' the rows
+        # where all the given curves are, 'each' every curve's own valid samples.
+        if rows == 'all':
+            mask = self.valid()
+        elif rows == 'plotted':
+            mask = self.valid(curves)
+        elif rows == 'each':
+            mask = None
+        else:
+            raise ValueError(f"rows must be 'all', 'plotted' or 'each', not {rows!r}")
+        stats = {}
+        for curve in curves:
+            values = self.valid_values(curve) if mask is None else self.values(curve, rows=mask)
+            stats[curve] = cbook.boxplot_stats(values, whis=whis)[0]
+        return stats
+
+
+def from_las(las, curves=None, float_dtype=np.float32):
+    # Compact copy of a LasFile (all curves, or the given ones) indexed by its depth curve.
+    names = las.keys()
+    wanted = names[1:] if curves is None else [name for name in curves if name != names[0]]
+    encoded = {name: CompactCurve.encode(las[name], float_dtype) for name in wanted}
+    return CompactFrame(las[names[0]], encoded, index_name=names[0])
+
+
+def from_frame(df, float_dtype=np.float32):
+    # Compact copy of a frame shaped like las.df().
+    encoded = {name: CompactCurve.encode(df[name].to_numpy(dtype=np.float64), float_dtype) for name in df.columns}
+    return CompactFrame(df.index.to_numpy(), encoded, index_name=df.index.name or 'DEPT')
@@ -0,0 +1,254 @@
+# Curve Quality Control
+#
+# The box plot scripts only find outliers implicitly, through matplotlib's fliers, for four curves. check()
+# runs the usual log QC tests on every curve of a well (SP through PIRM) at once, on one (curves x samples)
+# array, with no Python loop over curves or depth steps:
+#
+#     null         the sample is missing (NULL -999.25 / NaN)
+#     low, high    below Q1 - 1.5 IQR or above Q3 + 1.5 IQR, the box plot fences (the red fliers)
+#     robust_z     |0.6745 (x - median) / MAD| above 3.5 (Iglewicz and Hoaglin's modified z-score)
+#     flat         part of a run of at least 10 identical consecutive readings (stuck tool, patched interval)
+#     spike        a single reading that jumps away from both neighbours by more than 6 times the robust
+#                  spread of the curve's sample-to-sample differences
+#
+# The quartiles and medians of all curves come from one np.sort of the whole array rather than a
+# np.nanquantile call per curve, so a well of a million samples takes under two seconds and the bundled well a
+# few milliseconds: cheap enough to run on every ingest (WellIngest does).
+#
+# The result holds a per-curve report and a compact flag matrix: one uint8 per sample and curve with a bit per
+# test, aligned with las.df().
+#
+# Usage:
+#
+#     import CurveQC
+#     qc = CurveQC.check(LasCache.load_las("Data/1044222726.las"))
+#     qc.report['GR']              # {'samples': 741, 'null_fraction': 0.001, 'q1': ..., 'spikes': 0, ...}
+#     qc.frame()                   # the report as a DataFrame, one row per curve
+#     qc.matrix()                  # (samples x curves) boolean matrix: any test failed
+#     qc.matrix('high', 'spike')   # only these tests
+#     df[~qc.matrix('null', 'flat').any(axis=1)]
+#
+#     python CurveQC.py Data/1044222726.las
+#     python CurveQC.py Data --json qc.json
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Bit of each test in the flag matrix
+FLAGS = {'null': 1, 'low': 2, 'high': 4, 'robust_z': 8, 'flat': 16, 'spike': 32}
+
+IQR_K = 1.5           # matplotlib's whis default, so 'low'/'high' are exactly the box plot fliers
+Z_LIMIT = 3.5
+FLAT_RUN = 10         # samples
+SPIKE_K = 6.0
+
+MAD_SCALE = 1.4826            # MAD -> standard deviation for normal data
+MEAN_AD_SCALE = 1.2533        # mean absolute deviation -> standard deviation, used when the MAD is 0
+
+
+class QCResult:
+
+    def __init__(self, curves, depth, flags, report):
+        self.curves = list(curves)
+        self.depth = depth
+        self.flags = flags          # (samples, curves) uint8, bits as in FLAGS
+        self.report = report        # {curve: {statistic: value}}
+
+    def matrix(self, *checks):
+        # (samples x curves) boolean matrix of the samples failing any of the given tests (default: all).
+        mask = sum(FLAGS[check] for check in checks) if checks else sum(FLAGS.values())
+        return (self.flags & mask) != 0
+
+    def frame(self):
+        return pd.DataFrame.from_dict(self.report, orient='index')
+
+    def flagged(self, max_nulls=0.1, max_outliers=0.05, max_flat=0.01, max_spikes=0.005):
+        # Curves where more than these fractions of the samples are null, box plot fliers, flat or spikes.
+        limits = {'nulls': max_nulls, 'outliers': max_outliers, 'flat': max_flat, 'spikes': max_spikes}
+        flagged = []
+        for curve, row in self.report.items():
+            samples = max(row['samples'], 1)
+            fractions = {'nulls': row['null_fraction'], 'outliers': (row['low'] + row['high']) / samples,
+                         'flat': row['flat_samples'] / samples, 'spikes': row['spikes'] / samples}
+            if any(fractions[name] > limit for name, limit in limits.items()):
+                flagged.append(curve)
+        return flagged
+
+
+# -------------------------------------------------------------------------------------------------------
+# Per-curve statistics on a (curves x samples) array, NaN for nulls
+
+def nanquantiles(values, qs):
+    # Linear-interpolation quantiles (as np.nanquantile and matplotlib's box plots) of every row of a 2-D
+    # array; shape (rows, len(qs)). One sort of the whole array puts the nulls at the end of every row, so each
+    # row's quantiles are read at ranks that depend on its own number of valid samples.
+    valid = values.shape[1] - np.count_nonzero(np.isnan(values), axis=1)
+    position = np.outer(np.maximum(valid - 1, 0), np.asarray(qs, dtype=np.float64))
+    if not values.shape[1]:
+        return np.full(position.shape, np.nan)
+    lo = np.floor(position).astype(np.intp)
+    hi = np.minimum(lo + 1, np.maximum(valid - 1, 0)[:, None])
+    ordered = np.sort(values, axis=1)
+    rows = np.arange(values.shape[0])[:, None]
+    low, high = ordered[rows, lo], ordered[rows, hi]
+    result = low + (high - low) * (position - lo)
+    result[valid == 0] = np.nan
+    return result
+
+
+def robust_scale(deviation):
+    # Standard deviation of each row estimated from its absolute deviations about the median (the MAD),
+    # falling back to the mean absolute deviation for rows where more than half of them are 0.
+    scale = MAD_SCALE * nanquantiles(deviation, [0.5])[:, 0]
+    zero = scale == 0
+    if zero.any():
+        deviation = deviation[zero]
+        valid = np.isfinite(deviation)
+        total = np.where(valid, deviation, 0.0).sum(axis=1)
+        scale[zero] = MEAN_AD_SCALE * total / np.maximum(valid.sum(axis=1), 1)
+    return scale
+
+
+def _flat_runs(values, min_run):
+    # Mark the samples of runs of >= min_run equal consecutive values. The rows are laid end to end and every
+    # row starts a new run, so the run boundaries of all curves come out of one flatnonzero.
+    ncurves, nsamples = values.shape
+    new_run = np.ones(values.shape, dtype=bool)
+    new_run[:, 1:] = values[:, 1:] != values[:, :-1]        # NaN != NaN, so nulls never form a run
+    starts = np.flatnonzero(new_run)
+    lengths = np.diff(starts, append=values.size)
+    long = lengths >= min_run
+    starts, lengths = starts[long], lengths[long]
+
+    edges = np.zeros(values.size + 1, dtype=np.int8)
+    edges[starts] = 1
+    edges[starts + lengths] -= 1
+    flat = np.cumsum(edges[:-1], dtype=np.int8).astype(bool).reshape(values.shape)
+
+    curve = starts // max(nsamples, 1)
+    runs = np.bincount(curve, minlength=ncurves)
+    longest = np.zeros(ncurves, dtype=np.int64)
+    np.maximum.at(longest, curve, lengths)
+    return flat, runs, longest
+
+
+def _spikes(values, k):
+    # Neighbouring differences of opposite sign (up then down, or down then up), both larger than k times the
+    # robust spread of the differences.
+    difference = np.diff(values, axis=1)
+    jump = np.abs(difference)
+    scale = robust_scale(jump)
+    spikes = np.zeros(values.shape, dtype=bool)
+    with np.errstate(invalid='ignore'):
+        spikes[:, 1:-1] = ((difference[:, :-1] * difference[:, 1:] < 0)
+                           & (np.minimum(jump[:, :-1], jump[:, 1:]) > k * scale[:, None]))
+    return spikes
+
+
+def check_values(values, curves, depth=None, iqr_k=IQR_K, z_limit=Z_LIMIT, flat_run=FLAT_RUN, spike_k=SPIKE_K):
+    # QC of a (curves x samples) float array with NaN for nulls.
+    values = np.asarray(values, dtype=np.float64)
+    null = np.isnan(values)
+    samples = values.shape[1]
+    nulls = null.sum(axis=1)
+
+    q1, median, q3 = nanquantiles(values, [0.25, 0.5, 0.75]).T
+    iqr = q3 - q1
+    lower, upper = q1 - iqr_k * iqr, q3 + iqr_k * iqr
+    deviation = np.abs(values - median[:, None])
+    scale = robust_scale(deviation)
+    mad = scale / MAD_SCALE
+    with np.errstate(invalid='ignore'):
+        low = values < lower[:, None]
+        high = values > upper[:, None]
+        # |0.6745 (x - median) / MAD| > z_limit, without dividing by a MAD that can be 0
+        outlying = deviation > z_limit * scale[:, None]
+    flat, flat_runs, longest = _flat_runs(values, flat_run)
+    spikes = _spikes(values, spike_k)
+
+    masks = {'low': low, 'high': high, 'robust_z': outlying, 'flat': flat, 'spike': spikes}
+    flags = null.view(np.uint8).copy()
+    for check, mask in masks.items():
+        # A bool array is already 0/1 bytes; shifting it onto its bit avoids a multiply per test.
+        flags |= np.left_shift(mask.view(np.uint8), FLAGS[check].bit_length() - 1)
+    counts = {check: np.count_nonzero(mask, axis=1) for check, mask in masks.items()}
+    report = {}
+    for i, curve in enumerate(curves):
+        report[curve] = {
+            'samples': samples,
+            'nulls': int(nulls[i]),
+            'null_fraction': float(nulls[i] / samples) if samples else 0.0,
+            'q1': float(q1[i]), 'median': float(median[i]), 'q3': float(q3[i]),
+            'lower_fence': float(lower[i]), 'upper_fence': float(upper[i]),
+            'low': int(counts['low'][i]), 'high': int(counts['high'][i]),
+            'mad': float(mad[i]), 'robust_z': int(counts['robust_z'][i]),
+            'flat_runs': int(flat_runs[i]), 'longest_flat_run': int(longest[i]),
+            'flat_samples': int(counts['flat'][i]),
+            'spikes': int(counts['spike'][i]),
+        }
+    return QCResult(curves, depth, flags.T, report)
+
+
+def check(las, curves=None, **options):
+    # QC of every curve of a LasFile (or a frame shaped like las.df()) except the depth index.
+    if isinstance(las, pd.DataFrame):
+        curves = list(las.columns) if curves is None else list(curves)
+        depth = las.index.to_numpy()
+        values = las[curves].to_numpy(dtype=np.float64).T
+    else:
+        names = las.keys()
+        curves = names[1:] if curves is None else [name for name in curves if name != names[0]]
+        depth = las[names[0]]
+        values = np.empty((len(curves), depth.size))
+        for row, name in zip(values, curves):
+            row[:] = las[name]
+    return check_values(values, curves, depth, **options)
+
+
+def compact_report(result):
+    # The per-curve counts that are worth keeping for every ingested well (no quartiles).
+    keys = ('null_fraction', 'low', 'high', 'robust_z', 'flat_runs', 'longest_flat_run', 'spikes')
+    return {curve: {key: row[key] for key in keys} for curve, row in result.report.items()}
+
+
+def print_report(name, result, file=None):
+    file = file or sys.stdout
+    print(f'{name}', file=file)
+    print(f"  {'Curve':<8}{'Nulls':>8}{'Q1':>10}{'Median':>10}{'Q3':>10}{'Low':>6}{'High':>6}{'|z|>3.5':>9}"
+          f"{'Flat':>6}{'Longest':>9}{'Spikes':>8}", file=file)
+    for curve, row in result.report.items():
+        print(f"  {curve:<8}{row['null_fraction']:>8.1%}{row['q1']:>10.3f}{row['median']:>10.3f}{row['q3']:>10.3f}"
+              f"{row['low']:>6}{row['high']:>6}{row['robust_z']:>9}{row['flat_runs']:>6}"
+              f"{row['longest_flat_run']:>9}{row['spikes']:>8}", file=file)
+
+
+def main(argv=None):
+    import BatchRunner
+    import LasCache
+
+    parser = argparse.ArgumentParser(description='Outlier, null, flat-line and spike QC for every curve.')
+    parser.add_argument('sources', nargs='+', help='LAS files, directories or glob patterns')
+    parser.add_argument('--json', default=None, help='write the per-curve reports of all wells to this file')
+    args = parser.parse_args(argv)
+
+    paths = [path for source in args.sources for path in
+             ([source] if os.path.isfile(source) else BatchRunner.find_las_files(source))]
+    reports = {}
+    for path in paths:
+        result = check(LasCache.load_las(path))
+        reports[path] = result.report
+        print_report(path, result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
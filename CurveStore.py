@@ -0,0 +1,263 @@
+# Memory-Mapped Multi-Well Curve Store
+#
+# Loading hundreds of wells as full pandas DataFrames runs out of RAM. The curve store keeps every curve of
+# every well on disk as its own contiguous float64 .npy file, plus a small JSON index of wells and curves.
+# Curves are opened with NumPy memory mapping, so slicing a depth range only touches the pages it needs and
+# returns views into the files rather than copies.
+#
+# Layout:
+#
+#     <root>/index.json                    wells, header items, curve names/units and file names
+#     <root>/wells/<well_id>/c<n>.npy      one file per curve, in ~Curve order
+#
+# Usage:
+#
+#     import CurveStore
+#     store = CurveStore.CurveStore("Data/store")
+#     store.add_las("Data/1044222726.las")                     # well id defaults to the file name
+#
+#     gr = store.curve('1044222726', 'GR')                      # memory-mapped array
+#     window = store.window('1044222726', ['GR', 'RHOB'], top=2900, base=3000)   # zero-copy views
+#     df = store.df('1044222726')                               # same frame as las.df()
+#
+#     # GR and RHOB between 2900 and 3000 ft for every well in a field, reading only those rows
+#     frames = store.query(['GR', 'RHOB'], top=2900, base=3000, field='BITIKOFER')
+#     df = store.query_df(['GR', 'RHOB'], top=2900, base=3000)  # one frame indexed by (well, depth)
+#
+# Depth windows are resolved through a small per-well depth index kept in index.json: the first and last depth
+# and, for regularly sampled wells (STRT/STEP, checked against the depth curve when the well is added), the
+# step. For those a depth maps to a row offset arithmetically without touching the depth file; irregular wells
+# fall back to a binary search of the memory-mapped depth curve. Wells whose depth range does not overlap the
+# window are skipped from the index alone.
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import LasCache
+
+
+INDEX_NAME = 'index.json'
+
+# A depth curve counts as regularly sampled if every sample is within this fraction of a step of the grid.
+REGULAR_TOLERANCE = 1e-3
+
+
+class CurveStore:
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'wells'), exist_ok=True)
+        self._index = self._read_index()
+        self._maps = {}
+
+    # ---------------------------------------------------------------------------------------------------
+    # Writing
+
+    def add_las(self, path, well_id=None):
+        well_id = well_id or os.path.splitext(os.path.basename(path))[0]
+        digest = LasCache.file_hash(path)
+        entry = self._index['wells'].get(well_id)
+        if entry is not None and entry.get('hash') == digest:
+            return well_id
+        self.add_well(well_id, LasCache.load_las(path), source=path, digest=digest)
+        return well_id
+
+    def add_well(self, well_id, las, source=None, digest=None):
+        well_dir = os.path.join(self.root, 'wells', well_id)
+        self._drop_maps(well_id)
+        if os.path.isdir(well_dir):
+            shutil.rmtree(well_dir)
+        os.makedirs(well_dir)
+
+        curves = {}
+        for i, (name, item) in enumerate(las.curves.items()):
+            filename = f'c{i}.npy'
+            np.save(os.path.join(well_dir, filename), np.ascontiguousarray(las[name], dtype=np.float64))
+            curves[name] = {'unit': item.unit, 'descr': item.descr, 'file': filename}
+
+        self._index['wells'][well_id] = {
+            'source': source,
+            'hash': digest,
+            'nrows': int(len(las[las.index_name])),
+            'index_curve': las.index_name,
+            'depth': depth_index(las[las.index_name]),
+            'well': {name: [item.unit, item.value, item.descr] for name, item in las.well.items()},
+            'params': {name: [item.unit, item.value, item.descr] for name, item in las.params.items()},
+            'curves': curves,
+        }
+        self._write_index()
+
+    def remove_well(self, well_id):
+        self._drop_maps(well_id)
+        shutil.rmtree(os.path.join(self.root, 'wells', well_id), ignore_errors=True)
+        if self._index['wells'].pop(well_id, None) is not None:
+            self._write_index()
+
+    # ---------------------------------------------------------------------------------------------------
+    # Reading
+
+    def wells(self, field=None):
+        wells = self._index['wells']
+        if field is None:
+            return list(wells)
+        return [well_id for well_id, entry in wells.items()
+                if str(entry['well'].get('FLD', ['', ''])[1]).strip().upper() == field.upper()]
+
+    def curve_names(self, well_id):
+        return list(self._index['wells'][well_id]['curves'])
+
+    def header(self, well_id, section='well'):
+        # Header items of a well as {mnemonic: value}; section is 'well' or 'params'.
+        return {name: item[1] for name, item in self._index['wells'][well_id][section].items()}
+
+    def unit(self, well_id, curve):
+        return self._index['wells'][well_id]['curves'][curve]['unit']
+
+    def curve(self, well_id, name):
+        key = (well_id, name)
+        array = self._maps.get(key)
+        if array is None:
+            entry = self._index['wells'][well_id]
+            path = os.path.join(self.root, 'wells', well_id, entry['curves'][name]['file'])
+            array = np.load(path, mmap_mode='r')
+            self._maps[key] = array
+        return array
+
+    def depth(self, well_id):
+        return self.curve(well_id, self._index['wells'][well_id]['index_curve'])
+
+    def depth_slice(self, well_id, top=None, base=None):
+        # Row slice covering top <= depth <= base; depth is assumed to be monotonic, as in any LAS file.
+        index = self._depth_index(well_id)
+        if index['step'] is not None:
+            return _regular_slice(index, top, base)
+
+        depth = self.depth(well_id)
+        if len(depth) == 0:
+            return slice(0, 0)
+        if depth[0] <= depth[-1]:
+            start = 0 if top is None else int(np.searchsorted(depth, top, side='left'))
+            stop = len(depth) if base is None else int(np.searchsorted(depth, base, side='right'))
+        else:
+            # Depth recorded bottom-up: search the reversed view.
+            reverse = depth[::-1]
+            n = len(depth)
+            start = 0 if base is None else n - int(np.searchsorted(reverse, base, side='right'))
+            stop = n if top is None else n - int(np.searchsorted(reverse, top, side='left'))
+        return slice(start, max(start, stop))
+
+    def window(self, well_id, curves=None, top=None, base=None):
+        # Zero-copy views of the requested curves (and the depth curve) between top and base.
+        rows = self.depth_slice(well_id, top, base)
+        index_curve = self._index['wells'][well_id]['index_curve']
+        names = [index_curve] + [name for name in (curves or self.curve_names(well_id))
+                                 if name != index_curve]
+        return {name: self.curve(well_id, name)[rows] for name in names}
+
+    def overlaps(self, well_id, top=None, base=None):
+        # Whether any sample of the well can fall inside [top, base], from the depth index alone.
+        index = self._depth_index(well_id)
+        if index['first'] is None:
+            return False
+        shallow, deep = sorted((index['first'], index['last']))
+        return (top is None or deep >= top) and (base is None or shallow <= base)
+
+    def query(self, curves, top=None, base=None, wells=None, field=None):
+        # {well_id: window(...)} for every well (of the given list or field) that has all the curves and
+        # samples inside [top, base]. Only the rows in the window are read from disk.
+        candidates = self.wells(field) if wells is None else list(wells)
+        result = {}
+        for well_id in candidates:
+            names = self._index['wells'][well_id]['curves']
+            if not all(name in names for name in curves) or not self.overlaps(well_id, top, base):
+                continue
+            window = self.window(well_id, curves, top, base)
+            if len(next(iter(window.values()))):
+                result[well_id] = window
+        return result
+
+    def query_df(self, curves, top=None, base=None, wells=None, field=None):
+        # query() as one frame indexed by (well, depth), with one column per curve.
+        frames = {}
+        for well_id, window in self.query(curves, top, base, wells, field).items():
+            index_curve = self._index['wells'][well_id]['index_curve']
+            index = pd.Index(np.asarray(window.pop(index_curve)), name='DEPTH')
+            frames[well_id] = pd.DataFrame({name: np.asarray(window[name]) for name in curves}, index=index)
+        if not frames:
+            return pd.DataFrame(columns=list(curves), index=pd.MultiIndex.from_tuples([], names=['WELL', 'DEPTH']))
+        return pd.concat(frames, names=['WELL', 'DEPTH'])
+
+    def df(self, well_id, curves=None, top=None, base=None):
+        # Drop-in replacement for las.df(): indexed by depth, one column per curve. Building a DataFrame
+        # copies the selected rows, so pass curves/top/base to keep it small; use window() for views.
+        window = self.window(well_id, curves, top, base)
+        index_curve = self._index['wells'][well_id]['index_curve']
+        index = pd.Index(np.asarray(window.pop(index_curve)), name=index_curve)
+        return pd.DataFrame({name: np.asarray(values) for name, values in window.items()}, index=index)
+
+    # ---------------------------------------------------------------------------------------------------
+    # Index handling
+
+    def _read_index(self):
+        path = os.path.join(self.root, INDEX_NAME)
+        if not os.path.exists(path):
+            return {'wells': {}}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_index(self):
+        fd, tmp = tempfile.mkstemp(suffix='.json', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp, os.path.join(self.root, INDEX_NAME))
+
+    def _depth_index(self, well_id):
+        entry = self._index['wells'][well_id]
+        if 'depth' not in entry:
+            # Stores written before the depth index existed: build it once from the depth curve.
+            entry['depth'] = depth_index(self.depth(well_id))
+            self._write_index()
+        return entry['depth']
+
+    def _drop_maps(self, well_id):
+        for key in [key for key in self._maps if key[0] == well_id]:
+            del self._maps[key]
+
+
+def depth_index(depth):
+    # {'first', 'last', 'step', 'nrows'} for a depth curve; step is None unless the samples sit on a regular
+    # grid first + step * row.
+    depth = np.asarray(depth, dtype=np.float64)
+    n = len(depth)
+    if n == 0:
+        return {'first': None, 'last': None, 'step': None, 'nrows': 0}
+    index = {'first': float(depth[0]), 'last': float(depth[-1]), 'step': None, 'nrows': n}
+    if n > 1 and np.isfinite(depth).all():
+        step = (depth[-1] - depth[0]) / (n - 1)
+        if step != 0:
+            grid = depth[0] + step * np.arange(n)
+            if np.abs(depth - grid).max() <= REGULAR_TOLERANCE * abs(step):
+                index['step'] = float(step)
+    return index
+
+
+def _regular_slice(index, top, base):
+    # Rows first + step * i inside [top, base], computed arithmetically. A small tolerance (in rows) keeps
+    # depths that sit exactly on the window edges despite floating point rounding.
+    n = index['nrows']
+    first, step = index['first'], index['step']
+    eps = 1e-6
+    rows = [None if depth is None else (depth - first) / step for depth in (top, base)]
+    if step < 0:
+        rows.reverse()  # depth decreases down the file: the base is reached first
+    low, high = rows
+    start = 0 if low is None else int(np.ceil(low - eps))
+    stop = n if high is None else int(np.floor(high + eps)) + 1
+    start = min(max(start, 0), n)
+    stop = min(max(stop, 0), n)
+    return slice(start, max(start, stop))
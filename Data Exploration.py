@@ -15,19 +15,20 @@
 
 #
 # Loading and Checking Data
-# The first step is to import the required libraries: pandas, matplotlib and LASIO.
-# lasio is a library that has been developed to handle and work with LAS files.
+# The first step is to import the required libraries: pandas, matplotlib and LasReader.
+# LasReader is the project's own LAS 2.0 reader; it parses the curve data with NumPy in a single pass.
 
 # More info on the library can be found at: https://chasm.kgs.ku.edu/ords/qualified.well_page.DisplayWell?f_kid=1042769301
 
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import lasio
+import LasCache
 
-#To load our file in, we can use the .read() method from LASIO like so:
+#To load our file in, we can use load_las() from our LasCache module. The first run parses the file with LasReader,
+# later runs reuse the cached copy:
 
-las = lasio.read("Data/1044222726.las")
+las = LasCache.load_las("Data/1044222726.las")
 
 
 # print(las.sections.keys())
@@ -252,4 +253,12 @@ las_df = well
 las_df.to_csv('Data/1044222726.csv')
 
 # Export the DataFrame to an Excel file
-las_df.to_excel('Data/1044222726.xlsx')
\ No newline at end of file
+las_df.to_excel('Data/1044222726.xlsx')
+
+# Both exports drop the units and the rest of the header, and to_excel is very slow on long wells. LasExport writes
+# compressed Parquet/Feather files that keep the full header and curve units, and streams CSV/XLSX in chunks:
+#
+# import LasExport
+# LasExport.to_parquet(las, 'Data/1044222726.parquet')
+# las = LasExport.read_parquet('Data/1044222726.parquet', curves=['GR', 'RHOB'])
+# LasExport.to_xlsx('Data/1044222726.las', 'Data/1044222726.xlsx')   # streamed from the LAS file
\ No newline at end of file
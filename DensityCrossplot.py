@@ -0,0 +1,146 @@
+# Rasterized Density Crossplots
+#
+# plt.scatter draws one marker per sample, which takes minutes and turns into an unreadable blob once many wells
+# are stacked. CrossplotGrid aggregates NPLS/RHOB pairs into a fixed 2-D grid instead, keeping per cell the
+# number of samples, the sum of the colour curve (GR) and a coarse histogram of it. From that the grid can be
+# drawn as an image of counts, mean GR or median GR. Grids are additive, so wells can be accumulated one at a
+# time, saved, and merged later.
+#
+# Usage:
+#
+#     import DensityCrossplot
+#     grid = DensityCrossplot.CrossplotGrid()          # NPLS -5..60, RHOB 1.5..3.0, GR 0..100 by default
+#     for df in wells:
+#         grid.add(df['NPLS'], df['RHOB'], df['GR'])
+#     grid.save('Data/field-crossplot.npz')
+#
+#     fig, ax = plt.subplots(figsize=(8, 8))
+#     image = grid.plot(ax, statistic='mean')          # or 'count' / 'median'
+#     fig.colorbar(image, ax=ax, label='Gamma Ray - API')
+
+import numpy as np
+from matplotlib.colors import LogNorm
+
+
+class CrossplotGrid:
+
+    def __init__(self, x_range=(-5, 60), y_range=(1.5, 3.0), shape=(300, 260), color_range=(0, 100),
+                 color_bins=32):
+        # shape is (rows along y, columns along x).
+        self.x_range = tuple(float(v) for v in x_range)
+        self.y_range = tuple(float(v) for v in y_range)
+        self.shape = tuple(int(v) for v in shape)
+        self.color_range = tuple(float(v) for v in color_range)
+        self.color_bins = int(color_bins)
+
+        cells = self.shape[0] * self.shape[1]
+        self.counts = np.zeros(cells, dtype=np.int64)
+        self.color_counts = np.zeros(cells, dtype=np.int64)
+        self.color_sum = np.zeros(cells)
+        self.color_hist = np.zeros((cells, self.color_bins), dtype=np.int64)
+
+    def _cells(self, x, y):
+        ny, nx = self.shape
+        ix = np.floor((x - self.x_range[0]) / (self.x_range[1] - self.x_range[0]) * nx).astype(np.int64)
+        iy = np.floor((y - self.y_range[0]) / (self.y_range[1] - self.y_range[0]) * ny).astype(np.int64)
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        return iy * nx + ix, inside
+
+    def add(self, x, y, color=None):
+        # Accumulate one batch of points; points outside the axis ranges are ignored, as they would be
+        # clipped from the scatter plot.
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        with np.errstate(invalid='ignore'):
+            cells, inside = self._cells(np.where(valid, x, np.inf), np.where(valid, y, np.inf))
+        keep = valid & inside
+        ncells = self.counts.size
+        self.counts += np.bincount(cells[keep], minlength=ncells)
+
+        if color is not None:
+            color = np.asarray(color, dtype=np.float64)
+            colored = keep & ~np.isnan(color)
+            cells, values = cells[colored], color[colored]
+            self.color_counts += np.bincount(cells, minlength=ncells)
+            self.color_sum += np.bincount(cells, weights=values, minlength=ncells)
+
+            low, high = self.color_range
+            bins = np.clip(((values - low) / (high - low) * self.color_bins).astype(np.int64),
+                           0, self.color_bins - 1)
+            flat = np.bincount(cells * self.color_bins + bins, minlength=ncells * self.color_bins)
+            self.color_hist += flat.reshape(ncells, self.color_bins)
+        return self
+
+    def merge(self, other):
+        if (self.x_range, self.y_range, self.shape, self.color_range, self.color_bins) != \
+                (other.x_range, other.y_range, other.shape, other.color_range, other.color_bins):
+            raise ValueError('cannot merge crossplot grids with different ranges or shapes')
+        self.counts += other.counts
+        self.color_counts += other.color_counts
+        self.color_sum += other.color_sum
+        self.color_hist += other.color_hist
+        return self
+
+    def statistic(self, statistic='count'):
+        # (rows, columns) image; cells without points are NaN.
+        if statistic == 'count':
+            image = self.counts.astype(np.float64)
+            image[self.counts == 0] = np.nan
+        elif statistic == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                image = self.color_sum / self.color_counts
+        elif statistic == 'median':
+            # Median from the per-cell colour histogram, interpolated inside the bin that holds it.
+            cumulative = np.cumsum(self.color_hist, axis=1)
+            half = self.color_counts / 2.0
+            index = (cumulative < half[:, None]).sum(axis=1).clip(0, self.color_bins - 1)
+            rows = np.arange(index.size)
+            below = np.where(index > 0, cumulative[rows, np.maximum(index - 1, 0)], 0)
+            inside = self.color_hist[rows, index]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fraction = np.where(inside > 0, (half - below) / inside, 0.5)
+            low, high = self.color_range
+            width = (high - low) / self.color_bins
+            image = low + (index + fraction) * width
+            image[self.color_counts == 0] = np.nan
+        else:
+            raise ValueError(f"unknown statistic {statistic!r}; use 'count', 'mean' or 'median'")
+        return image.reshape(self.shape)
+
+    def plot(self, ax, statistic='mean', cmap='rainbow', vmin=None, vmax=None):
+        # Draw the grid with the crossplot's axis conventions: NPLS -5..60, RHOB inverted 3.0 -> 1.5.
+        image = self.statistic(statistic)
+        extent = (self.x_range[0], self.x_range[1], self.y_range[0], self.y_range[1])
+        if statistic == 'count':
+            norm = LogNorm(vmin=vmin or 1, vmax=vmax or max(1, np.nanmax(image, initial=1)))
+            artist = ax.imshow(image, origin='lower', extent=extent, aspect='auto', cmap=cmap, norm=norm,
+                               interpolation='nearest')
+        else:
+            vmin = self.color_range[0] if vmin is None else vmin
+            vmax = self.color_range[1] if vmax is None else vmax
+            artist = ax.imshow(image, origin='lower', extent=extent, aspect='auto', cmap=cmap, vmin=vmin,
+                               vmax=vmax, interpolation='nearest')
+        ax.set_xlim(*self.x_range)
+        ax.set_ylim(self.y_range[1], self.y_range[0])
+        return artist
+
+    # ---------------------------------------------------------------------------------------------------
+    # Persistence
+
+    def save(self, path):
+        np.savez_compressed(path, x_range=self.x_range, y_range=self.y_range, shape=self.shape,
+                            color_range=self.color_range, color_bins=self.color_bins, counts=self.counts,
+                            color_counts=self.color_counts, color_sum=self.color_sum,
+                            color_hist=self.color_hist)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            grid = cls(tuple(data['x_range']), tuple(data['y_range']), tuple(data['shape']),
+                       tuple(data['color_range']), int(data['color_bins']))
+            grid.counts = data['counts']
+            grid.color_counts = data['color_counts']
+            grid.color_sum = data['color_sum']
+            grid.color_hist = data['color_hist']
+        return grid
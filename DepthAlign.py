@@ -0,0 +1,241 @@
+# Resampling, Depth Shifts and Run Splicing
+#
+# The scripts assume one logging run sampled at one regular STEP. Wells also come in several runs, at different
+# sample rates, or with curves that have to be shifted onto the depth of a reference curve before they can be
+# compared. This module puts curves onto a common depth grid with vectorized NumPy, no loop over depth steps:
+#
+#     resample       one curve (or a (rows, curves) block) onto a grid: 'nearest', 'linear' or 'block' (the mean
+#                    of the samples falling in each grid interval, for going to a coarser step)
+#     resample_las   a whole well onto a new grid, as a new LasFile
+#     shift_curves   per-curve depth shifts, re-sampled back onto the well's own depth curve
+#     splice         several runs of the same well into one LasFile on one grid
+#     align_wells    many wells onto one shared grid, e.g. for multi-well versions of Log Data Plot Viz.py
+#
+# Grid points outside the sampled interval of a curve, or falling in a null gap, are NaN.
+#
+# Usage:
+#
+#     import DepthAlign
+#     las_05 = DepthAlign.resample_las(las, step=0.5, method='block')      # 0.1 ft LWD data onto 0.5 ft
+#     DepthAlign.shift_curves(las, {'RHOB': 1.5, 'NPLS': 1.5})             # RHOB/NPLS read 1.5 ft too shallow
+#     merged = DepthAlign.splice([run1, run2])                             # run1 wins where the runs overlap
+#     grid, curves = DepthAlign.align_wells({'A': las_a, 'B': las_b}, ['GR', 'RHOB'], step=0.5)
+#     ax.plot(curves['A']['GR'], grid)
+
+import numpy as np
+
+import LasReader
+
+
+METHODS = ('nearest', 'linear', 'block')
+
+# Tolerance, in grid steps, for depths that land on a grid point or interval edge.
+EPS = 1e-6
+
+
+def regular_grid(top, base, step):
+    # top, top + step, ... up to and including base (within rounding).
+    if step <= 0:
+        raise ValueError('step must be positive')
+    n = int(np.floor((base - top) / step + EPS)) + 1
+    return top + step * np.arange(max(n, 0))
+
+
+def sample_step(depth):
+    # Median spacing of a depth curve; robust to the odd missing or repeated depth.
+    depth = np.asarray(depth, dtype=np.float64)
+    if depth.size < 2:
+        raise ValueError('need at least two depth samples to find a step')
+    return float(np.median(np.abs(np.diff(depth))))
+
+
+def _increasing(depth, values):
+    # Depth increasing down the rows, flipping bottom-up data.
+    if depth.size > 1 and depth[0] > depth[-1]:
+        return depth[::-1], values[::-1]
+    return depth, values
+
+
+def resample(depth, values, grid, method='linear'):
+    # values: 1-D (one curve) or 2-D (rows, curves). Returns values on grid with the same trailing shape.
+    depth = np.asarray(depth, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    grid = np.asarray(grid, dtype=np.float64)
+    if values.shape[0] != depth.size:
+        raise ValueError(f'{values.shape[0]} values for {depth.size} depths')
+    if method not in METHODS:
+        raise ValueError(f"unknown resampling method {method!r}; use one of {', '.join(METHODS)}")
+
+    depth, values = _increasing(depth, values)
+    keep = ~np.isnan(depth)
+    depth, values = depth[keep], values[keep]
+    shape = (grid.size,) + values.shape[1:]
+    if depth.size == 0:
+        return np.full(shape, np.nan)
+
+    if method == 'block':
+        return _block_average(depth, values, grid)
+
+    # Position of every grid point between two samples: depth[left] <= grid < depth[left + 1].
+    right = np.searchsorted(depth, grid, side='right')
+    left = np.clip(right - 1, 0, depth.size - 1)
+    right = np.clip(right, 0, depth.size - 1)
+    span = depth[right] - depth[left]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.where(span > 0, (grid - depth[left]) / span, 0.0)
+    fraction = fraction.reshape((-1,) + (1,) * (values.ndim - 1))
+
+    if method == 'nearest':
+        result = values[np.where(fraction.ravel() <= 0.5, left, right)]
+        # Beyond the ends, only accept the end sample within half a sample spacing.
+        half = 0.5 * (sample_step(depth) if depth.size > 1 else 0.0)
+        outside = (grid < depth[0] - half) | (grid > depth[-1] + half)
+    else:
+        low, high = values[left], values[right]
+        result = low + (high - low) * fraction
+        # Exactly on a sample: take it even if the next one is null.
+        on_sample = (fraction == 0).reshape((-1,) + (1,) * (values.ndim - 1))
+        result = np.where(on_sample, low, result)
+        outside = (grid < depth[0]) | (grid > depth[-1])
+    result = np.array(result, dtype=np.float64).reshape(shape)
+    result[outside] = np.nan
+    return result
+
+
+def _block_average(depth, values, grid):
+    # Mean of the valid samples in [grid - step/2, grid + step/2) around each grid point, from running sums,
+    # so the cost is O(samples + grid points) whatever the ratio of the two steps.
+    if grid.size > 1:
+        half = 0.5 * np.diff(grid)
+        edges = np.concatenate([[grid[0] - half[0]], grid[:-1] + half, [grid[-1] + half[-1]]])
+    else:
+        edges = grid[[0, 0]] + np.array([-0.5, 0.5]) * (sample_step(depth) if depth.size > 1 else 1.0)
+    bounds = np.searchsorted(depth, edges, side='left')
+
+    valid = ~np.isnan(values)
+    zero = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zero, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.concatenate([zero, np.cumsum(valid, axis=0)])
+    total = sums[bounds[1:]] - sums[bounds[:-1]]
+    count = counts[bounds[1:]] - counts[bounds[:-1]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+# -------------------------------------------------------------------------------------------------------
+# Whole wells
+
+def _default_grid(las_files, step=None, top=None, base=None):
+    depths = [np.asarray(las[las.index_name], dtype=np.float64) for las in las_files]
+    depths = [depth[~np.isnan(depth)] for depth in depths if np.any(~np.isnan(depth))]
+    if not depths:
+        raise ValueError('no depth samples')
+    step = step or min(sample_step(depth) for depth in depths)
+    top = min(depth.min() for depth in depths) if top is None else top
+    base = max(depth.max() for depth in depths) if base is None else base
+    return regular_grid(top, base, step)
+
+
+def _block(las, curves):
+    return np.column_stack([las[name] for name in curves]) if curves else np.empty((len(las[las.index_name]), 0))
+
+
+def resample_las(las, step=None, grid=None, method='linear', curves=None, top=None, base=None):
+    # A new LasFile with the curves on grid (or a regular grid of the given step, default: the well's own step
+    # over its own range). STRT/STOP/STEP in the ~Well section are updated to match.
+    index_name = las.index_name
+    grid = _default_grid([las], step, top, base) if grid is None else np.asarray(grid, dtype=np.float64)
+    names = [name for name in (curves or las.keys()) if name != index_name]
+    block = resample(las[index_name], _block(las, names), grid, method)
+
+    data = {index_name: grid}
+    data.update({name: np.ascontiguousarray(block[:, i]) for i, name in enumerate(names)})
+    curve_items = {name: las.curves[name] for name in [index_name] + names}
+    return LasReader.LasFile(las.version, _grid_well_section(las.well, grid), curve_items, las.params, las.other,
+                             data)
+
+
+def _grid_well_section(well, grid):
+    # Copy of the ~Well items with STRT/STOP/STEP describing the new grid.
+    well = dict(well)
+    values = {'STRT': grid[0] if grid.size else None, 'STOP': grid[-1] if grid.size else None,
+              'STEP': float(grid[1] - grid[0]) if grid.size > 1 else 0.0}
+    for mnemonic, value in values.items():
+        if mnemonic in well and value is not None:
+            well[mnemonic] = well[mnemonic]._replace(value=round(float(value), 6))
+    return well
+
+
+def shift_curves(las, shifts, method='linear'):
+    # Apply per-curve depth shifts in place: {'RHOB': 1.5} moves RHOB 1.5 depth units deeper (a feature seen at
+    # 3000 ft is moved to 3001.5 ft). The shifted curve is re-sampled onto the well's own depth curve.
+    depth = las[las.index_name]
+    for name, offset in shifts.items():
+        if offset:
+            las.data[name] = resample(depth + offset, las[name], depth, method)
+    return las
+
+
+def splice(runs, step=None, method='linear', splice_depths=None, curves=None):
+    # Merge several logging runs of one well into a single LasFile on one grid.
+    #
+    # Without splice_depths, runs are in order of priority: where runs overlap, the first run with a valid
+    # sample wins and later runs only fill what is missing. With splice_depths (one per junction, in depth
+    # order, runs ordered top to bottom) run i is used from splice_depths[i - 1] down to splice_depths[i],
+    # falling back to the other runs only where it has nulls.
+    runs = list(runs)
+    if not runs:
+        raise ValueError('nothing to splice')
+    grid = _default_grid(runs, step)
+    index_name = runs[0].index_name
+    if curves is None:
+        curves = []
+        for run in runs:
+            curves.extend(name for name in run.keys() if name != index_name and name not in curves)
+
+    resampled = []
+    for run in runs:
+        present = [name for name in curves if name in run]
+        block = np.full((grid.size, len(curves)), np.nan)
+        if present:
+            columns = [curves.index(name) for name in present]
+            block[:, columns] = resample(run[run.index_name], _block(run, present), grid, method)
+        resampled.append(block)
+    stack = np.stack(resampled)  # (runs, grid, curves)
+
+    if splice_depths is not None:
+        if len(splice_depths) != len(runs) - 1:
+            raise ValueError(f'{len(runs)} runs need {len(runs) - 1} splice depths')
+        owner = np.searchsorted(np.asarray(splice_depths, dtype=np.float64), grid, side='right')
+        # Move each grid point's own run to the front of the priority order.
+        order = np.arange(len(runs))[None, :]
+        order = np.where(order == 0, owner[:, None], np.where(order <= owner[:, None], order - 1, order))
+        stack = np.take_along_axis(stack, order.T[:, :, None], axis=0)
+
+    # First valid sample along the run axis.
+    valid = ~np.isnan(stack)
+    first = np.argmax(valid, axis=0)
+    merged = np.take_along_axis(stack, first[None], axis=0)[0]
+
+    data = {index_name: grid}
+    data.update({name: np.ascontiguousarray(merged[:, i]) for i, name in enumerate(curves)})
+    curve_items = {index_name: runs[0].curves[index_name]}
+    for name in curves:
+        curve_items[name] = next(run.curves[name] for run in runs if name in run.curves)
+    base = runs[0]
+    return LasReader.LasFile(base.version, _grid_well_section(base.well, grid), curve_items, base.params, base.other,
+                             data)
+
+
+def align_wells(wells, curves, step=None, top=None, base=None, method='linear'):
+    # Put the same curves of many wells on one shared grid. wells is {name: LasFile}; returns
+    # (grid, {name: {curve: values}}), with NaN where a well has no data or lacks the curve.
+    wells = dict(wells)
+    grid = _default_grid(wells.values(), step, top, base)
+    result = {}
+    for name, las in wells.items():
+        present = [curve for curve in curves if curve in las]
+        block = resample(las[las.index_name], _block(las, present), grid, method) if present else None
+        result[name] = {curve: (block[:, present.index(curve)] if curve in present else np.full(grid.size, np.nan))
+                        for curve in curves}
+    return grid, result
@@ -0,0 +1,90 @@
+# Fast Binned Kernel Density Estimate
+#
+# df['GR'].plot(kind='kde') evaluates scipy's gaussian_kde at 1000 grid points against every sample, which costs
+# O(n * m). kde() gives the same curve in O(n + M log M): the samples are linearly binned onto a fine uniform
+# grid of M points, the bin weights are convolved with a sampled Gaussian kernel using the FFT, and the result is
+# interpolated onto the requested grid. The bandwidth follows scipy's rules (Scott's by default, as pandas uses),
+# so the only difference to the exact estimate is the tiny binning error.
+#
+# Usage:
+#
+#     import FastKDE
+#     x, density = FastKDE.kde(df['GR'])              # pandas' default grid: data range padded by half of it
+#     plt.plot(x, density, color='black')
+#
+#     FastKDE.plot_kde(ax, df['GR'], color='black')   # the same, drawn on an axes
+
+import numpy as np
+
+
+DEFAULT_GRIDSIZE = 1000
+DEFAULT_BINS = 1 << 13
+
+# The sampled kernel is cut off this many bandwidths from its centre.
+KERNEL_CUTOFF = 6.0
+
+
+def bandwidth(values, bw_method='scott'):
+    # Kernel standard deviation for the given rule, matching scipy.stats.gaussian_kde: the rule gives a factor
+    # that scales the sample standard deviation (ddof=1).
+    n = values.size
+    if bw_method in (None, 'scott'):
+        factor = n ** (-1.0 / 5.0)
+    elif bw_method == 'silverman':
+        factor = (n * 3.0 / 4.0) ** (-1.0 / 5.0)
+    elif callable(bw_method):
+        factor = bw_method(values)
+    else:
+        factor = float(bw_method)
+    return factor * np.std(values, ddof=1)
+
+
+def default_grid(values, gridsize=DEFAULT_GRIDSIZE):
+    # pandas' plot(kind='kde') grid: the data range padded by half of itself on both sides.
+    low, high = values.min(), values.max()
+    spread = high - low
+    return np.linspace(low - 0.5 * spread, high + 0.5 * spread, gridsize)
+
+
+def kde(values, grid=None, gridsize=DEFAULT_GRIDSIZE, bw_method='scott', bins=DEFAULT_BINS):
+    # Returns (grid, density). NaNs are ignored, like pandas does.
+    values = np.asarray(values, dtype=np.float64).ravel()
+    values = values[~np.isnan(values)]
+    if values.size < 2:
+        raise ValueError('kde() needs at least two non-null values')
+    grid = default_grid(values, gridsize) if grid is None else np.asarray(grid, dtype=np.float64)
+
+    sigma = bandwidth(values, bw_method)
+    if not sigma > 0:
+        raise ValueError('kde() needs values with a non-zero spread')
+
+    # Fine binning grid covering both the data and the requested grid. Keep at least ~20 bins per bandwidth
+    # so the linear-binning error stays far below plotting resolution.
+    low = min(values.min(), grid.min())
+    high = max(values.max(), grid.max())
+    bins = int(min(max(bins, np.ceil(20 * (high - low) / sigma) + 1), 1 << 22))
+    dx = (high - low) / (bins - 1)
+
+    # Linear binning: each sample splits its weight between the two nearest grid points.
+    position = (values - low) / dx
+    left = np.clip(np.floor(position).astype(np.int64), 0, bins - 2)
+    fraction = position - left
+    weights = np.bincount(left, weights=1.0 - fraction, minlength=bins)
+    weights += np.bincount(left + 1, weights=fraction, minlength=bins)
+
+    # Gaussian kernel sampled at the bin spacing, convolved with the bin weights via the FFT.
+    half = int(np.ceil(KERNEL_CUTOFF * sigma / dx))
+    offsets = np.arange(-half, half + 1) * dx
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2) / (sigma * np.sqrt(2.0 * np.pi))
+    size = 1 << int(np.ceil(np.log2(bins + kernel.size - 1)))
+    smoothed = np.fft.irfft(np.fft.rfft(weights, size) * np.fft.rfft(kernel, size), size)
+    density = smoothed[half:half + bins] / values.size
+
+    bin_grid = low + dx * np.arange(bins)
+    return grid, np.interp(grid, bin_grid, np.clip(density, 0.0, None))
+
+
+def plot_kde(ax, values, grid=None, bw_method='scott', **plot_kwargs):
+    # Drop-in for series.plot(kind='kde', ax=ax, ...).
+    x, density = kde(values, grid=grid, bw_method=bw_method)
+    return ax.plot(x, density, **plot_kwargs)
@@ -0,0 +1,234 @@
+# Reusable Figure Templates
+#
+# Every LogPlots call builds its figure from scratch: the Figure, the subplots, the twin NPLS axis, axis
+# inversion, tick positions, grids, labels, legends and colour bars, before any data is drawn. Over a batch of
+# wells that set-up costs more than the data. A template builds one of these layouts once and, for each well,
+# only swaps the data of its artists and updates the limits before saving:
+#
+#     LogTracksTemplate   ->  LogPlots.log_tracks       line data (Line2D.set_data), autoscaled depth/x limits
+#     ShadedGRTemplate    ->  LogPlots.shaded_gr_log    line data and the two sand/shale fills
+#     BoxPlotTemplate     ->  LogPlots.box_plots        the box, whisker, flier and mean artists of each axes
+#     CrossplotTemplate   ->  LogPlots.crossplot        scatter offsets and colours (fixed limits and colour bar)
+#
+# Each template's render(df, path, ...) takes the same arguments as the LogPlots function and writes the same
+# PNG, byte for byte: limits are autoscaled exactly as a fresh figure would be, decimation uses the axes'
+# pre-layout size, and the layouts that call tight_layout() still do so for every well, since the tick labels
+# depend on the data. A template is not thread-safe; use one per thread or process.
+#
+# Usage:
+#
+#     import FigureTemplates
+#     tracks = FigureTemplates.LogTracksTemplate()
+#     for well, df in wells:
+#         tracks.render(df, f'Log Plot/{well}.png', dpi=300)
+#
+#     render = FigureTemplates.renderer(LogPlots.shaded_gr_log)   # the per-process template, or the function
+#     render(df, 'Log Plot/Shale-Sand-Log.png')                   # itself for figures without one
+
+import matplotlib.patches as mpatches
+import numpy as np
+from matplotlib import style
+from matplotlib.figure import Figure
+
+import LogPlots
+
+
+def _restore_layout(fig, params):
+    # Put the subplots back where a new figure has them, so decimation sees the same pixel rows.
+    fig.subplots_adjust(**params)
+
+
+def _layout_params(fig):
+    p = fig.subplotpars
+    return {'left': p.left, 'right': p.right, 'bottom': p.bottom, 'top': p.top, 'wspace': p.wspace,
+            'hspace': p.hspace}
+
+
+def _autoscale(*axes):
+    for ax in axes:
+        ax.relim()
+    for ax in axes:
+        ax.autoscale_view()
+
+
+class LogTracksTemplate:
+
+    def __init__(self):
+        self.fig = Figure(figsize=(18, 6))
+        self.layout = _layout_params(self.fig)
+        ax1, ax2, ax3 = self.axes = self.fig.subplots(1, 3)
+
+        # GR track
+        self.gr, = ax1.plot([], [], color='black')
+        ax1.set_xlabel('GR (Gamma Ray)')
+        ax1.set_ylabel('Depth')
+        ax1.invert_yaxis()
+        ax1.xaxis.set_ticks_position('top')
+        ax1.grid(True)
+
+        # ILD track
+        self.ild, = ax2.plot([], [], color='yellow')
+        ax2.set_xlabel('ILD (Deep Induction Resistivity)')
+        ax2.set_yticklabels([])
+        ax2.invert_yaxis()
+        ax2.xaxis.set_ticks_position('top')
+        ax2.grid(True)
+
+        # RHOB track, with NPLS on a twin x axis
+        self.rhob, = ax3.plot([], [], color='gray', label='RHOB')
+        ax3.set_xlabel('RHOB')
+        ax3.invert_yaxis()
+        ax3.xaxis.set_ticks_position('top')
+        ax3.yaxis.set_ticks_position('right')
+        ax3.set_yticklabels([])
+        ax3.grid(True)
+
+        self.twin = ax3.twiny()
+        self.npls, = self.twin.plot([], [], color='red', label='NPLS')
+        self.twin.set_xlabel('NPLS')
+        self.twin.invert_yaxis()
+        self.twin.invert_xaxis()
+        self.twin.set_xlim(0, 40)
+        self.twin.xaxis.set_ticks_position('top')
+        self.twin.grid(True)
+
+        handles1, labels1 = ax3.get_legend_handles_labels()
+        handles2, labels2 = self.twin.get_legend_handles_labels()
+        ax3.legend(handles1 + handles2, labels1 + labels2, loc='upper left')
+
+    def render(self, df, path, dpi=300, decimate=True):
+        _restore_layout(self.fig, self.layout)
+        ax1, ax2, ax3 = self.axes
+        depth = df.index.to_numpy()
+        for line, ax, curve in ((self.gr, ax1, 'GR'), (self.ild, ax2, 'ILD'), (self.rhob, ax3, 'RHOB'),
+                                (self.npls, ax3, 'NPLS')):
+            curve_depth, values = LogPlots._track_data(ax, depth, LogPlots._curve(df, curve), dpi, decimate)
+            line.set_data(values, curve_depth)
+        _autoscale(ax1, ax2, ax3, self.twin)
+
+        self.fig.tight_layout()
+        LogPlots._save(self.fig, path, dpi)
+        return self.fig
+
+
+class ShadedGRTemplate:
+
+    def __init__(self, cutoff=50):
+        self.cutoff = cutoff
+        self.fig = Figure(figsize=(5, 8))
+        self.layout = _layout_params(self.fig)
+        ax = self.ax = self.fig.subplots()
+
+        self.line, = ax.plot([], [], c='black', lw=0.5)
+        self.sand = ax.fill_betweenx([], cutoff, [], facecolor='yellow')
+        self.shale = ax.fill_betweenx([], [], cutoff, facecolor='gray')
+
+        ax.set_xlim(0, 150)
+        ax.invert_yaxis()
+        ax.xaxis.tick_top()
+
+        yellow_patch = mpatches.Patch(color='yellow', label='Sand')
+        gray_patch = mpatches.Patch(color='gray', label='Shale')
+        ax.legend(handles=[yellow_patch, gray_patch])
+
+    def _fill(self, old, depth, x1, x2, where, facecolor):
+        if hasattr(old, 'set_data'):  # FillBetweenPolyCollection, matplotlib 3.10 and later
+            old.set_data(depth, x1, x2, where=where)
+            return old
+        old.remove()
+        return self.ax.fill_betweenx(depth, x1, x2, where=where, facecolor=facecolor)
+
+    def render(self, df, path, cutoff=None, dpi=300, decimate=True):
+        cutoff = self.cutoff if cutoff is None else cutoff
+        _restore_layout(self.fig, self.layout)
+        depth, gr = LogPlots._track_data(self.ax, df.index.to_numpy(), LogPlots._curve(df, 'GR'), dpi, decimate)
+        self.line.set_data(gr, depth)
+        self.sand = self._fill(self.sand, depth, cutoff, gr, gr <= cutoff, 'yellow')
+        self.shale = self._fill(self.shale, depth, gr, cutoff, gr >= cutoff, 'gray')
+        # relim() only measures lines and patches, so the fills' extents are added as fill_betweenx does.
+        self.ax.relim()
+        for fill in (self.sand, self.shale):
+            self.ax.update_datalim(fill.get_datalim(self.ax.transData))
+        self.ax.autoscale_view()
+
+        LogPlots._save(self.fig, path, dpi)
+        return self.fig
+
+
+class BoxPlotTemplate:
+
+    def __init__(self):
+        self.fig = Figure(figsize=(16, 6))
+        self.layout = _layout_params(self.fig)
+        self.axes = self.fig.subplots(1, 4)
+        self.artists = []
+        for ax, (curve, xlabel, title) in zip(self.axes, LogPlots.BOX_PLOT_CURVES):
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel('Values')
+            ax.set_title(title)
+
+    def render(self, df, path, dpi=300):
+        # The boxes themselves are data (a notched box's outline depends on the quartiles and the median's
+        # confidence interval), so the previous well's box artists are removed and new ones drawn into the
+        # axes that are already set up.
+        _restore_layout(self.fig, self.layout)
+        columns = LogPlots._box_plot_columns(df)
+        for artists in self.artists:
+            for artist in artists:
+                artist.remove()
+        self.artists = []
+        for ax, (curve, _, _) in zip(self.axes, LogPlots.BOX_PLOT_CURVES):
+            ax.relim()
+            drawn = ax.boxplot(columns[curve], showmeans=True, notch=True, flierprops=LogPlots.RED_CIRCLE)
+            ax.set_xticks([1], [curve])
+            self.artists.append([artist for group in drawn.values() for artist in group])
+
+        self.fig.tight_layout()
+        LogPlots._save(self.fig, path, dpi)
+        return self.fig
+
+
+class CrossplotTemplate:
+
+    def __init__(self):
+        with style.context('bmh'):
+            self.fig = Figure(figsize=(8, 8))
+            ax = self.ax = self.fig.subplots()
+            self.points = ax.scatter([], [], c=[], vmin=0, vmax=100, cmap='rainbow')
+
+            ax.set_xlim(-5, 60)
+            ax.set_ylim(3.0, 1.5)
+
+            ax.set_ylabel('(RHOB) .G/C3 Bulk Density', fontsize=14)
+            ax.set_xlabel('(NPLS ) .% Neutron Porosity (Limestone)', fontsize=14)
+            self.fig.colorbar(self.points, ax=ax, label='Gamma Ray - API')
+
+    def render(self, df, path, dpi=300):
+        x, y, c = LogPlots._curve(df, 'NPLS'), LogPlots._curve(df, 'RHOB'), LogPlots._curve(df, 'GR')
+        # As in ax.scatter, points with a null in any of the three curves are left out.
+        keep = ~(np.isnan(x) | np.isnan(y) | np.isnan(c))
+        self.points.set_offsets(np.column_stack([x[keep], y[keep]]))
+        self.points.set_array(c[keep])
+        with style.context('bmh'):
+            LogPlots._save(self.fig, path, dpi)
+        return self.fig
+
+
+TEMPLATES = {
+    LogPlots.log_tracks: LogTracksTemplate,
+    LogPlots.shaded_gr_log: ShadedGRTemplate,
+    LogPlots.box_plots: BoxPlotTemplate,
+    LogPlots.crossplot: CrossplotTemplate,
+}
+
+_templates = {}
+
+
+def renderer(render):
+    # The render method of this process's template for a LogPlots function, or the function itself if there is
+    # no template for it.
+    if render not in TEMPLATES:
+        return render
+    if render not in _templates:
+        _templates[render] = TEMPLATES[render]()
+    return _templates[render].render
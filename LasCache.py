@@ -0,0 +1,202 @@
+# Parsed-LAS Cache
+#
+# Every script parses the same LAS files over and over. This module keeps a persistent copy of each parsed
+# file on disk as an uncompressed NumPy .npz archive: one array per curve (so each curve is stored as a
+# contiguous column) plus the header as JSON. Entries are keyed by the SHA-256 of the LAS file's bytes and
+# by LasReader.PARSER_VERSION, so editing a file or changing the parser simply misses the cache.
+#
+# Usage:
+#
+#     import LasCache
+#     las = LasCache.load_las("Data/1044222726.las")    # parses on the first run, reads the cache afterwards
+#     df = las.df()
+#
+#     las = LasCache.load_las(path, curves=['GR', 'RHOB'])    # only these curves are read from the cache entry
+#     las = LasCache.load_las(path, lazy=True)                # each curve is read when it is first used
+#
+# The cache lives in ".las_cache" (override with the LAS_CACHE_DIR environment variable) and is trimmed to
+# LAS_CACHE_MAX_MB megabytes (default 1024), evicting the least recently used entries first.
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+import LasReader
+import Profiler
+
+
+DEFAULT_CACHE_DIR = '.las_cache'
+DEFAULT_MAX_MB = 1024
+
+HEADER_KEY = 'header'
+
+
+def cache_dir():
+    return os.environ.get('LAS_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+
+def max_cache_bytes():
+    return int(float(os.environ.get('LAS_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path, directory=None):
+    directory = directory or cache_dir()
+    return os.path.join(directory, f'{file_hash(path)}-v{LasReader.PARSER_VERSION}.npz')
+
+
+def load_las(path, directory=None, max_bytes=None, curves=None, lazy=False):
+    # curves=[...] reads only those curves (plus depth); lazy=True reads each curve on first access. Every
+    # curve is stored in its own array of the entry, so either way the others are never read.
+    entry = cache_path(path, directory)
+
+    if os.path.exists(entry):
+        try:
+            with Profiler.stage('cache read'):
+                las = read_entry(entry, curves, lazy, source=path)
+        except (OSError, ValueError, KeyError):
+            # A truncated or corrupt entry is treated as a miss and rewritten below.
+            pass
+        else:
+            os.utime(entry)  # mark as recently used for the eviction policy
+            return las
+
+    with Profiler.stage('parse'):
+        las = LasReader.read_las(path)
+    with Profiler.stage('cache write'):
+        write_entry(entry, las)
+    evict(os.path.dirname(entry), max_cache_bytes() if max_bytes is None else max_bytes)
+    if curves is not None:
+        las = _select(las, curves)
+    return las
+
+
+def _select(las, curves):
+    # The same well restricted to the given curves (the depth curve is always kept).
+    unknown = [name for name in curves if name not in las.curves]
+    if unknown:
+        raise KeyError(f"curves not in the file: {', '.join(unknown)}")
+    names = [las.index_name] + [name for name in dict.fromkeys(curves) if name != las.index_name]
+    return LasReader.LasFile(las.version, las.well, {name: las.curves[name] for name in names}, las.params,
+                             las.other, {name: las[name] for name in names})
+
+
+def write_entry(entry, las):
+    names = las.keys()
+    arrays = {f'c{i}': las[name] for i, name in enumerate(names)}
+    arrays[HEADER_KEY] = np.array(json.dumps(header_to_json(las)))
+
+    # Write to a temporary file first so a crash never leaves a half-written entry behind.
+    directory = os.path.dirname(entry) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # The '.tmp' suffix keeps it out of evict(), which another process may run on the same directory meanwhile.
+    fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, entry)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def read_entry(entry, curves=None, lazy=False, source=None):
+    with np.load(entry, allow_pickle=False) as archive:
+        header = json.loads(str(archive[HEADER_KEY]))
+        keys = {row[0]: f'c{i}' for i, row in enumerate(header['curves'])}
+        names = list(keys)
+        if curves is not None:
+            unknown = [name for name in curves if name not in keys]
+            if unknown:
+                raise KeyError(f"curves not in the file: {', '.join(unknown)}")
+            names = [names[0]] + [name for name in dict.fromkeys(curves) if name != names[0]]
+            header['curves'] = [row for row in header['curves'] if row[0] in names]
+            header['curves'].sort(key=lambda row: names.index(row[0]))
+        if not lazy:
+            return las_from_json(header, {name: archive[keys[name]] for name in names})
+
+    def loader(wanted):
+        try:
+            with np.load(entry, allow_pickle=False) as archive:
+                return {name: archive[keys[name]] for name in wanted}
+        except OSError:
+            if source is None:
+                raise
+            # The entry was evicted since the header was read: parse the curves from the LAS file instead.
+            las = LasReader.read_las(source, curves=wanted)
+            return {name: las[name] for name in wanted}
+
+    return las_from_json(header, LasReader.LazyCurves(names, loader))
+
+
+def evict(directory, max_bytes, pattern='.npz'):
+    # Delete the least recently used entries until the directory fits in max_bytes.
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(pattern)]
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    for name in names:
+        full = os.path.join(directory, name)
+        try:
+            stat = os.stat(full)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, full))
+
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _, size, full in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(full)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed.append(full)
+    return removed
+
+
+def clear(directory=None):
+    return evict(directory or cache_dir(), 0)
+
+
+def header_to_json(las):
+    # The header sections as plain JSON-serializable lists; also used by LasExport.
+    return {
+        'version': _items_to_json(las.version),
+        'well': _items_to_json(las.well),
+        'curves': _items_to_json(las.curves),
+        'params': _items_to_json(las.params),
+        'other': las.other,
+    }
+
+
+def las_from_json(header, data):
+    # Inverse of header_to_json(): a LasFile from the stored header and {mnemonic: array} curve data.
+    return LasReader.LasFile(_items_from_json(header['version']), _items_from_json(header['well']),
+                             _items_from_json(header['curves']), _items_from_json(header['params']),
+                             header['other'], data)
+
+
+def _items_to_json(items):
+    return [list(item) for item in items.values()]
+
+
+def _items_from_json(rows):
+    return {row[0]: LasReader.HeaderItem(*row) for row in rows}
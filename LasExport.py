@@ -0,0 +1,189 @@
+# Well Export
+#
+# Data Exploration.py exports the well with df.to_csv() and df.to_excel(). Both build the whole frame in memory,
+# the units and the rest of the LAS header are lost, and the openpyxl path for XLSX is very slow on large wells.
+# This module adds:
+#
+#     to_parquet / to_feather   compressed columnar files (zstd) that keep the complete LAS header and the unit
+#                               and description of every curve; read back with read_parquet / read_feather
+#     to_csv / to_xlsx          the same CSV/XLSX layout as the pandas exports, written chunk by chunk
+#
+# Every writer accepts either a LasFile or the path of a LAS file. Given a path, the file is streamed with
+# LasStream and written one chunk at a time (one Parquet row group / Arrow record batch per chunk), so memory
+# stays bounded by chunk_rows no matter how long the well is.
+#
+# pyarrow (Parquet/Feather) and openpyxl (XLSX) are optional; they are only imported when those formats are used.
+#
+# Usage:
+#
+#     import LasExport
+#     LasExport.to_parquet("Data/1044222726.las", "Data/1044222726.parquet")
+#     las = LasExport.read_parquet("Data/1044222726.parquet")          # LasFile: header, units and curves
+#     las = LasExport.read_parquet("Data/1044222726.parquet", curves=['GR', 'RHOB'])
+#
+#     LasExport.export(las, "Data/1044222726.xlsx")                     # format from the file extension
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import LasCache
+import LasReader
+import LasStream
+
+
+DEFAULT_CHUNK_ROWS = 100_000
+COMPRESSION = 'zstd'
+
+# Schema-level metadata key holding the LAS header (LasCache.header_to_json) as JSON.
+HEADER_KEY = b'las_header'
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+    except ImportError as error:
+        raise ImportError('Parquet/Feather export needs pyarrow: pip install pyarrow') from error
+    return pyarrow
+
+
+def _import_openpyxl():
+    try:
+        import openpyxl
+    except ImportError as error:
+        raise ImportError('XLSX export needs openpyxl: pip install openpyxl') from error
+    return openpyxl
+
+
+def _source(source, chunk_rows):
+    # (header object, curve names, iterator of (rows, curves) blocks) for a LasFile or a LAS path.
+    if isinstance(source, LasReader.LasFile):
+        names = source.keys()
+        nrows = source[names[0]].size
+
+        def blocks():
+            for start in range(0, max(nrows, 1), chunk_rows):
+                yield np.column_stack([source[name][start:start + chunk_rows] for name in names])
+
+        return source, names, blocks()
+
+    stream = LasStream.open_las(os.fspath(source), chunk_rows)
+    return stream, stream.curve_names, iter(stream)
+
+
+# -------------------------------------------------------------------------------------------------------
+# Columnar formats
+
+def _schema(pa, header, names):
+    fields = [pa.field(name, pa.float64(), metadata={'unit': header.curves[name].unit,
+                                                     'descr': header.curves[name].descr})
+              for name in names]
+    return pa.schema(fields, metadata={HEADER_KEY: json.dumps(LasCache.header_to_json(header))})
+
+
+def _record_batches(pa, schema, blocks):
+    for block in blocks:
+        yield pa.RecordBatch.from_arrays([pa.array(block[:, i]) for i in range(block.shape[1])], schema=schema)
+
+
+def to_parquet(source, path, chunk_rows=DEFAULT_CHUNK_ROWS, compression=COMPRESSION):
+    pa = _import_pyarrow()
+    header, names, blocks = _source(source, chunk_rows)
+    schema = _schema(pa, header, names)
+    with pa.parquet.ParquetWriter(path, schema, compression=compression) as writer:
+        for batch in _record_batches(pa, schema, blocks):
+            writer.write_batch(batch)
+
+
+def to_feather(source, path, chunk_rows=DEFAULT_CHUNK_ROWS, compression=COMPRESSION):
+    # Feather v2 is the Arrow IPC file format, so it can be written one record batch at a time.
+    pa = _import_pyarrow()
+    header, names, blocks = _source(source, chunk_rows)
+    schema = _schema(pa, header, names)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(path, schema, options=options) as writer:
+        for batch in _record_batches(pa, schema, blocks):
+            writer.write_batch(batch)
+
+
+def _las_from_table(table):
+    header = json.loads(table.schema.metadata[HEADER_KEY])
+    # Keep only the header rows of the curves that were read, in the order they were read.
+    rows = {row[0]: row for row in header['curves']}
+    header['curves'] = [rows[name] for name in table.column_names]
+    data = {name: table.column(name).to_numpy() for name in table.column_names}
+    return LasCache.las_from_json(header, data)
+
+
+def _with_index(table_columns, curves):
+    # The depth curve is always read, so the result can still build las.df().
+    if curves is None:
+        return None
+    return [table_columns[0]] + [name for name in curves if name != table_columns[0]]
+
+
+def read_parquet(path, curves=None):
+    # Only the requested columns are read from disk.
+    pa = _import_pyarrow()
+    names = pa.parquet.read_schema(path).names
+    return _las_from_table(pa.parquet.read_table(path, columns=_with_index(names, curves)))
+
+
+def read_feather(path, curves=None):
+    pa = _import_pyarrow()
+    with pa.memory_map(path) as source:
+        names = pa.ipc.open_file(source).schema.names
+    return _las_from_table(pa.feather.read_table(path, columns=_with_index(names, curves)))
+
+
+# -------------------------------------------------------------------------------------------------------
+# Row formats
+
+def to_csv(source, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Same output as las.df().to_csv(path), produced one chunk at a time.
+    _, names, blocks = _source(source, chunk_rows)
+    with open(path, 'w', newline='') as f:
+        for i, block in enumerate(blocks):
+            chunk = pd.DataFrame(block[:, 1:], index=pd.Index(block[:, 0], name=names[0]), columns=names[1:])
+            chunk.to_csv(f, header=(i == 0))
+
+
+def to_xlsx(source, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # The layout of las.df().to_excel(path) on 'Sheet1', written through openpyxl's write-only mode, which
+    # streams rows to disk instead of keeping a cell object for every value. A second sheet, 'Curves', lists
+    # the unit and description of each curve.
+    openpyxl = _import_openpyxl()
+    header, names, blocks = _source(source, chunk_rows)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.append(names)
+    for block in blocks:
+        for row in block.tolist():
+            sheet.append([None if value != value else value for value in row])  # NaN -> empty cell
+
+    curves = workbook.create_sheet('Curves')
+    curves.append(['Mnemonic', 'Unit', 'Description'])
+    for name in names:
+        curves.append([name, header.curves[name].unit, header.curves[name].descr])
+    workbook.save(path)
+
+
+WRITERS = {
+    '.parquet': to_parquet,
+    '.feather': to_feather,
+    '.arrow': to_feather,
+    '.csv': to_csv,
+    '.xlsx': to_xlsx,
+}
+
+
+def export(source, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"unknown export format {extension!r}; use one of {', '.join(WRITERS)}")
+    WRITERS[extension](source, path, chunk_rows)
@@ -0,0 +1,416 @@
+# Native LAS 2.0 Reader
+#
+# lasio parses the ~A section line by line in Python, which dominates the runtime of every script on
+# high-resolution wells. This module is a small, project-owned reader: the header blocks
+# (~Version, ~Well, ~Curve, ~Parameter, ~Other) are parsed line by line because they are tiny, while the
+# ~A section is handed to NumPy in one vectorized pass.
+#
+# Usage (a drop-in for the lasio.read(...) / las.df() pair used by the scripts):
+#
+#     import LasReader
+#     las = LasReader.read_las("Data/1044222726.las")
+#     df = las.df()
+#
+#     print(las.well['WELL'].value)       # CANTON SWD #1
+#     print(las.curves['GR'].unit)        # GAPI
+#     print(las['GR'][:5])                # NumPy array of the GR curve
+#
+# The plotting scripts use four of the 18 curves, so the curves can also be selected or loaded lazily:
+#
+#     las = LasReader.read_las(path, curves=['GR', 'ILD', 'RHOB', 'NPLS'])   # parse only these (plus depth)
+#     las = LasReader.read_las(path, lazy=True)       # header now; each curve is parsed on first access
+#     df = las.df(curves=['GR', 'RHOB'])              # loads both in one pass and builds a two-column frame
+#
+# The ~A section is read in chunks of DATA_CHUNK_BYTES that end on a line break, and only the requested
+# columns of each chunk are kept, so peak memory is one chunk plus the selected curves rather than the whole
+# file. Most LAS writers pad every value to a fixed width; when up to half of the curves are requested and a
+# chunk has that layout, each requested column is cut straight out of the text by character position and
+# converted on its own, so parse time also scales with the number of curves requested. Otherwise the chunk
+# goes through np.loadtxt, which is faster when most of the columns are needed anyway. A lazy file keeps only
+# the offset of the ~A section and re-reads it from disk when curves are first used.
+
+import io
+import warnings
+from collections import namedtuple
+from collections.abc import MutableMapping
+
+import numpy as np
+import pandas as pd
+
+
+# Bumped whenever the parsed output changes, so caches built on top of the reader can be invalidated.
+PARSER_VERSION = 1
+
+HeaderItem = namedtuple('HeaderItem', ['mnemonic', 'unit', 'value', 'descr'])
+
+# Bytes of ~A text parsed at a time; bounds the text and the temporary arrays held besides the curves.
+DATA_CHUNK_BYTES = 1 << 22
+
+# Map the first word of a "~" line to the section it opens.
+SECTION_NAMES = {
+    'V': 'version',
+    'W': 'well',
+    'C': 'curves',
+    'P': 'params',
+    'O': 'other',
+    'A': 'data',
+}
+
+
+class LasFile:
+    """Header sections plus one 1-D float64 array per curve, in file order."""
+
+    def __init__(self, version, well, curves, params, other, data):
+        self.version = version
+        self.well = well
+        self.curves = curves
+        self.params = params
+        self.other = other
+        self.data = data
+
+    def __getitem__(self, mnemonic):
+        return self.data[mnemonic]
+
+    def __contains__(self, mnemonic):
+        return mnemonic in self.data
+
+    def keys(self):
+        return list(self.curves.keys())
+
+    def load(self, curves=None):
+        # Materialize several curves of a lazily read file in a single pass; a no-op for loaded data.
+        if isinstance(self.data, LazyCurves):
+            self.data.load(self.keys() if curves is None else curves)
+        return self
+
+    @property
+    def index_name(self):
+        return next(iter(self.curves))
+
+    @property
+    def null(self):
+        return _null_value(self.well)
+
+    def append_curve(self, mnemonic, values, unit='', descr=''):
+        # Add (or replace) a curve computed from the others, e.g. a shale volume or porosity.
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != self.data[self.index_name].shape:
+            raise ValueError(f'{mnemonic} has {values.size} samples, the well has '
+                             f'{self.data[self.index_name].size}')
+        self.curves[mnemonic] = HeaderItem(mnemonic, unit, '', descr)
+        self.data[mnemonic] = values
+
+    def df(self, curves=None):
+        # Same layout as lasio's las.df(): indexed by the first curve (DEPT), one float column per curve.
+        # With curves=[...] only those columns are built (and, for a lazy file, parsed).
+        names = self.keys()
+        columns = names[1:] if curves is None else [name for name in curves if name != names[0]]
+        self.load([names[0]] + columns)
+        index = pd.Index(self.data[names[0]], name=names[0])
+        return pd.DataFrame({name: self.data[name] for name in columns}, index=index)
+
+
+class LazyCurves(MutableMapping):
+    """{mnemonic: array} that parses a curve from the ~A section the first time it is asked for."""
+
+    def __init__(self, names, loader):
+        # loader(names) returns {name: array} for a list of curve names, in one pass over the data.
+        self.names = list(names)
+        self.loader = loader
+        self.arrays = {}
+
+    def load(self, names):
+        missing = [name for name in names if name not in self.arrays]
+        unknown = [name for name in missing if name not in self.names]
+        if unknown:
+            raise KeyError(unknown[0])
+        if missing:
+            self.arrays.update(self.loader(missing))
+
+    @property
+    def loaded(self):
+        return list(self.arrays)
+
+    def __getitem__(self, name):
+        if name not in self.arrays:
+            self.load([name])
+        return self.arrays[name]
+
+    def __setitem__(self, name, values):
+        if name not in self.names:
+            self.names.append(name)
+        self.arrays[name] = values
+
+    def __delitem__(self, name):
+        self.names.remove(name)
+        self.arrays.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def read_las(path, curves=None, lazy=False):
+    # curves=[...] parses only those curves (the depth curve is always kept); lazy=True parses the header now
+    # and each curve when it is first used.
+    header = []
+    offset = None
+    with open(path, 'rb') as f:
+        for line in f:
+            if line[:1] == b'~' and line[1:2] in (b'A', b'a'):
+                offset = f.tell()
+                break
+            header.append(line)
+
+    def open_data():
+        if offset is None:
+            return io.BytesIO()
+        f = open(path, 'rb')
+        f.seek(offset)
+        return f
+
+    return _build(b''.join(header).decode('ascii', errors='replace'), open_data, curves, lazy)
+
+
+def parse_las(text, curves=None, lazy=False):
+    header, data = _split_data_section(text)
+    data = data.encode('ascii', errors='replace')
+    return _build(header, lambda: io.BytesIO(data), curves, lazy)
+
+
+def _build(header, open_data, curves, lazy):
+    # open_data() returns a binary file positioned at the first line of the ~A section.
+    sections = parse_header(header)
+    all_names = list(sections['curves'])
+    if not all_names:
+        raise ValueError('LAS file has no ~Curve section')
+    names = all_names
+    null = _null_value(sections['well'])
+    wrapped = _is_wrapped(sections['version'])
+
+    if curves is not None:
+        unknown = [name for name in curves if name not in sections['curves']]
+        if unknown:
+            raise KeyError(f"curves not in the file: {', '.join(unknown)}")
+        names = [names[0]] + [name for name in dict.fromkeys(curves) if name != names[0]]
+        sections['curves'] = {name: sections['curves'][name] for name in names}
+
+    ncurves = len(all_names)
+
+    def loader(wanted):
+        columns = [all_names.index(name) for name in wanted]
+        with open_data() as f:
+            table = _parse_data(f, ncurves, columns, wrapped)
+        if null is not None:
+            table[table == null] = np.nan
+        return {name: table[i] for i, name in enumerate(wanted)}
+
+    curve_data = LazyCurves(names, loader) if lazy else loader(names)
+    return LasFile(sections['version'], sections['well'], sections['curves'], sections['params'],
+                   sections['other'], curve_data)
+
+
+def _parse_data(f, ncurves, columns, wrapped):
+    # (len(columns), rows) float64 table of the requested columns of the ~A section, read from the binary file
+    # f chunk by chunk; one contiguous row per curve.
+    parse = _wrapped_chunks if wrapped else _unwrapped_chunks
+    tables = list(parse(_data_chunks(f), ncurves, columns))
+    if not tables:
+        return np.empty((len(columns), 0))
+    return tables[0] if len(tables) == 1 else np.concatenate(tables, axis=1)
+
+
+def _data_chunks(f, size=DATA_CHUNK_BYTES):
+    # Pieces of about size bytes of f that end on a line break (the last one at the end of the file).
+    rest = b''
+    while True:
+        block = f.read(size)
+        if not block:
+            if rest:
+                yield rest
+            return
+        block = rest + block
+        cut = block.rfind(b'\n') + 1
+        rest = block[cut:]
+        if cut:
+            yield block[:cut]
+
+
+def _wrapped_chunks(chunks, ncurves, columns):
+    # Wrapped (WRAP YES) files spread a depth step over several lines: read each chunk as a flat stream of
+    # numbers and carry any partial depth step over to the next one.
+    leftover = np.empty(0)
+    for chunk in chunks:
+        values = np.fromstring(chunk.decode('ascii', errors='replace'), dtype=np.float64, sep=' ')
+        values = np.concatenate([leftover, values])
+        complete = values.size - values.size % ncurves
+        leftover = values[complete:]
+        if complete:
+            yield np.ascontiguousarray(values[:complete].reshape(-1, ncurves)[:, columns].T)
+    if leftover.size:
+        raise ValueError(f'~A section ends with {leftover.size} values, less than the {ncurves} curves declared '
+                         f'in ~Curve')
+
+
+def _unwrapped_chunks(chunks, ncurves, columns):
+    for chunk in chunks:
+        if chunk.isspace():
+            continue
+        if len(columns) <= ncurves // 2:
+            table = _fixed_width_columns(chunk, ncurves, columns)
+            if table is not None:
+                yield table
+                continue
+
+        # General layout: NumPy's C text parser.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)  # a chunk of nothing but comment lines
+            values = np.loadtxt(io.StringIO(chunk.decode('ascii', errors='replace')), dtype=np.float64,
+                                comments='#', ndmin=2)
+        if not values.size:
+            continue
+        if values.shape[1] != ncurves:
+            raise ValueError(f'~A section has {values.shape[1]} columns but ~Curve declares '
+                             f'{ncurves} curves')
+        # Transposing and copying makes every curve a contiguous column.
+        yield np.ascontiguousarray(values[:, columns].T)
+
+
+def _fixed_width_columns(data, ncurves, columns):
+    # Parse a chunk of the ~A section in which every line has the same length and every value ends at the same
+    # character position on every line. Returns None if the chunk does not have that layout (comments, blank
+    # lines, ragged lines, tabs, ...), so the caller can fall back to the general parser.
+    if not data.endswith(b'\n'):
+        data += b'\n'
+    line_length = data.find(b'\n') + 1
+    if line_length <= 1 or len(data) % line_length or b'\t' in data:
+        return None
+    lines = np.frombuffer(data, dtype=np.uint8).reshape(-1, line_length)
+    width = line_length - (2 if data[line_length - 2:line_length - 1] == b'\r' else 1)
+
+    # Value ends on the first line; every line must have exactly ncurves values ending at the same places.
+    occupied = lines[0, :width] != ord(' ')
+    ends = np.flatnonzero(occupied & ~np.append(occupied[1:], False))
+    if ends.size != ncurves:
+        return None
+    inner_ends = ends[ends + 1 < width]
+    occupied = lines[:, :width] != ord(' ')
+    if not occupied[:, ends].all() or occupied[:, inner_ends + 1].any():
+        return None
+    starts = occupied[:, 0].astype(np.int64) + (occupied[:, 1:] & ~occupied[:, :-1]).sum(axis=1)
+    if (starts != ncurves).any():
+        return None
+
+    # Cut each requested column out by character position and convert it on its own.
+    bounds = np.concatenate([[-1], ends])
+    table = np.empty((len(columns), len(lines)))
+    try:
+        for i, column in enumerate(columns):
+            first, last = bounds[column] + 1, bounds[column + 1] + 1
+            field = np.ascontiguousarray(lines[:, first:last]).view(f'S{last - first}').ravel()
+            table[i] = field.astype(np.float64)
+    except ValueError:
+        return None
+    return table
+
+
+def read_header(path):
+    # Read only the header blocks; stops at the ~A line without touching the curve data.
+    lines = []
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            if line.lstrip().upper().startswith('~A'):
+                break
+            lines.append(line)
+    return parse_header(''.join(lines))
+
+
+def parse_header(text):
+    sections = {'version': {}, 'well': {}, 'curves': {}, 'params': {}, 'other': ''}
+    other_lines = []
+    current = None
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('~'):
+            current = SECTION_NAMES.get(stripped[1:2].upper())
+            continue
+        if current == 'other':
+            other_lines.append(line)
+            continue
+        if current is None or not stripped or stripped.startswith('#'):
+            continue
+
+        item = parse_header_line(stripped)
+        items = sections[current]
+        # Duplicate mnemonics get a ":1", ":2" suffix, like lasio does.
+        mnemonic = item.mnemonic
+        if mnemonic in items:
+            n = 1
+            while f'{mnemonic}:{n}' in items:
+                n += 1
+            mnemonic = f'{mnemonic}:{n}'
+            item = item._replace(mnemonic=mnemonic)
+        items[mnemonic] = item
+
+    sections['other'] = '\n'.join(other_lines)
+    return sections
+
+
+def parse_header_line(line):
+    # LAS 2.0 header line:  MNEM.UNIT   VALUE   : DESCRIPTION
+    # The mnemonic ends at the first dot, the unit at the first space after it, and the description
+    # starts after the last colon (values such as "SEP 15 2010 @ 04:00" contain colons of their own).
+    mnemonic, _, rest = line.partition('.')
+    if rest[:1].isspace() or not rest:
+        unit, value_part = '', rest
+    else:
+        unit, _, value_part = rest.partition(' ')
+    value, colon, descr = value_part.rpartition(':')
+    if not colon:
+        value, descr = value_part, ''
+    return HeaderItem(mnemonic.strip(), unit.strip(), _convert_value(value.strip()), descr.strip())
+
+
+def _convert_value(value):
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() and '.' not in value else number
+
+
+def _is_wrapped(version):
+    item = version.get('WRAP')
+    return item is not None and str(item.value).upper().startswith('Y')
+
+
+def _null_value(well):
+    item = well.get('NULL')
+    if item is None or item.value == '':
+        return None
+    return float(item.value)
+
+
+def _split_data_section(text):
+    # Locate the "~A" line; everything after it is the data, everything before it is the header. Works on
+    # str and on bytes, and only scans as far as the ~A line.
+    if isinstance(text, str):
+        tilde, line_breaks, data_section = '~', '\r\n', 'Aa'
+    else:
+        tilde, line_breaks, data_section = b'~', b'\r\n', b'Aa'
+    pos = text.find(tilde)
+    while pos != -1:
+        if (pos == 0 or text[pos - 1:pos] in line_breaks) and text[pos + 1:pos + 2] in data_section \
+                and text[pos + 1:pos + 2]:
+            line_end = text.find(line_breaks[1:], pos)
+            if line_end == -1:
+                return text[:pos], text[:0]
+            return text[:pos], text[line_end + 1:]
+        pos = text.find(tilde, pos + 1)
+    return text, text[:0]
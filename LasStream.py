@@ -0,0 +1,240 @@
+# Chunked Streaming LAS Reader
+#
+# High-resolution LWD files are too big to materialize as one DataFrame. LasStream parses the header once and
+# then yields the ~A section as fixed-size depth chunks, each a (rows, curves) float64 NumPy block with the
+# NULL sentinel replaced by NaN. Only one chunk is held in memory at a time.
+#
+# stream_summary() builds on it to compute the statistics used by the histogram and box plot scripts (mean,
+# P5/P95, quartiles, notches, whiskers) in bounded memory:
+#
+#     import LasStream
+#     stream = LasStream.open_las("Data/1044222726.las", chunk_rows=50_000)
+#     print(stream.curve_names)
+#     for block in stream:
+#         ...                                         # block[:, stream.column('GR')]
+#
+#     summary = LasStream.stream_summary("Data/1044222726.las", ['GR', 'RHOB', 'ILD', 'NPLS'])
+#     print(summary['GR']['mean'], summary['GR']['p5'], summary['GR']['p95'])
+#     ax.bxp([summary[c]['box'] for c in ['GR', 'RHOB']], showmeans=True, shownotches=True)
+#
+# Quantiles of a curve with at most exact_samples valid values (the bundled well, and most wireline logs) are
+# computed from its values, collected in the second pass over the file, with the same linear interpolation as
+# pandas' Series.quantile, so they match the scripts exactly. Longer curves use a fine fixed-range histogram
+# built in that pass instead, keeping memory at O(bins) per curve: the quantile q is then within one bin width,
+# (max - min) / bins, of the sample at rank q * n. pandas interpolates at rank q * (n - 1) instead, so the two
+# can differ by more than a bin where neighbouring samples are more than a bin apart, which is rare once n is
+# well above the bin count.
+
+import itertools
+
+import numpy as np
+
+import LasReader
+
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_BINS = 1 << 14
+EXACT_SAMPLES = 1 << 18     # valid values per curve up to which quantiles are computed exactly (2 MB each)
+
+
+class LasStream:
+
+    def __init__(self, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+
+        header_lines = []
+        with open(path, 'r', errors='replace') as f:
+            for line in f:
+                if line.lstrip().upper().startswith('~A'):
+                    break
+                header_lines.append(line)
+        self.header_line_count = len(header_lines) + 1
+
+        sections = LasReader.parse_header(''.join(header_lines))
+        self.version = sections['version']
+        self.well = sections['well']
+        self.curves = sections['curves']
+        self.params = sections['params']
+        self.other = sections['other']
+        self.curve_names = list(self.curves)
+        self.null = LasReader._null_value(self.well)
+        self.wrapped = LasReader._is_wrapped(self.version)
+
+    def column(self, mnemonic):
+        return self.curve_names.index(mnemonic)
+
+    def __iter__(self):
+        return self.chunks()
+
+    def chunks(self, curves=None):
+        # Yield (rows, curves) blocks of at most chunk_rows depth steps. With curves=[...] only those
+        # columns are kept, in the order given.
+        columns = None if curves is None else [self.column(name) for name in curves]
+        ncurves = len(self.curve_names)
+        read = self._wrapped_blocks if self.wrapped else self._unwrapped_blocks
+
+        with open(self.path, 'r', errors='replace') as f:
+            for _ in range(self.header_line_count):
+                next(f)
+            for block in read(f, ncurves):
+                if columns is not None:
+                    block = block[:, columns]
+                if self.null is not None:
+                    block[block == self.null] = np.nan
+                yield block
+
+    def _unwrapped_blocks(self, f, ncurves):
+        while True:
+            lines = list(itertools.islice(f, self.chunk_rows))
+            if not lines:
+                return
+            lines = [line for line in lines if line.strip() and not line.lstrip().startswith('#')]
+            if not lines:
+                continue
+            block = np.loadtxt(lines, dtype=np.float64, ndmin=2)
+            if block.shape[1] != ncurves:
+                raise ValueError(f'~A section has {block.shape[1]} columns but ~Curve declares '
+                                 f'{ncurves} curves')
+            yield block
+
+    def _wrapped_blocks(self, f, ncurves):
+        # A depth step spans several lines, so read numbers as a flat stream and carry any partial row over
+        # to the next chunk.
+        leftover = np.empty(0)
+        while True:
+            lines = list(itertools.islice(f, self.chunk_rows))
+            if not lines:
+                break
+            values = np.concatenate([leftover, np.fromstring(''.join(lines), dtype=np.float64, sep=' ')])
+            complete = values.size - values.size % ncurves
+            leftover = values[complete:]
+            if complete:
+                yield values[:complete].reshape(-1, ncurves)
+        if leftover.size:
+            raise ValueError('~A section ends with a partial depth step')
+
+
+def open_las(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    return LasStream(path, chunk_rows)
+
+
+def stream_summary(path, curves, chunk_rows=DEFAULT_CHUNK_ROWS, bins=DEFAULT_BINS, dropna=False,
+                   max_fliers=1000, exact_samples=EXACT_SAMPLES):
+    # Mean, min/max, P5/P50/P95, quartiles and matplotlib bxp() statistics for each curve, computed in three
+    # passes over the file with O(bins) memory per curve (O(exact_samples) for short curves):
+    #   1. count, sum, min and max
+    #   2. the valid values of curves with at most exact_samples of them, for exact quantiles, and for longer
+    #      curves a histogram over [min, max] from which the quantiles are interpolated
+    #   3. the whisker ends (the most extreme values inside the 1.5 * IQR fences) and up to max_fliers outliers
+    # With dropna=True, depth steps with a null in *any* curve of the file are skipped, like df.dropna() in the
+    # box plot scripts.
+    stream = open_las(path, chunk_rows)
+    columns = [stream.column(name) for name in curves]
+
+    def blocks():
+        for block in stream:
+            if dropna:
+                block = block[~np.isnan(block).any(axis=1)]
+            yield block[:, columns]
+
+    n = len(curves)
+    count = np.zeros(n, dtype=np.int64)
+    total = np.zeros(n)
+    low = np.full(n, np.inf)
+    high = np.full(n, -np.inf)
+    for block in blocks():
+        valid = ~np.isnan(block)
+        count += valid.sum(axis=0)
+        total += np.where(valid, block, 0.0).sum(axis=0)
+        if len(block):
+            low = np.fmin(low, np.nanmin(np.where(valid, block, np.inf), axis=0))
+            high = np.fmax(high, np.nanmax(np.where(valid, block, -np.inf), axis=0))
+
+    histograms = [ExactQuantiles() if count[i] <= exact_samples else StreamingHistogram(low[i], high[i], bins)
+                  for i in range(n)]
+    for block in blocks():
+        for i, histogram in enumerate(histograms):
+            histogram.add(block[:, i])
+
+    summary = {}
+    fences = []
+    for i, name in enumerate(curves):
+        p5, q1, median, q3, p95 = histograms[i].quantiles([0.05, 0.25, 0.5, 0.75, 0.95])
+        iqr = q3 - q1
+        fences.append((q1 - 1.5 * iqr, q3 + 1.5 * iqr))
+        mean = total[i] / count[i] if count[i] else np.nan
+        notch = 1.57 * iqr / np.sqrt(count[i]) if count[i] else np.nan
+        summary[name] = {
+            'count': int(count[i]), 'mean': mean, 'min': low[i], 'max': high[i],
+            'p5': p5, 'p50': median, 'p95': p95,
+            'box': {'label': name, 'mean': mean, 'med': median, 'q1': q1, 'q3': q3, 'iqr': iqr,
+                    'cilo': median - notch, 'cihi': median + notch,
+                    'whislo': np.nan, 'whishi': np.nan, 'fliers': []},
+        }
+
+    whislo = np.full(n, np.inf)
+    whishi = np.full(n, -np.inf)
+    fliers = [[] for _ in range(n)]
+    flier_counts = np.zeros(n, dtype=np.int64)
+    lo_fence = np.array([fence[0] for fence in fences])
+    hi_fence = np.array([fence[1] for fence in fences])
+    for block in blocks():
+        inside = (block >= lo_fence) & (block <= hi_fence)
+        whislo = np.fmin(whislo, np.where(inside, block, np.inf).min(axis=0, initial=np.inf))
+        whishi = np.fmax(whishi, np.where(inside, block, -np.inf).max(axis=0, initial=-np.inf))
+        outside = ~inside & ~np.isnan(block)
+        flier_counts += outside.sum(axis=0)
+        for i in range(n):
+            room = max_fliers - len(fliers[i])
+            if room > 0:
+                fliers[i].extend(block[outside[:, i], i][:room].tolist())
+
+    for i, name in enumerate(curves):
+        box = summary[name]['box']
+        box['whislo'] = whislo[i] if np.isfinite(whislo[i]) else box['q1']
+        box['whishi'] = whishi[i] if np.isfinite(whishi[i]) else box['q3']
+        box['fliers'] = np.array(fliers[i])
+        summary[name]['outliers'] = int(flier_counts[i])
+    return summary
+
+
+class StreamingHistogram:
+    """Fixed-range histogram that approximates quantiles of a stream of values."""
+
+    def __init__(self, low, high, bins=DEFAULT_BINS):
+        if not np.isfinite(low) or not np.isfinite(high):
+            low, high = 0.0, 1.0
+        if high <= low:
+            high = low + 1.0
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def add(self, values):
+        values = values[~np.isnan(values)]
+        counts, _ = np.histogram(values, bins=self.edges)
+        self.counts += counts
+
+    def quantiles(self, qs):
+        # Interpolate linearly inside the bin that holds each quantile.
+        total = self.counts.sum()
+        if total == 0:
+            return [np.nan for _ in qs]
+        cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+        return list(np.interp(np.asarray(qs) * total, cumulative, self.edges))
+
+
+class ExactQuantiles:
+    """Keeps every value of a short stream; quantiles as pandas computes them (linear interpolation)."""
+
+    def __init__(self):
+        self.parts = []
+
+    def add(self, values):
+        self.parts.append(values[~np.isnan(values)])
+
+    def quantiles(self, qs):
+        values = np.concatenate(self.parts) if self.parts else np.empty(0)
+        if values.size == 0:
+            return [np.nan for _ in qs]
+        return list(np.quantile(values, qs))
@@ -0,0 +1,276 @@
+# Follow Mode for LAS Files That Grow While Drilling
+#
+# During LWD jobs new depth rows keep being appended to the LAS file on disk. Instead of re-reading the whole
+# file on every refresh, LasFollower remembers the byte offset of the last complete row it parsed and, on each
+# poll, parses only what was appended since. Running statistics (count, mean, P5/P95 through a KLL sketch) and
+# the log tracks from Log Data Plot Viz.py are extended with just the new rows, so the work per update depends
+# on how much was appended, not on how deep the well already is.
+#
+# Usage:
+#
+#     import LasTail
+#     follower = LasTail.LasFollower("Data/live.las", curves=['GR', 'ILD', 'RHOB', 'NPLS'])
+#     tracks = LasTail.LiveLogTracks()
+#     while drilling:
+#         block = follower.poll()                     # (new rows, 1 + curves) array: depth first
+#         if len(block):
+#             tracks.extend(block)
+#             tracks.save('Log Plot/Live.png')
+#             print(follower.stats['GR'].summary())
+#         time.sleep(2)
+#
+# or from the command line:
+#     python LasTail.py Data/live.las --interval 2 --out "Log Plot/Live.png"
+
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+from matplotlib.figure import Figure
+
+import LasReader
+import LogDecimate
+import QuantileSketch
+
+
+class RunningStats:
+    """Count, mean and approximate P5/P95 of a curve, updated one block at a time."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.sketch = QuantileSketch.KllSketch(seed=0)
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        self.count += values.size
+        self.total += values.sum()
+        self.sketch.update(values)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def summary(self):
+        p5, p95 = self.sketch.quantile([0.05, 0.95]) if self.count else (np.nan, np.nan)
+        return {'count': self.count, 'mean': self.mean, 'p5': float(p5), 'p95': float(p95)}
+
+
+class LasFollower:
+
+    def __init__(self, path, curves=None):
+        self.path = path
+        self.requested = curves
+        self.reset()
+
+    def reset(self):
+        # Forget everything parsed so far; the next poll starts again from the header.
+        self.header = None
+        self.columns = None
+        self.names = None
+        self.null = None
+        self.offset = None
+        self.size = 0
+        self.rows = 0
+        self.stats = {}
+
+    def _read_header(self, f):
+        # Returns False while the writer has not reached the ~A line yet.
+        header = []
+        offset = 0
+        for line in f:
+            offset += len(line)
+            text = line.decode('ascii', errors='replace')
+            if text.lstrip().upper().startswith('~A'):
+                break
+            header.append(text)
+        else:
+            return False
+
+        sections = LasReader.parse_header(''.join(header))
+        if LasReader._is_wrapped(sections['version']):
+            raise ValueError('follow mode does not support wrapped (WRAP YES) LAS files')
+        names = list(sections['curves'])
+        wanted = self.requested or names[1:]
+        self.header = sections
+        self.names = [names[0]] + list(wanted)
+        self.columns = [names.index(name) for name in self.names]
+        self.ncurves = len(names)
+        self.null = LasReader._null_value(sections['well'])
+        self.offset = offset
+        self.stats = {name: RunningStats() for name in wanted}
+        return True
+
+    def poll(self):
+        # Parse the rows appended since the last call; returns a (rows, 1 + curves) array, depth first.
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return self._empty()
+        if size < self.size:
+            # The file was truncated or replaced: start over.
+            self.reset()
+        self.size = size
+
+        with open(self.path, 'rb') as f:
+            if self.header is None and not self._read_header(f):
+                return self._empty()
+            f.seek(self.offset)
+            appended = f.read()
+
+        # Only complete lines are parsed; a row the writer is still in the middle of waits for the next poll.
+        end = appended.rfind(b'\n') + 1
+        if end == 0:
+            return self._empty()
+        self.offset += end
+        text = appended[:end].decode('ascii', errors='replace')
+        if not text.strip():
+            return self._empty()
+
+        block = np.loadtxt(io.StringIO(text), dtype=np.float64, comments='#', ndmin=2)
+        if block.shape[1] != self.ncurves:
+            raise ValueError(f'appended rows have {block.shape[1]} columns, expected {self.ncurves}')
+        block = block[:, self.columns]
+        if self.null is not None:
+            block[block == self.null] = np.nan
+
+        self.rows += len(block)
+        for i, name in enumerate(self.names[1:], start=1):
+            self.stats[name].update(block[:, i])
+        return block
+
+    def _empty(self):
+        width = len(self.names) if self.names else 1
+        return np.empty((0, width))
+
+
+class LiveLogTracks:
+    """The GR | ILD | RHOB + NPLS layout of Log Data Plot Viz.py, extended block by block.
+
+    Each update draws the new rows as one more short line segment per curve instead of redrawing the well.
+    Once a curve has collected many segments they are folded into a single min/max envelope line
+    (LogDecimate), so the number of artists, and the cost of a redraw, stays bounded as the well deepens.
+    """
+
+    TRACKS = [('GR', 'black'), ('ILD', 'yellow'), ('RHOB', 'gray'), ('NPLS', 'red')]
+
+    def __init__(self, curves=('GR', 'ILD', 'RHOB', 'NPLS'), window=None, max_segments=50, dpi=100):
+        self.curves = list(curves)
+        self.window = window
+        self.max_segments = max_segments
+        self.dpi = dpi
+
+        self.fig = Figure(figsize=(18, 6))
+        ax1, ax2, ax3 = self.fig.subplots(1, 3)
+        ax3_twinx = ax3.twiny()
+        self.axes = {'GR': ax1, 'ILD': ax2, 'RHOB': ax3, 'NPLS': ax3_twinx}
+        self.colors = dict(self.TRACKS)
+
+        for ax, label in [(ax1, 'GR (Gamma Ray)'), (ax2, 'ILD (Deep Induction Resistivity)'), (ax3, 'RHOB'),
+                          (ax3_twinx, 'NPLS')]:
+            ax.set_xlabel(label)
+            ax.xaxis.set_ticks_position('top')
+            ax.grid(True)
+        ax1.set_ylabel('Depth')
+        ax2.set_yticklabels([])
+        ax3.set_yticklabels([])
+        ax3.yaxis.set_ticks_position('right')
+        ax3_twinx.set_xlim(0, 40)
+
+        self.segments = {name: [] for name in self.curves}
+        self.last = {name: None for name in self.curves}
+        self.top = None
+        self.base = None
+
+    def extend(self, block):
+        # block: (rows, 1 + curves) as returned by LasFollower.poll(), depth first, curves in self.curves order.
+        if len(block) == 0:
+            return
+        depth = block[:, 0]
+        self.top = depth.min() if self.top is None else min(self.top, depth.min())
+        self.base = depth.max() if self.base is None else max(self.base, depth.max())
+
+        for i, name in enumerate(self.curves, start=1):
+            values = block[:, i]
+            seg_depth, seg_values = depth, values
+            if self.last[name] is not None:
+                # Join to the previous segment so the curve stays continuous.
+                seg_depth = np.concatenate([[self.last[name][0]], depth])
+                seg_values = np.concatenate([[self.last[name][1]], values])
+            self.last[name] = (depth[-1], values[-1])
+
+            ax = self.axes[name]
+            line, = ax.plot(seg_values, seg_depth, color=self.colors[name])
+            self.segments[name].append(line)
+            if len(self.segments[name]) == 1 and name in ('RHOB', 'NPLS'):
+                line.set_label(name)
+                self._update_legend()
+            if len(self.segments[name]) > self.max_segments:
+                self._consolidate(name)
+
+        top = self.top if self.window is None else max(self.top, self.base - self.window)
+        for ax in self.axes.values():
+            ax.set_ylim(self.base, top)
+        for name in ('GR', 'ILD', 'RHOB'):
+            if name in self.axes:
+                self.axes[name].relim()
+                self.axes[name].autoscale_view(scaley=False)
+
+    def _consolidate(self, name):
+        # Replace every segment of a curve with one envelope line sized to the track height.
+        lines = self.segments[name]
+        depth = np.concatenate([line.get_ydata() for line in lines])
+        values = np.concatenate([line.get_xdata() for line in lines])
+        for line in lines:
+            line.remove()
+        ax = self.axes[name]
+        depth, values = LogDecimate.envelope(depth, values, LogDecimate.pixel_rows(ax, self.dpi))
+        line, = ax.plot(values, depth, color=self.colors[name])
+        self.segments[name] = [line]
+        if name in ('RHOB', 'NPLS'):
+            line.set_label(name)
+            self._update_legend()
+
+    def _update_legend(self):
+        # A single legend for both RHOB and NPLS, as in Log Data Plot Viz.py.
+        handles = [lines[0] for name, lines in self.segments.items() if name in ('RHOB', 'NPLS') and lines]
+        if 'RHOB' in self.axes:
+            self.axes['RHOB'].legend(handles, [h.get_label() for h in handles], loc='upper left')
+
+    def save(self, path):
+        self.fig.savefig(path, dpi=self.dpi)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Follow a LAS file that is being written during drilling.')
+    parser.add_argument('las')
+    parser.add_argument('--interval', type=float, default=2.0, help='seconds between polls')
+    parser.add_argument('--out', default=None, help='PNG refreshed with the live log tracks after each update')
+    parser.add_argument('--window', type=float, default=None, help='only show the last WINDOW feet')
+    args = parser.parse_args(argv)
+
+    curves = [name for name, _ in LiveLogTracks.TRACKS]
+    follower = LasFollower(args.las, curves=curves)
+    tracks = LiveLogTracks(curves, window=args.window) if args.out else None
+
+    try:
+        while True:
+            start = time.perf_counter()
+            block = follower.poll()
+            if len(block):
+                if tracks is not None:
+                    tracks.extend(block)
+                    tracks.save(args.out)
+                gr = follower.stats['GR'].summary()
+                print(f'{follower.rows:>9} rows  depth {block[-1, 0]:10.2f}   GR mean {gr["mean"]:7.2f}  '
+                      f'P5 {gr["p5"]:7.2f}  P95 {gr["p95"]:7.2f}   update {time.perf_counter() - start:6.3f} s',
+                      flush=True)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
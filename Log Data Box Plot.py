@@ -1,11 +1,11 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import lasio
+import LasCache
 
 # Import necessary libraries
 
-# Load the LAS file using LASIO
-las = lasio.read("Data/1044222726.las")
+# Load the LAS file using LasReader (through the LasCache cache)
+las = LasCache.load_las("Data/1044222726.las")
 
 # Convert the LAS file to a pandas DataFrame
 df = las.df()
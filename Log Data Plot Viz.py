@@ -16,21 +16,40 @@
 #########################################################################################################################
 
 # The first stage of any python project or notebook is generally to import the required libraries.
-# In this case we are going to be using lasio to load our las file, pandas for storing our well log data,
+# In this case we are going to be using LasReader to load our las file, pandas for storing our well log data,
 # and matplotlib for visualising our data.
 
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import lasio
+import LasCache
+import LogDecimate
 
-#To load our file in, we can use the .read() method from LASIO like so:
+#To load our file in, we can use load_las() from our LasCache module. The first run parses the file with LasReader,
+# later runs reuse the cached copy. With lazy=True only the header is read up front and each curve is read when it
+# is first used:
 
-las = lasio.read("Data/1044222726.las")
+las = LasCache.load_las("Data/1044222726.las", lazy=True)
 
-# We then convert the las file to a pandas dataframe object.
+# We then convert the las file to a pandas dataframe object. Only the four plotted curves are read; las.df() without
+# curves gives all 17 curves, as in the outputs shown below.
 
-df = las.df()
+df = las.df(curves=['GR', 'ILD', 'RHOB', 'NPLS'])
+
+# When working with many wells, the same frame can come from the memory-mapped curve store instead, which only reads
+# the curves and depth range that are asked for:
+#
+# import CurveStore
+# store = CurveStore.CurveStore('Data/store')
+# well_id = store.add_las('Data/1044222726.las')
+# df = store.df(well_id, curves=['GR', 'ILD', 'RHOB', 'NPLS'])
+#
+# To compare several wells (or runs logged at different steps) track by track, first put them on one depth grid:
+#
+# import DepthAlign
+# grid, curves = DepthAlign.align_wells({'A': las_a, 'B': las_b}, ['GR', 'RHOB'], step=0.5)
+# ax1.plot(curves['A']['GR'], grid, color='black')
+# ax1.plot(curves['B']['GR'], grid, color='green')
 
 # print(df.head())
 
@@ -198,8 +217,13 @@ df.rename(columns={'DEPT':'DEPTH'}, inplace=True)
 # Create subplots for GR, ILD, RHOB, and NPLS against Depth
 fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 6))
 
+# Each curve is reduced to a min/max envelope per pixel row of the saved image (dpi=300), so deep, finely sampled
+# wells draw far fewer vertices while the tracks look the same
+rows = LogDecimate.pixel_rows(ax1, dpi=300)
+
 # Plot GR on the first subplot
-ax1.plot(df['GR'], df['DEPTH'], color='black')
+gr_depth, gr = LogDecimate.envelope(df['DEPTH'], df['GR'], rows)
+ax1.plot(gr, gr_depth, color='black')
 ax1.set_xlabel('GR (Gamma Ray)')
 ax1.set_ylabel('Depth')
 ax1.invert_yaxis()  # Invert y-axis to show depth increasing downwards
@@ -207,7 +231,8 @@ ax1.xaxis.set_ticks_position('top')  # Put x-axis on top
 ax1.grid(True)
 
 # Plot ILD on the second subplot
-ax2.plot(df['ILD'], df['DEPTH'], color='yellow')
+ild_depth, ild = LogDecimate.envelope(df['DEPTH'], df['ILD'], rows)
+ax2.plot(ild, ild_depth, color='yellow')
 ax2.set_xlabel('ILD (Deep Induction Resistivity)')
 ax2.set_yticklabels([])  # Remove y-axis labels
 ax2.invert_yaxis()  # Invert y-axis to show depth increasing downwards
@@ -215,7 +240,8 @@ ax2.xaxis.set_ticks_position('top')  # Put x-axis on top
 ax2.grid(True)
 
 # Plot RHOB on the third subplot
-ax3.plot(df['RHOB'], df['DEPTH'], color='gray', label='RHOB')
+rhob_depth, rhob = LogDecimate.envelope(df['DEPTH'], df['RHOB'], rows)
+ax3.plot(rhob, rhob_depth, color='gray', label='RHOB')
 ax3.set_xlabel('RHOB')
 ax3.invert_yaxis()  # Invert y-axis to show depth increasing downwards
 ax3.xaxis.set_ticks_position('top')  # Put x-axis on top
@@ -225,7 +251,8 @@ ax3.grid(True)
 
 # Create a twin x-axis and plot NPLS on the second x-axis
 ax3_twinx = ax3.twiny()
-ax3_twinx.plot(df['NPLS'], df['DEPTH'], color='red', label='NPLS')
+npls_depth, npls = LogDecimate.envelope(df['DEPTH'], df['NPLS'], rows)
+ax3_twinx.plot(npls, npls_depth, color='red', label='NPLS')
 ax3_twinx.set_xlabel('NPLS')
 ax3_twinx.invert_yaxis()  # Invert y-axis to show depth increasing downwards
 ax3_twinx.invert_xaxis()  # Invert x-axis for 'NPLS'
@@ -7,23 +7,27 @@
 # -------------
 
 # Loading and Checking Data
-# The first step is to import the required libraries: pandas, matplotlib and LASIO.
-# lasio is a library that has been developed to handle and work with LAS files.
+# The first step is to import the required libraries: pandas, matplotlib and LasReader.
+# LasReader is the project's own LAS 2.0 reader; it parses the curve data with NumPy in a single pass.
 
 # More info on the library can be found at: https://chasm.kgs.ku.edu/ords/qualified.well_page.DisplayWell?f_kid=1042769301
 
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import lasio
+import LasCache
+import FastKDE
 
-#To load our file in, we can use the .read() method from LASIO like so:
+#To load our file in, we can use load_las() from our LasCache module. The first run parses the file with LasReader,
+# later runs reuse the cached copy. With lazy=True only the header is read up front and each curve is read when it
+# is first used:
 
-las = lasio.read("Data/1044222726.las")
+las = LasCache.load_las("Data/1044222726.las", lazy=True)
 
-# We then convert the las file to a pandas dataframe object.
+# We then convert the las file to a pandas dataframe object. Only the GR curve is read; las.df() without
+# curves gives all 17 curves, as in the outputs shown below.
 
-df = las.df()
+df = las.df(curves=['GR'])
 
 # Using the .describe() method we can explore the summary statistics of the data.
 
@@ -105,6 +109,13 @@ df = las.df()
 # P05: 	 18.288999999999998
 # P95: 	 134.69400000000002
 
+# For files that are too large to load as a single dataframe, the same statistics can be computed chunk by chunk
+# with LasStream, which only keeps one block of depth steps in memory at a time:
+#
+# import LasStream
+# summary = LasStream.stream_summary('Data/1044222726.las', ['GR'])
+# print(summary['GR']['mean'], summary['GR']['p5'], summary['GR']['p95'])
+
 # To get an idea of where these points fall in relation to our data, we can add them onto the plot using axvline
 # and passing in the calculated variables, a colour and a label.
 
@@ -135,7 +146,9 @@ p95 = df['GR'].quantile(0.95)
 
 
 df['GR'].plot(kind='hist', bins=30, color='red', alpha=0.5, density=True, edgecolor='black')
-df['GR'].plot(kind='kde', color='black')
+# pandas' plot(kind='kde') evaluates the kernel at every grid point for every sample; FastKDE bins the samples first and
+# convolves with an FFT, which gives the same curve (same grid and bandwidth) far faster on large wells
+FastKDE.plot_kde(plt.gca(), df['GR'], color='black')
 plt.xlabel('Gamma Ray', fontsize=14)
 plt.ylabel('Density', fontsize=14)
 plt.xlim(0,175)
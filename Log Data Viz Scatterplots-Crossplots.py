@@ -29,21 +29,24 @@
 #########################################################################################################################
 
 # The first stage of any python project or notebook is generally to import the required libraries.
-# In this case we are going to be using lasio to load our las file, pandas for storing our well log data,
+# In this case we are going to be using LasReader to load our las file, pandas for storing our well log data,
 # and matplotlib for visualising our data.
 
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import lasio
+import LasCache
 
-#To load our file in, we can use the .read() method from LASIO like so:
+#To load our file in, we can use load_las() from our LasCache module. The first run parses the file with LasReader,
+# later runs reuse the cached copy. With lazy=True only the header is read up front and each curve is read when it
+# is first used:
 
-las = lasio.read("Data/1044222726.las")
+las = LasCache.load_las("Data/1044222726.las", lazy=True)
 
-# We then convert the las file to a pandas dataframe object.
+# We then convert the las file to a pandas dataframe object. Only the NPLS, RHOB and GR curves are read; las.df() without
+# curves gives all 17 curves, as in the outputs shown below.
 
-df = las.df()
+df = las.df(curves=['NPLS', 'RHOB', 'GR'])
 
 # Using the .describe() method we can explore the summary statistics of the data.
 
@@ -233,4 +236,14 @@ plt.colorbar(label='Gamma Ray - API')
 
 plt.savefig('Scatter-Cross plots/Scatter-Cross-RHOB-NPLS-GR.png', dpi=300)
 
+# With millions of points (for example many wells stacked together), one marker per sample becomes slow and unreadable.
+# DensityCrossplot aggregates the points into a grid and draws the mean (or median) GR per cell as an image instead,
+# with the same axis limits. Wells can be added to the grid one at a time:
+#
+# import DensityCrossplot
+# grid = DensityCrossplot.CrossplotGrid()
+# grid.add(df['NPLS'], df['RHOB'], df['GR'])
+# image = grid.plot(plt.gca(), statistic='mean')
+# plt.colorbar(image, label='Gamma Ray - API')
+
 plt.show()
\ No newline at end of file
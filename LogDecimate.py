@@ -0,0 +1,75 @@
+# Level-of-Detail Decimation for Log Tracks
+#
+# A log track saved at dpi=300 is a few thousand pixels tall, yet ax.plot and fill_betweenx are handed every
+# depth sample. envelope() reduces a curve to at most four samples per pixel row of the track: the first, the
+# minimum, the maximum and the last valid sample in that row (the "M4" reduction). Because the kept points are
+# real samples in their original order, the rasterized line covers exactly the same pixels as the full curve,
+# null gaps stay gaps, and fills such as the sand/shale shading at the GR=50 cutoff reach the same extremes.
+#
+# Usage:
+#
+#     import LogDecimate
+#     rows = LogDecimate.pixel_rows(ax, dpi=300)
+#     depth, gr = LogDecimate.envelope(df['DEPTH'], df['GR'], rows)
+#     ax.plot(gr, depth, c='black', lw=0.5)
+#     ax.fill_betweenx(depth, 50, gr, where=gr <= 50, facecolor='yellow')
+
+import numpy as np
+
+
+def pixel_rows(ax, dpi=None, oversample=2):
+    # Height of the axes in device pixels at the given dpi (default: the figure's dpi). The oversampling
+    # factor leaves room for tight_layout() or a legend resizing the axes after the data is drawn.
+    fig = ax.get_figure()
+    dpi = dpi or fig.dpi
+    height = ax.get_position().height * fig.get_figheight() * dpi
+    return max(1, int(np.ceil(height * oversample)))
+
+
+def envelope_indices(depth, values, n_rows, top=None, base=None):
+    # Indices of the samples kept by envelope(), in depth order.
+    depth = np.asarray(depth, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    n = values.size
+    if n <= 4 * n_rows:
+        return np.arange(n)
+
+    valid = ~np.isnan(values) & ~np.isnan(depth)
+    positions = np.flatnonzero(valid)
+    if positions.size == 0:
+        return positions
+
+    # Assign every valid sample to a pixel row. Depth is monotonic, so the rows come out sorted and each row
+    # is a contiguous run of samples.
+    top = np.nanmin(depth) if top is None else top
+    base = np.nanmax(depth) if base is None else base
+    span = (base - top) or 1.0
+    row = np.clip(((depth[positions] - top) / span * n_rows).astype(np.int64), 0, n_rows - 1)
+    if row[0] > row[-1]:
+        row = n_rows - 1 - row
+    v = values[positions]
+
+    change = np.flatnonzero(np.diff(row)) + 1
+    starts = np.concatenate([[0], change])
+    ends = np.concatenate([change, [row.size]]) - 1
+    group = np.repeat(np.arange(starts.size), np.diff(np.concatenate([starts, [row.size]])))
+
+    # First occurrence of each row's minimum and maximum.
+    row_min = np.minimum.reduceat(v, starts)
+    row_max = np.maximum.reduceat(v, starts)
+    order = np.arange(v.size)
+    first_min = np.minimum.reduceat(np.where(v == row_min[group], order, v.size), starts)
+    first_max = np.minimum.reduceat(np.where(v == row_max[group], order, v.size), starts)
+
+    kept = positions[np.concatenate([starts, ends, first_min, first_max])]
+
+    # Keep the first null after each valid run so the line still breaks across gaps.
+    gap_starts = np.flatnonzero(~valid[1:] & valid[:-1]) + 1
+    return np.unique(np.concatenate([kept, gap_starts]))
+
+
+def envelope(depth, values, n_rows, top=None, base=None):
+    # Decimated (depth, values) arrays for a track n_rows pixels tall. top/base default to the depth range of
+    # the data; pass the track's y limits when it only shows part of the well.
+    index = envelope_indices(depth, values, n_rows, top, base)
+    return np.asarray(depth, dtype=np.float64)[index], np.asarray(values, dtype=np.float64)[index]
@@ -1,20 +1,25 @@
-import lasio
+import LasCache
+import LogDecimate
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
 
-las = lasio.read("Data/1044222726.las")
+las = LasCache.load_las("Data/1044222726.las", curves=['GR'])
 df = las.df()
 df.reset_index(inplace=True)
 df.rename(columns={'DEPT': 'DEPTH'}, inplace=True)
 
 # Setup figure and plot
 plt.figure(figsize=(5, 8))
-plt.plot(df['GR'], df['DEPTH'], c='black', lw=0.5)
+
+# Reduce GR to a min/max envelope per pixel row of the saved image; the plot looks the same but long,
+# finely sampled wells draw far fewer vertices
+depth, gr = LogDecimate.envelope(df['DEPTH'], df['GR'], LogDecimate.pixel_rows(plt.gca(), dpi=300))
+plt.plot(gr, depth, c='black', lw=0.5)
 
 # Using the where argument to fill to a fixed value
-plt.fill_betweenx(df['DEPTH'], 50, df['GR'], where=df['GR']<=50, facecolor='yellow')
-plt.fill_betweenx(df['DEPTH'], df['GR'], 50, where=df['GR']>=50, facecolor='gray')
+plt.fill_betweenx(depth, 50, gr, where=gr<=50, facecolor='yellow')
+plt.fill_betweenx(depth, gr, 50, where=gr>=50, facecolor='gray')
 
 # Setup axes limits
 plt.xlim(0, 150)
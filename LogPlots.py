@@ -0,0 +1,269 @@
+# Log Plot Figures
+#
+# The figures from the tutorial scripts, packaged as functions so they can be rendered for any well:
+#
+#     box_plots        ->  Log Data Box Plot.py              (GR, RHOB, ILD, NPLS box plots)
+#     histogram_kde    ->  Log Data Viz Hitstogram.py        (GR histogram, KDE, mean/P5/P95 lines)
+#     crossplot        ->  Log Data Viz Scatterplots-Crossplots.py   (NPLS vs RHOB coloured by GR)
+#     density_crossplot    the same crossplot aggregated into a 2-D grid, for millions of points
+#     log_tracks       ->  Log Data Plot Viz.py              (GR | ILD | RHOB + NPLS tracks)
+#     shaded_gr_log    ->  LogPlotShades.py                  (GR log with sand/shale shading)
+#
+# Every function takes a frame shaped like las.df() (indexed by depth), or the same well as a
+# CompactCurves.CompactFrame, and the PNG path to write. Figures are built with matplotlib's object-oriented API
+# rather than pyplot, so they render headless with the Agg backend, never open a window and are safe to use
+# from worker processes.
+#
+# The depth tracks are decimated to a per-pixel min/max envelope (LogDecimate) before drawing, which gives the
+# same image with far fewer vertices on long, finely sampled wells. Pass decimate=False to draw every sample.
+# The data preparation, decimation and savefig steps are Profiler stages.
+
+import numpy as np
+from matplotlib import style
+from matplotlib.figure import Figure
+import matplotlib.patches as mpatches
+
+import CompactCurves
+import DensityCrossplot
+import FastKDE
+import LogDecimate
+import Profiler
+
+
+# Define a dictionary for customizing the outliers
+RED_CIRCLE = dict(markerfacecolor='red', marker='o', markeredgecolor='white')
+
+BOX_PLOT_CURVES = [
+    ('GR', 'GR (Gamma Ray)', 'Boxplot of Gamma Ray (GR)'),
+    ('RHOB', 'RHOB (Density)', 'Boxplot of Density (RHOB)'),
+    ('ILD', 'ILD (Deep Induction Resistivity)', 'Boxplot of Deep Induction Resistivity (ILD)'),
+    ('NPLS', 'NPLS', 'Boxplot of NPLS'),
+]
+
+
+def _save(fig, path, dpi):
+    # Drawing the artists and encoding the PNG both happen here; with profiling on the encoding is its own
+    # "png encode" stage inside "savefig".
+    with Profiler.stage('savefig'):
+        fig.savefig(path, dpi=dpi)
+
+
+def _curve(df, name):
+    # A curve as a float64 array with NaN for nulls, from a DataFrame or a CompactCurves.CompactFrame.
+    if isinstance(df, CompactCurves.CompactFrame):
+        return df.values(name)
+    return df[name].to_numpy()
+
+
+def _valid_values(df, name):
+    if isinstance(df, CompactCurves.CompactFrame):
+        return df.valid_values(name)
+    return df[name].dropna().to_numpy()
+
+
+def _box_plot_columns(df):
+    # As in the script, rows with a null in any curve are dropped before plotting. A CompactFrame finds those
+    # rows from its validity bitmaps and decodes only the four plotted curves, instead of copying the frame.
+    with Profiler.stage('dropna'):
+        if isinstance(df, CompactCurves.CompactFrame):
+            rows = df.valid()
+            return {curve: df.values(curve, rows=rows) for curve, _, _ in BOX_PLOT_CURVES}
+        df = df.dropna()
+        return {curve: df[curve].to_numpy() for curve, _, _ in BOX_PLOT_CURVES}
+
+
+def box_plots(df, path, dpi=300):
+    columns = _box_plot_columns(df)
+
+    fig = Figure(figsize=(16, 6))
+    axes = fig.subplots(1, 4)
+    for ax, (curve, xlabel, title) in zip(axes, BOX_PLOT_CURVES):
+        ax.boxplot(columns[curve], showmeans=True, notch=True, flierprops=RED_CIRCLE)
+        ax.set_xticks([1], [curve])
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Values')
+        ax.set_title(title)
+
+    fig.tight_layout()
+    _save(fig, path, dpi)
+    return fig
+
+
+def box_plots_from_stats(stats, path, dpi=300):
+    # Same layout as box_plots(), drawn from precomputed {curve: bxp statistics} such as merged field sketches
+    # (QuantileSketch) or a streamed summary (LasStream) instead of raw samples.
+    fig = Figure(figsize=(16, 6))
+    axes = fig.subplots(1, 4)
+    for ax, (curve, xlabel, title) in zip(axes, BOX_PLOT_CURVES):
+        ax.bxp([dict(stats[curve], label=curve)], showmeans=True, shownotches=True, flierprops=RED_CIRCLE)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Values')
+        ax.set_title(title)
+
+    fig.tight_layout()
+    _save(fig, path, dpi)
+    return fig
+
+
+def histogram_kde(df, path, curve='GR', xlabel='Gamma Ray', xlim=(0, 175), dpi=300):
+    with Profiler.stage('statistics'):
+        values = _valid_values(df, curve)
+        mean = values.mean()
+        p5, p95 = np.quantile(values, [0.05, 0.95])
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.hist(values, bins=30, color='red', alpha=0.5, density=True, edgecolor='black')
+
+    # Binned/FFT estimate on the same grid and bandwidth as pandas' plot(kind='kde')
+    with Profiler.stage('kde'):
+        FastKDE.plot_kde(ax, values, color='black')
+
+    ax.set_xlabel(xlabel, fontsize=14)
+    ax.set_ylabel('Density', fontsize=14)
+    ax.set_xlim(*xlim)
+
+    ax.axvline(mean, color='blue', label='mean')
+    ax.axvline(p5, color='green', label='5th Percentile')
+    ax.axvline(p95, color='purple', label='95th Percentile')
+
+    ax.legend()
+    _save(fig, path, dpi)
+    return fig
+
+
+def crossplot(df, path, dpi=300):
+    # Set the style sheet to bmh
+    with style.context('bmh'):
+        fig = Figure(figsize=(8, 8))
+        ax = fig.subplots()
+        points = ax.scatter(_curve(df, 'NPLS'), _curve(df, 'RHOB'), c=_curve(df, 'GR'), vmin=0, vmax=100,
+                            cmap='rainbow')
+
+        # Change the X and Y ranges; the y axis is flipped by passing the scale values in reverse order
+        ax.set_xlim(-5, 60)
+        ax.set_ylim(3.0, 1.5)
+
+        ax.set_ylabel('(RHOB) .G/C3 Bulk Density', fontsize=14)
+        ax.set_xlabel('(NPLS ) .% Neutron Porosity (Limestone)', fontsize=14)
+        fig.colorbar(points, ax=ax, label='Gamma Ray - API')
+
+        _save(fig, path, dpi)
+    return fig
+
+
+def density_crossplot(df, path, statistic='mean', grid=None, dpi=300):
+    # Rasterized version of crossplot() for very many points: NPLS/RHOB pairs are aggregated into a 2-D grid
+    # and drawn as one image of mean or median GR per cell, or of the point count. Pass an accumulated
+    # DensityCrossplot.CrossplotGrid as grid to plot several wells at once (df is then ignored).
+    if grid is None:
+        grid = DensityCrossplot.CrossplotGrid().add(_curve(df, 'NPLS'), _curve(df, 'RHOB'), _curve(df, 'GR'))
+
+    with style.context('bmh'):
+        fig = Figure(figsize=(8, 8))
+        ax = fig.subplots()
+        image = grid.plot(ax, statistic=statistic)
+
+        ax.set_ylabel('(RHOB) .G/C3 Bulk Density', fontsize=14)
+        ax.set_xlabel('(NPLS ) .% Neutron Porosity (Limestone)', fontsize=14)
+        label = 'Samples per cell' if statistic == 'count' else f'Gamma Ray - API ({statistic})'
+        fig.colorbar(image, ax=ax, label=label)
+
+        _save(fig, path, dpi)
+    return fig
+
+
+def _track_data(ax, depth, values, dpi, decimate):
+    if not decimate:
+        return depth, values
+    with Profiler.stage('decimate'):
+        return LogDecimate.envelope(depth, values, LogDecimate.pixel_rows(ax, dpi))
+
+
+def log_tracks(df, path, dpi=300, decimate=True):
+    depth = df.index.to_numpy()
+
+    fig = Figure(figsize=(18, 6))
+    ax1, ax2, ax3 = fig.subplots(1, 3)
+
+    # GR track
+    gr_depth, gr = _track_data(ax1, depth, _curve(df, 'GR'), dpi, decimate)
+    ax1.plot(gr, gr_depth, color='black')
+    ax1.set_xlabel('GR (Gamma Ray)')
+    ax1.set_ylabel('Depth')
+    ax1.invert_yaxis()
+    ax1.xaxis.set_ticks_position('top')
+    ax1.grid(True)
+
+    # ILD track
+    ild_depth, ild = _track_data(ax2, depth, _curve(df, 'ILD'), dpi, decimate)
+    ax2.plot(ild, ild_depth, color='yellow')
+    ax2.set_xlabel('ILD (Deep Induction Resistivity)')
+    ax2.set_yticklabels([])
+    ax2.invert_yaxis()
+    ax2.xaxis.set_ticks_position('top')
+    ax2.grid(True)
+
+    # RHOB track, with NPLS on a twin x axis
+    rhob_depth, rhob = _track_data(ax3, depth, _curve(df, 'RHOB'), dpi, decimate)
+    ax3.plot(rhob, rhob_depth, color='gray', label='RHOB')
+    ax3.set_xlabel('RHOB')
+    ax3.invert_yaxis()
+    ax3.xaxis.set_ticks_position('top')
+    ax3.yaxis.set_ticks_position('right')
+    ax3.set_yticklabels([])
+    ax3.grid(True)
+
+    ax3_twinx = ax3.twiny()
+    npls_depth, npls = _track_data(ax3, depth, _curve(df, 'NPLS'), dpi, decimate)
+    ax3_twinx.plot(npls, npls_depth, color='red', label='NPLS')
+    ax3_twinx.set_xlabel('NPLS')
+    ax3_twinx.invert_yaxis()
+    ax3_twinx.invert_xaxis()
+    ax3_twinx.set_xlim(0, 40)
+    ax3_twinx.xaxis.set_ticks_position('top')
+    ax3_twinx.grid(True)
+
+    # A single legend for both RHOB and NPLS
+    handles1, labels1 = ax3.get_legend_handles_labels()
+    handles2, labels2 = ax3_twinx.get_legend_handles_labels()
+    ax3.legend(handles1 + handles2, labels1 + labels2, loc='upper left')
+
+    fig.tight_layout()
+    _save(fig, path, dpi)
+    return fig
+
+
+def shaded_gr_log(df, path, cutoff=50, dpi=300, decimate=True):
+    fig = Figure(figsize=(5, 8))
+    ax = fig.subplots()
+
+    # The envelope keeps each pixel row's extremes, so the shading reaches the same GR values on both sides of
+    # the cutoff as it does with every sample.
+    depth, gr = _track_data(ax, df.index.to_numpy(), _curve(df, 'GR'), dpi, decimate)
+    ax.plot(gr, depth, c='black', lw=0.5)
+
+    # Using the where argument to fill to a fixed value
+    ax.fill_betweenx(depth, cutoff, gr, where=gr <= cutoff, facecolor='yellow')
+    ax.fill_betweenx(depth, gr, cutoff, where=gr >= cutoff, facecolor='gray')
+
+    ax.set_xlim(0, 150)
+    ax.invert_yaxis()
+    ax.xaxis.tick_top()
+
+    yellow_patch = mpatches.Patch(color='yellow', label='Sand')
+    gray_patch = mpatches.Patch(color='gray', label='Shale')
+    ax.legend(handles=[yellow_patch, gray_patch])
+
+    _save(fig, path, dpi)
+    return fig
+
+
+# Output file names, matching the names the scripts write into Boxplot/, Histograms/, etc.
+FIGURES = {
+    'GR-ILD-RHOB-NPLS-Boxplot.png': box_plots,
+    'GR Histogram-KernelDensity.png': histogram_kde,
+    'Scatter-Cross-RHOB-NPLS-GR.png': crossplot,
+    'GR-ILD-RHOB-NPLSSubplot.png': log_tracks,
+    'Shale-Sand-Log.png': shaded_gr_log,
+}
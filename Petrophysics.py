@@ -0,0 +1,219 @@
+# Petrophysical Interpretation
+#
+# Vectorized versions of the basic quick-look interpretation, computed over whole curves with NumPy (no Python
+# loops over depth steps, so the cost is linear in the number of samples):
+#
+#     VSH    shale volume from GR (linear gamma ray index, or the Larionov corrections)
+#     PHID   density porosity from RHOB
+#     PHIND  neutron-density porosity from NPLS and PHID
+#     SW     Archie water saturation from ILD and PHIND
+#
+# Parameters come from the ~Parameter section when the well carries them (RHOMA, RHOF, RW, A, M, N, GRCLEAN,
+# GRSHALE, ...), then from keyword overrides, then from the defaults below. If no clean/shale GR is given, the
+# P5 and P95 of the well's GR are used, as suggested in Log Data Viz Hitstogram.py.
+#
+# Usage:
+#
+#     import Petrophysics
+#     las = LasCache.load_las("Data/1044222726.las")
+#     Petrophysics.interpret(las, rw=0.04)            # adds VSH, PHID, PHIND and SW curves to las
+#     df = las.df()
+#
+#     Petrophysics.interpret_batch([las1, las2, las3])   # one vectorized pass over all wells together
+
+import re
+
+import numpy as np
+
+
+DEFAULTS = {
+    'gr_clean': None,        # None: P5 of GR
+    'gr_shale': None,        # None: P95 of GR
+    'vsh_method': 'linear',
+    'rho_matrix': 2.71,      # g/cc, limestone; the bundled well's DPLS is computed on a 2.71 matrix
+    'rho_fluid': 1.0,        # g/cc
+    'rw': 0.05,              # ohm.m at formation temperature
+    'a': 1.0,
+    'm': 2.0,
+    'n': 2.0,
+}
+
+# ~Parameter mnemonics recognised for each parameter, in order of preference.
+HEADER_PARAMETERS = {
+    'gr_clean': ['GRCLEAN', 'GR_CLEAN', 'GRMIN'],
+    'gr_shale': ['GRSHALE', 'GR_SHALE', 'GRSH', 'GRMAX'],
+    'rho_matrix': ['RHOMA', 'RHOM', 'DMA', 'MDEN'],
+    'rho_fluid': ['RHOF', 'RHOFL', 'DFL', 'FD'],
+    'rw': ['RW'],
+    'a': ['A', 'ATORT'],
+    'm': ['M', 'MCEM'],
+    'n': ['N', 'NSAT'],
+}
+
+# Neutron porosity units, upper-cased with spaces and dots removed ("p.u." -> "PU").
+PERCENT_UNITS = {'%', 'PU', 'PCT', 'PERCENT', 'V/V%', '%V/V', 'DEC%'}
+FRACTION_UNITS = {'V/V', 'FRAC', 'FRACTION', 'DEC', 'DECIMAL', 'M3/M3', 'CFCF', 'CF/CF'}
+
+# Input curves used for each role, and the curves written back.
+DEFAULT_CURVES = {'GR': 'GR', 'RHOB': 'RHOB', 'NPHI': 'NPLS', 'RT': 'ILD'}
+
+OUTPUT_CURVES = {
+    'VSH': ('V/V', 'Shale Volume (GR)'),
+    'PHID': ('V/V', 'Density Porosity'),
+    'PHIND': ('V/V', 'Neutron-Density Porosity'),
+    'SW': ('V/V', 'Water Saturation (Archie)'),
+}
+
+
+# -------------------------------------------------------------------------------------------------------
+# Equations. All arguments broadcast, so parameters can be scalars or per-sample arrays.
+
+def gamma_ray_index(gr, gr_clean, gr_shale):
+    return np.clip((gr - gr_clean) / (gr_shale - gr_clean), 0.0, 1.0)
+
+
+def shale_volume(gr, gr_clean, gr_shale, method='linear'):
+    igr = gamma_ray_index(gr, gr_clean, gr_shale)
+    if method == 'linear':
+        return igr
+    if method == 'larionov_tertiary':
+        return 0.083 * (2.0 ** (3.7 * igr) - 1.0)
+    if method == 'larionov_older':
+        return 0.33 * (2.0 ** (2.0 * igr) - 1.0)
+    raise ValueError(f"unknown shale volume method {method!r}")
+
+
+def density_porosity(rhob, rho_matrix=2.71, rho_fluid=1.0):
+    return (rho_matrix - rhob) / (rho_matrix - rho_fluid)
+
+
+def neutron_density_porosity(nphi, phid, method='rms'):
+    # nphi and phid as fractions. 'rms' is the usual gas-tolerant root-mean-square average.
+    if method == 'rms':
+        return np.sqrt((nphi ** 2 + phid ** 2) / 2.0)
+    if method == 'average':
+        return (nphi + phid) / 2.0
+    raise ValueError(f"unknown neutron-density method {method!r}")
+
+
+def archie_sw(rt, phi, rw, a=1.0, m=2.0, n=2.0):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sw = ((a * rw) / (phi ** m * rt)) ** (1.0 / n)
+    return np.clip(sw, 0.0, 1.0)
+
+
+# -------------------------------------------------------------------------------------------------------
+# Parameters
+
+def parameters_from_header(las):
+    # Parameters found in the well's header, keyed like DEFAULTS.
+    found = {}
+    for name, mnemonics in HEADER_PARAMETERS.items():
+        for mnemonic in mnemonics:
+            item = las.params.get(mnemonic)
+            if item is not None and isinstance(item.value, (int, float)):
+                found[name] = float(item.value)
+                break
+
+    # Fall back to the matrix density a porosity curve was computed with, e.g. "Density Porosity (2.71 g/cc)".
+    if 'rho_matrix' not in found:
+        for item in las.curves.values():
+            match = re.search(r'(\d\.\d+)\s*G/CC', item.descr.upper())
+            if match:
+                found['rho_matrix'] = float(match.group(1))
+                break
+    return found
+
+
+def resolve_parameters(las, curves=None, **overrides):
+    curves = dict(DEFAULT_CURVES, **(curves or {}))
+    parameters = dict(DEFAULTS)
+    parameters.update(parameters_from_header(las))
+    parameters.update({name: value for name, value in overrides.items() if value is not None})
+
+    gr = las[curves['GR']]
+    if parameters['gr_clean'] is None or parameters['gr_shale'] is None:
+        p5, p95 = np.nanquantile(gr, [0.05, 0.95])
+        if parameters['gr_clean'] is None:
+            parameters['gr_clean'] = float(p5)
+        if parameters['gr_shale'] is None:
+            parameters['gr_shale'] = float(p95)
+    return parameters
+
+
+def _neutron_fraction(las, mnemonic):
+    # The neutron porosity as a fraction. Percent and fraction units are recognised in their common spellings;
+    # for any other unit (or none) the values are taken as percent if their median is above 1, which no
+    # fractional porosity reaches.
+    values = las[mnemonic]
+    unit = re.sub(r'[\s.]', '', las.curves[mnemonic].unit).upper()
+    if unit in PERCENT_UNITS:
+        return values / 100.0
+    if unit in FRACTION_UNITS:
+        return values
+    present = values[~np.isnan(values)]
+    return values / 100.0 if present.size and np.median(present) > 1.0 else values
+
+
+# -------------------------------------------------------------------------------------------------------
+# Whole wells
+
+def compute(gr, rhob, nphi, rt, gr_clean, gr_shale, vsh_method='linear', rho_matrix=2.71, rho_fluid=1.0,
+            rw=0.05, a=1.0, m=2.0, n=2.0, nd_method='rms'):
+    # All four outputs from the raw curves (nphi as a fraction).
+    vsh = shale_volume(gr, gr_clean, gr_shale, vsh_method)
+    phid = density_porosity(rhob, rho_matrix, rho_fluid)
+    phind = neutron_density_porosity(nphi, phid, nd_method)
+    sw = archie_sw(rt, np.clip(phind, 0.0, 1.0), rw, a, m, n)
+    return {'VSH': vsh, 'PHID': phid, 'PHIND': phind, 'SW': sw}
+
+
+def interpret(las, curves=None, write=True, **overrides):
+    # Interpret one well; with write=True the results are added to las as new curves.
+    curves = dict(DEFAULT_CURVES, **(curves or {}))
+    parameters = resolve_parameters(las, curves, **overrides)
+    results = compute(las[curves['GR']], las[curves['RHOB']], _neutron_fraction(las, curves['NPHI']),
+                      las[curves['RT']], **parameters)
+    if write:
+        _write_back(las, results)
+    return results
+
+
+def interpret_batch(wells, curves=None, write=True, **overrides):
+    # Interpret many wells in a single vectorized pass: the curves of all wells are concatenated, each well's
+    # parameters are expanded to per-sample arrays, the equations run once, and the result is split back.
+    wells = list(wells)
+    if not wells:
+        return []
+    curves = dict(DEFAULT_CURVES, **(curves or {}))
+    parameters = [resolve_parameters(las, curves, **overrides) for las in wells]
+    lengths = np.array([las[curves['GR']].size for las in wells])
+
+    stacked = {}
+    for name in parameters[0]:
+        values = [p[name] for p in parameters]
+        if isinstance(values[0], str):
+            if len(set(values)) > 1:
+                raise ValueError(f'{name} must be the same for every well in a batch')
+            stacked[name] = values[0]
+        else:
+            stacked[name] = np.repeat(np.asarray(values, dtype=np.float64), lengths)
+
+    results = compute(np.concatenate([las[curves['GR']] for las in wells]),
+                      np.concatenate([las[curves['RHOB']] for las in wells]),
+                      np.concatenate([_neutron_fraction(las, curves['NPHI']) for las in wells]),
+                      np.concatenate([las[curves['RT']] for las in wells]),
+                      **stacked)
+
+    splits = np.cumsum(lengths)[:-1]
+    per_well = [dict(zip(results, parts)) for parts in zip(*(np.split(v, splits) for v in results.values()))]
+    if write:
+        for las, well_results in zip(wells, per_well):
+            _write_back(las, well_results)
+    return per_well
+
+
+def _write_back(las, results):
+    for mnemonic, values in results.items():
+        unit, descr = OUTPUT_CURVES[mnemonic]
+        las.append_curve(mnemonic, values, unit, descr)
@@ -0,0 +1,262 @@
+# Stage Profiler
+#
+# Records where the time of a well goes: every instrumented stage (loading and parsing the LAS file, las.df(),
+# dropna, statistics and KDE, decimation, matplotlib drawing and PNG encoding inside savefig) is timed for
+# wall-clock time, CPU time and memory, tagged with the well it belongs to. Stages nest, so a "savefig" stage
+# contains its "png encode" and each stage also reports its self time (without its nested stages).
+#
+# Profiling is off unless the LOG_PROFILE environment variable is set, and a disabled stage costs one function
+# call and a no-op context manager (well under a microsecond), so the instrumentation stays in the code:
+#
+#     LOG_PROFILE=1               record, and at exit write profile.json and print a summary table
+#     LOG_PROFILE=run.json        the same, written to run.json
+#     LOG_PROFILE_MEMORY=1        also trace the peak Python/NumPy allocation of every stage with tracemalloc
+#                                 (exact but several times slower)
+#
+# Without LOG_PROFILE_MEMORY each stage records by how much it raised the process's peak RSS (ru_maxrss): the
+# memory the stage needed beyond what the process had already held at some point. A stage that stays below an
+# earlier peak records 0, however much it allocates, so this finds the stages that set the memory high-water
+# mark; LOG_PROFILE_MEMORY gives the peak of every stage on its own.
+#
+# The trace file is in the Chrome trace-event format: open it in chrome://tracing or https://ui.perfetto.dev to
+# see the stages of every well on a timeline, one row per process. BatchRunner collects the stages recorded in
+# its worker processes and writes <out>/profile.json itself.
+#
+# Usage:
+#
+#     import Profiler
+#     with Profiler.stage('load', well='1044222726'):
+#         las = LasCache.load_las(path)
+#
+#     Profiler.enable()                                       # or switch it on in code
+#     ...
+#     events = Profiler.drain()
+#     Profiler.print_summary(events)
+#     Profiler.write_trace('profile.json', events)
+
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_TRACE_PATH = 'profile.json'
+
+ENABLED = False
+TRACE_MEMORY = False
+
+_events = []
+_local = threading.local()
+_DISABLED = contextlib.nullcontext()
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+class _Stage:
+    __slots__ = ('name', 'args', 'start', 'cpu_start', 'rss_start', 'children', 'peak')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        stack = _stack()
+        if stack:
+            self.args.setdefault('well', stack[-1].args.get('well'))
+        if TRACE_MEMORY:
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.children = 0.0
+        self.peak = 0
+        self.rss_start = _peak_rss_mb()
+        stack.append(self)
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        cpu = time.thread_time() - self.cpu_start
+        stack = _stack()
+        stack.pop()
+        wall = (end - self.start) / 1e9
+        rss = _peak_rss_mb()
+        event = {'name': self.name, 'well': self.args.pop('well', None), 'start': self.start / 1e3,
+                 'wall': wall, 'self': wall - self.children, 'cpu': cpu, 'pid': os.getpid(),
+                 'tid': threading.get_ident(), 'depth': len(stack),
+                 'rss_growth_mb': rss - self.rss_start if rss is not None else None, 'args': self.args}
+        if TRACE_MEMORY:
+            # The peak of this stage is the highest of its own peak and those of the stages nested in it.
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            event['peak_mb'] = self.peak / 1e6
+            tracemalloc.reset_peak()
+        if stack:
+            stack[-1].children += wall
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+        _events.append(event)
+        return False
+
+
+def _stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def stage(name, **args):
+    # Context manager timing one stage; well=... tags it (nested stages inherit the well of the enclosing one).
+    if not ENABLED:
+        return _DISABLED
+    return _Stage(name, args)
+
+
+def enable(memory=False):
+    global ENABLED, TRACE_MEMORY
+    ENABLED = True
+    TRACE_MEMORY = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _time_png_encoding()
+
+
+def disable():
+    global ENABLED, TRACE_MEMORY
+    ENABLED = False
+    if TRACE_MEMORY:
+        tracemalloc.stop()
+    TRACE_MEMORY = False
+
+
+def _time_png_encoding():
+    # Agg's savefig draws the figure and then hands the pixels to matplotlib.image.imsave to be encoded, so
+    # timing imsave separates the PNG encoding from the drawing. Only wrapped once profiling is switched on.
+    import matplotlib.image
+    imsave = matplotlib.image.imsave
+    if getattr(imsave, 'profiled', False):
+        return
+
+    def profiled_imsave(*args, **kwargs):
+        with stage('png encode'):
+            return imsave(*args, **kwargs)
+
+    profiled_imsave.profiled = True
+    matplotlib.image.imsave = profiled_imsave
+
+
+def drain():
+    # The stages recorded so far in this process, removing them.
+    events = _events[:]
+    del _events[:len(events)]
+    return events
+
+
+# -------------------------------------------------------------------------------------------------------
+# Reports
+
+def summarize(events):
+    # {stage: totals} over all wells, and {well: {stage: self seconds}}
+    stages = {}
+    wells = {}
+    for event in events:
+        totals = stages.setdefault(event['name'], {'calls': 0, 'wall': 0.0, 'self': 0.0, 'cpu': 0.0,
+                                                   'peak_mb': None, 'rss_growth_mb': None})
+        totals['calls'] += 1
+        for key in ('wall', 'self', 'cpu'):
+            totals[key] += event[key]
+        for key in ('peak_mb', 'rss_growth_mb'):
+            if event.get(key) is not None:
+                totals[key] = max(totals[key] or 0.0, event[key])
+        if event['well'] is not None:
+            per_well = wells.setdefault(event['well'], {})
+            per_well[event['name']] = per_well.get(event['name'], 0.0) + event['self']
+    return {'stages': stages, 'wells': wells}
+
+
+def print_summary(events, file=None, top_wells=10):
+    file = file or sys.stdout
+    summary = summarize(events)
+    if not summary['stages']:
+        return
+    total_self = sum(totals['self'] for totals in summary['stages'].values())
+    memory = any(totals['peak_mb'] is not None for totals in summary['stages'].values())
+    print(f"\n{'Stage':<18}{'Calls':>7}{'Wall (s)':>11}{'Self (s)':>11}{'Share':>7}{'CPU (s)':>10}"
+          f"{'Peak (MB)' if memory else 'RSS +MB':>11}", file=file)
+    for name, totals in sorted(summary['stages'].items(), key=lambda item: -item[1]['self']):
+        share = totals['self'] / total_self if total_self else 0.0
+        megabytes = totals['peak_mb'] if memory else totals['rss_growth_mb']
+        megabytes = f'{megabytes:.0f}' if megabytes is not None else '-'
+        print(f"{name:<18}{totals['calls']:>7}{totals['wall']:>11.3f}{totals['self']:>11.3f}{share:>7.0%}"
+              f"{totals['cpu']:>10.3f}{megabytes:>11}", file=file)
+
+    # The slowest wells, by the time of their outermost stages
+    per_well = {}
+    for event in events:
+        if event['well'] is not None and event['depth'] == 0:
+            per_well[event['well']] = per_well.get(event['well'], 0.0) + event['wall']
+    if len(per_well) > 1:
+        print(f"\nSlowest wells ({min(top_wells, len(per_well))} of {len(per_well)}):", file=file)
+        for well, seconds in sorted(per_well.items(), key=lambda item: -item[1])[:top_wells]:
+            stages = sorted(summary['wells'][well].items(), key=lambda item: -item[1])[:3]
+            detail = ', '.join(f'{name} {value:.2f}' for name, value in stages)
+            print(f'  {well:<24}{seconds:>8.2f} s   ({detail})', file=file)
+
+
+def trace_events(events):
+    # Complete ("X") events of the Chrome trace-event format; times in microseconds.
+    trace = []
+    for event in events:
+        args = dict(event['args'], cpu_ms=round(event['cpu'] * 1e3, 3), self_ms=round(event['self'] * 1e3, 3))
+        if event['well'] is not None:
+            args['well'] = event['well']
+        for key in ('peak_mb', 'rss_growth_mb'):
+            if event.get(key) is not None:
+                args[key] = round(event[key], 1)
+        trace.append({'name': event['name'], 'cat': 'stage', 'ph': 'X', 'ts': event['start'],
+                      'dur': event['wall'] * 1e6, 'pid': event['pid'], 'tid': event['tid'], 'args': args})
+    return trace
+
+
+def write_trace(path, events):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace_events(events), 'displayTimeUnit': 'ms',
+                   'otherData': {'summary': summarize(events)['stages']}}, f)
+    return path
+
+
+def trace_path():
+    value = os.environ.get('LOG_PROFILE', '')
+    return DEFAULT_TRACE_PATH if value.lower() in ('1', 'true', 'yes', 'on') else value
+
+
+def _write_at_exit():
+    events = drain()
+    if events:
+        path = write_trace(trace_path(), events)
+        print_summary(events, file=sys.stderr)
+        print(f'profile written to {path}', file=sys.stderr)
+
+
+if os.environ.get('LOG_PROFILE', '').lower() not in ('', '0', 'false', 'no', 'off'):
+    enable(memory=os.environ.get('LOG_PROFILE_MEMORY', '') not in ('', '0'))
+    atexit.register(_write_at_exit)
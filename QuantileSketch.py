@@ -0,0 +1,222 @@
+# Mergeable Quantile Sketches
+#
+# The box plot and histogram scripts compute quartiles, notches, whiskers and P5/P95 from every raw sample of a
+# single well. For field-wide plots over thousands of wells we instead keep one small KLL sketch per well and
+# curve. Sketches are persisted next to each other, merge into field or zone sketches without touching the raw
+# data again, and answer any quantile with a rank error of roughly 1.7 / k (about 0.7 % for the default k=256).
+#
+# Usage:
+#
+#     import QuantileSketch
+#     store = QuantileSketch.SketchStore("Data/sketches")
+#     store.add_well('1044222726', las.df(), ['GR', 'RHOB', 'ILD', 'NPLS'])
+#
+#     gr = store.merged('GR')                   # field sketch over every stored well
+#     print(gr.quantile(0.05), gr.quantile(0.95))
+#     field = store.merged_curves(['GR', 'RHOB', 'ILD', 'NPLS'])
+#     stats = {curve: sketch.box_stats(curve) for curve, sketch in field.items()}
+#     LogPlots.box_plots_from_stats(stats, 'Boxplot/Field-Boxplot.png')
+
+import json
+import os
+import tempfile
+import zlib
+
+import numpy as np
+
+
+DEFAULT_K = 256
+
+
+class KllSketch:
+    """KLL quantile sketch: a stack of compactors where an item at level h stands for 2**h samples."""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    # ---------------------------------------------------------------------------------------------------
+    # Building
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.n += values.size
+        self.total += values.sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        # Fold another sketch into this one; the result is a sketch of both inputs together.
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.k = max(self.k, other.k)
+        self._compress()
+        return self
+
+    def _capacity(self, h):
+        # Lower levels shrink geometrically (factor 2/3) below the top level, which holds k items.
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        while True:
+            for h, items in enumerate(self.levels):
+                if items.size > self._capacity(h):
+                    break
+            else:
+                return
+
+            # Sort the overflowing level, keep every other item (random offset) and promote them to h + 1,
+            # where each one now stands for twice as many samples. An odd item out stays behind.
+            items = np.sort(items)
+            keep = items[:1] if items.size % 2 else items[:0]
+            pairs = items[keep.size:]
+            promoted = pairs[self._rng.integers(2)::2]
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = keep
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+
+    # ---------------------------------------------------------------------------------------------------
+    # Queries
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else np.nan
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        # Accepts a scalar or an array of quantiles in [0, 1].
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        items, cumulative = self._weighted_items()
+        q = np.asarray(q, dtype=np.float64)
+        ranks = q * cumulative[-1]
+        index = np.searchsorted(cumulative, ranks, side='left').clip(0, items.size - 1)
+        result = items[index]
+        # The exact extremes are tracked separately.
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return result if result.ndim else float(result)
+
+    def rank(self, value):
+        # Approximate fraction of samples <= value.
+        if self.n == 0:
+            return np.nan
+        items, cumulative = self._weighted_items()
+        position = np.searchsorted(items, value, side='right')
+        return cumulative[position - 1] / cumulative[-1] if position else 0.0
+
+    def box_stats(self, label=None, whis=1.5):
+        # Statistics in the format of matplotlib's Axes.bxp(), like df.plot(kind='box', notch=True,
+        # showmeans=True) computes from raw samples. Whisker ends and fliers are taken from the items the sketch
+        # retains, so fliers are a sample of the true outliers.
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        lo_fence, hi_fence = q1 - whis * iqr, q3 + whis * iqr
+        items = np.concatenate(self.levels + [np.array([self.min, self.max])])
+        inside = items[(items >= lo_fence) & (items <= hi_fence)]
+        notch = 1.57 * iqr / np.sqrt(self.n) if self.n else np.nan
+        return {
+            'label': label, 'mean': self.mean, 'med': median, 'q1': q1, 'q3': q3, 'iqr': iqr,
+            'cilo': median - notch, 'cihi': median + notch,
+            'whislo': inside.min() if inside.size else q1,
+            'whishi': inside.max() if inside.size else q3,
+            'fliers': np.unique(items[(items < lo_fence) | (items > hi_fence)]),
+        }
+
+    # ---------------------------------------------------------------------------------------------------
+    # Persistence
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'total': self.total,
+                'min': None if self.n == 0 else self.min, 'max': None if self.n == 0 else self.max,
+                'levels': [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch = cls(data['k'], seed=seed)
+        sketch.n = data['n']
+        sketch.total = data['total']
+        sketch.min = np.inf if data['min'] is None else data['min']
+        sketch.max = -np.inf if data['max'] is None else data['max']
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in data['levels']] or [np.empty(0)]
+        return sketch
+
+
+def sketch_curves(df, curves, k=DEFAULT_K):
+    # One sketch per curve of a frame shaped like las.df(). Seeding from the curve name keeps reruns identical.
+    return {curve: KllSketch(k, seed=zlib.crc32(curve.encode())).update(df[curve].to_numpy())
+            for curve in curves if curve in df}
+
+
+def merge_sketches(sketches):
+    sketches = list(sketches)
+    if not sketches:
+        return KllSketch()
+    merged = KllSketch(sketches[0].k, seed=0)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+
+class SketchStore:
+    """One JSON file of curve sketches per well, merged on demand into field or zone sketches."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, well_id):
+        return os.path.join(self.root, f'{well_id}.json')
+
+    def wells(self):
+        return sorted(name[:-5] for name in os.listdir(self.root) if name.endswith('.json'))
+
+    def add_well(self, well_id, df, curves, k=DEFAULT_K):
+        self.save(well_id, sketch_curves(df, curves, k))
+
+    def save(self, well_id, sketches):
+        fd, tmp = tempfile.mkstemp(suffix='.json', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({curve: sketch.to_dict() for curve, sketch in sketches.items()}, f)
+        os.replace(tmp, self.path(well_id))
+
+    def load(self, well_id):
+        with open(self.path(well_id), 'r') as f:
+            return {curve: KllSketch.from_dict(data) for curve, data in json.load(f).items()}
+
+    def merged(self, curve, wells=None):
+        # Field sketch for one curve over the given wells (default: every stored well).
+        return self.merged_curves([curve], wells)[curve]
+
+    def merged_curves(self, curves, wells=None):
+        # {curve: field sketch}, reading each well's file once.
+        sketches = {curve: [] for curve in curves}
+        for well_id in (self.wells() if wells is None else wells):
+            well = self.load(well_id)
+            for curve in curves:
+                if curve in well:
+                    sketches[curve].append(well[curve])
+        return {curve: merge_sketches(items) for curve, items in sketches.items()}
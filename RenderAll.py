@@ -0,0 +1,107 @@
+# Render All Figures
+#
+# One headless command that loads a well once and renders every figure the tutorial scripts produce: the box
+# plots, the GR histogram with KDE, the NPLS-RHOB crossplot, the three-track log and the shaded GR log. The
+# figures are independent, so they are rendered in parallel worker processes with the Agg backend; nothing is
+# shown on screen. Total wall time and the time of each figure are reported at the end.
+#
+# Figures go through RenderCache: when neither the data, the figure settings nor the library versions have
+# changed, the stored PNG is reused instead of rendering again, and the hit/miss counts are printed.
+#
+# Usage (from the repository root):
+#     python RenderAll.py                                   # Data/1044222726.las into Boxplot/, Histograms/, ...
+#     python RenderAll.py Data/other.las --out Renders/other --workers 3
+#     python RenderAll.py --no-cache                        # always render
+
+import matplotlib
+matplotlib.use('Agg')
+
+import argparse
+import concurrent.futures
+import os
+import time
+
+import LasCache
+import LogPlots
+import RenderCache
+
+
+# Where each figure goes, relative to the output folder; the same places the scripts save them.
+FIGURE_FOLDERS = {
+    'GR-ILD-RHOB-NPLS-Boxplot.png': 'Boxplot',
+    'GR Histogram-KernelDensity.png': 'Histograms',
+    'Scatter-Cross-RHOB-NPLS-GR.png': 'Scatter-Cross plots',
+    'GR-ILD-RHOB-NPLSSubplot.png': 'Log Plot',
+    'Shale-Sand-Log.png': 'Log Plot',
+}
+
+
+def _render(filename, df, path, dpi):
+    start = time.perf_counter()
+    LogPlots.FIGURES[filename](df, path, dpi=dpi)
+    return filename, time.perf_counter() - start
+
+
+def render_all(las_path, out_dir='.', workers=None, dpi=300, cache=None):
+    # cache: a RenderCache, or False to render every figure.
+    start = time.perf_counter()
+    df = LasCache.load_las(las_path).df()
+    load_time = time.perf_counter() - start
+    if cache is None:
+        cache = RenderCache.RenderCache()
+
+    jobs = {}
+    for filename in LogPlots.FIGURES:
+        folder = os.path.join(out_dir, FIGURE_FOLDERS[filename])
+        os.makedirs(folder, exist_ok=True)
+        jobs[filename] = os.path.join(folder, filename)
+
+    # Cached figures are copied in this process; only the misses are sent to the pool.
+    timings = {}
+    keys = {}
+    for filename, path in jobs.items():
+        if cache:
+            lookup_start = time.perf_counter()
+            keys[filename] = cache.key(LogPlots.FIGURES[filename], df, dpi=dpi)
+            if cache.fetch(keys[filename], path):
+                timings[filename] = time.perf_counter() - lookup_start
+                continue
+        timings[filename] = None
+
+    pending = [filename for filename, seconds in timings.items() if seconds is None]
+    if pending:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers or len(pending)) as pool:
+            futures = [pool.submit(_render, filename, df, jobs[filename], dpi) for filename in pending]
+            for future in concurrent.futures.as_completed(futures):
+                filename, seconds = future.result()
+                timings[filename] = seconds
+                if cache:
+                    cache.store(keys[filename], jobs[filename])
+
+    return {'load': load_time, 'figures': timings, 'paths': jobs, 'cached': [f for f in jobs if f not in pending],
+            'cache': cache.stats() if cache else None, 'wall_time': time.perf_counter() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render all standard well log figures for one LAS file.')
+    parser.add_argument('las', nargs='?', default='Data/1044222726.las')
+    parser.add_argument('--out', default='.', help='folder that receives Boxplot/, Histograms/, Log Plot/, ...')
+    parser.add_argument('--workers', type=int, default=None, help='parallel renderers (default: one per figure)')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--no-cache', action='store_true', help='render every figure, ignoring the render cache')
+    args = parser.parse_args(argv)
+
+    cache = False if args.no_cache else RenderCache.RenderCache()
+    result = render_all(args.las, args.out, workers=args.workers, dpi=args.dpi, cache=cache)
+
+    print(f"{'load':<34}{result['load']:>8.2f} s")
+    for filename, seconds in sorted(result['figures'].items(), key=lambda item: -item[1]):
+        source = 'cached' if filename in result['cached'] else 'rendered'
+        print(f'{filename:<34}{seconds:>8.2f} s   {source:<9}-> {result["paths"][filename]}')
+    print(f"{'total wall time':<34}{result['wall_time']:>8.2f} s")
+    if cache:
+        print(cache.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+# Content-Addressed Figure Cache
+#
+# Rendering the standard figures at 300 dpi takes seconds per well, and most runs re-render figures whose data
+# and settings have not changed. RenderCache stores every rendered PNG under a key made from everything that
+# can change the image:
+#
+#     - the frame that is plotted (depth index, curve names and the bytes of every curve)
+#     - the figure function and all its arguments, defaults included (dpi, cutoff, xlim, ...)
+#     - the source of the plotting modules, which hold the colours, limits and labels
+#     - the matplotlib rcParams in effect and the matplotlib/NumPy/pandas versions
+#
+# When the key is already in the cache the stored PNG is copied to the output path instead of rendering.
+# Hits and misses are counted, and the cache is kept under RENDER_CACHE_MAX_MB megabytes (default 512) by
+# evicting the least recently used images, the same policy as LasCache.
+#
+# Usage:
+#
+#     import RenderCache
+#     cache = RenderCache.RenderCache()                       # ".render_cache", or RENDER_CACHE_DIR
+#     cache.render(LogPlots.shaded_gr_log, df, 'Log Plot/Shale-Sand-Log.png', cutoff=50)
+#     print(cache.summary())                                  # "render cache: 1 hit, 0 misses, ..."
+#     cache.render(FigureTemplates.renderer(LogPlots.crossplot), df, path, key_render=LogPlots.crossplot)
+#
+#     key = cache.key(LogPlots.log_tracks, df, dpi=300)       # split lookup and render, e.g. around a pool
+#     if not cache.fetch(key, path):
+#         LogPlots.log_tracks(df, path, dpi=300)
+#         cache.store(key, path)
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+import CompactCurves
+import LasCache
+
+
+DEFAULT_CACHE_DIR = '.render_cache'
+DEFAULT_MAX_MB = 512
+
+# Bump to invalidate every stored figure, e.g. after a change outside the modules below.
+RENDER_CACHE_VERSION = 1
+
+# Modules whose source decides what a figure looks like.
+PLOT_MODULES = ['LogPlots', 'FastKDE', 'LogDecimate', 'DensityCrossplot', 'CompactCurves', 'FigureTemplates']
+
+
+def cache_dir():
+    return os.environ.get('RENDER_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+
+def max_cache_bytes():
+    return int(float(os.environ.get('RENDER_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+
+
+def frame_hash(df):
+    # Digest of the index, the column names and the bytes of every column. A CompactFrame is hashed as stored:
+    # each curve's encoded data, validity bitmap, scale and offset.
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(df.index.name)] + [str(name) for name in df.columns]).encode())
+    if isinstance(df, CompactCurves.CompactFrame):
+        arrays = [df.depth]
+        for curve in df.curves.values():
+            digest.update(f'{curve.scale} {curve.offset} {curve.size}'.encode())
+            arrays += [curve.data, curve.bitmap]
+    else:
+        arrays = [df.index.to_numpy()] + [df[name].to_numpy() for name in df.columns]
+    for values in arrays:
+        values = np.ascontiguousarray(values)
+        digest.update(str(values.dtype).encode())
+        digest.update(memoryview(values).cast('B'))
+    return digest.hexdigest()
+
+
+_environment_hash = None
+
+
+def environment_hash():
+    # Digest of the plotting code and library versions; computed once per process.
+    global _environment_hash
+    if _environment_hash is None:
+        digest = hashlib.sha256()
+        versions = f'{RENDER_CACHE_VERSION} {matplotlib.__version__} {np.__version__} {pd.__version__}'
+        digest.update(versions.encode())
+        for name in PLOT_MODULES:
+            module = __import__(name)
+            with open(module.__file__, 'rb') as f:
+                digest.update(f.read())
+        _environment_hash = digest.hexdigest()
+    return _environment_hash
+
+
+def _rc_hash():
+    # rcParams can be changed at any time (plt.style.use), so they are hashed on every call.
+    return hashlib.sha256(repr(sorted(matplotlib.rcParams.items())).encode()).hexdigest()
+
+
+def figure_arguments(render, **kwargs):
+    # Every argument of the figure function except the frame and the path, with defaults filled in.
+    bound = inspect.signature(render).bind(None, None, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    for name in list(arguments)[:2]:
+        del arguments[name]
+    return arguments
+
+
+class RenderCache:
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or cache_dir()
+        self.max_bytes = max_cache_bytes() if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_reused = 0
+
+    def key(self, render, df, **kwargs):
+        arguments = figure_arguments(render, **kwargs)
+        digest = hashlib.sha256()
+        digest.update(f'{render.__module__}.{render.__qualname__}'.encode())
+        digest.update(json.dumps(arguments, sort_keys=True, default=repr).encode())
+        digest.update(frame_hash(df).encode())
+        digest.update(environment_hash().encode())
+        digest.update(_rc_hash().encode())
+        return digest.hexdigest()
+
+    def entry(self, key):
+        return os.path.join(self.directory, f'{key}.png')
+
+    def fetch(self, key, path):
+        # Copy the cached image to path; returns False (and counts a miss) if there is none.
+        entry = self.entry(key)
+        try:
+            shutil.copyfile(entry, path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        try:
+            os.utime(entry)  # mark as recently used for the eviction policy
+        except FileNotFoundError:
+            pass  # evicted by another process in the meantime; the copy is still good
+        self.hits += 1
+        self.bytes_reused += os.path.getsize(path)
+        return True
+
+    def store(self, key, path):
+        # Copy a freshly rendered image into the cache, atomically, then trim the cache.
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f, open(path, 'rb') as source:
+                shutil.copyfileobj(source, f)
+            os.replace(tmp, self.entry(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        LasCache.evict(self.directory, self.max_bytes, pattern='.png')
+
+    def render(self, render, df, path, key_render=None, **kwargs):
+        # Render one figure through the cache; returns True on a hit. key_render is the function the entry is
+        # stored under when render draws the same image by other means (a FigureTemplates renderer for its
+        # LogPlots function), so both share one entry.
+        key = self.key(key_render or render, df, **kwargs)
+        if self.fetch(key, path):
+            return True
+        render(df, path, **kwargs)
+        self.store(key, path)
+        return False
+
+    def clear(self):
+        return LasCache.evict(self.directory, 0, pattern='.png')
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes_reused': self.bytes_reused}
+
+    def summary(self):
+        stats = self.stats()
+        return (f"render cache: {stats['hits']} hit{'s' * (stats['hits'] != 1)}, "
+                f"{stats['misses']} miss{'es' * (stats['misses'] != 1)} ({stats['hit_rate']:.0%} hit rate, "
+                f"{stats['bytes_reused'] / 1e6:.1f} MB reused)")
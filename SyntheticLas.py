@@ -0,0 +1,346 @@
+# Synthetic Well Logs
+#
+# The only real data in the repo is one 741-row well, far too small to show how anything scales. This module
+# writes LAS 2.0 files with the same 18 curves as Data/1044222726.las (SP through PIRM) at any length, from a
+# thousand to a hundred million depth samples, with curves that behave like logs rather than like noise:
+#
+#   - the well is a stack of beds (sand, limestone, dolomite, shale) of random thickness, each with its own
+#     shale volume, porosity and water saturation, smoothed over about two feet like a logging tool would
+#   - GR and SP follow the shale volume; RHOB, NPLS, DPLS and PE follow porosity and lithology; ILD, CILD,
+#     PIRM, SFL, MINV and MNOR follow Archie's law, with invasion separating the shallow and micro readings
+#     in permeable beds; the calipers wash out in shale and DRHO follows the caliper
+#   - the first row is null for every curve, as in the bundled file, and every curve has null runs of a few to
+#     a few hundred samples scattered through it
+#
+# Data is generated and written in blocks, so memory use does not grow with the length of the well, and the
+# rows are formatted with vectorized NumPy instead of np.savetxt. The output is reproducible for a given seed.
+#
+# Usage:
+#
+#     import SyntheticLas
+#     SyntheticLas.write_las('synthetic_1e6.las', 1_000_000)               # a 1,000,000-row LAS file
+#     las = SyntheticLas.synthetic_las(10_000, seed=3)                     # a LasFile in memory
+#     for block in SyntheticLas.blocks(10**8, chunk_rows=1 << 20):        # (rows, 18) float blocks, NaN nulls
+#         ...
+#
+# or from the command line:
+#     python SyntheticLas.py Data/synthetic_1e7.las --rows 1e7 --step 0.1 --seed 1
+
+import argparse
+import os
+
+import numpy as np
+
+import LasReader
+
+
+NULL = -999.25
+
+# (mnemonic, unit, API code, description) as in the ~Curve block of Data/1044222726.las.
+CURVES = [
+    ('DEPT', 'F', '00 001 00 00', 'Measured Depth'),
+    ('SP', 'MV', '07 010 01 00', 'Self Potential'),
+    ('CALM', 'IN', '07 280 12 00', 'Microlog Caliper'),
+    ('CALD', 'IN', '45 280 13 00', 'Litho Density Caliper'),
+    ('CALN', 'IN', '45 280 24 00', 'Compensated Neutron Caliper'),
+    ('GR', 'GAPI', '07 310 01 00', 'Gamma Ray'),
+    ('MINV', 'OHMM', '07 270 04 00', 'Microinverse Focused'),
+    ('MNOR', 'OHMM', '07 270 04 00', 'Micronormal Focused'),
+    ('LWTLB', 'LB', '00 000 00 00', 'Line Weight'),
+    ('DRHO', 'G/C3', '45 356 01 00', 'Density Correction'),
+    ('SFL', 'OHMM', '07 220 04 00', 'Shallow Focussed Resistivity'),
+    ('RHOB', 'G/C3', '45 350 02 00', 'Bulk Density'),
+    ('NPLS', '%', '42 330 01 00', 'Neutron Porosity (Limestone)'),
+    ('PE', 'BARN/E', '45 358 00 00', 'Photoelectric Cross Section'),
+    ('CILD', 'MMHO', '07 110 45 00', 'Deep Induction Cond. Envir. Cor'),
+    ('ILD', 'OHMM', '07 120 45 00', 'Deep Induction Resistivity'),
+    ('DPLS', '%', '45 890 10 00', 'Density Porosity (2.71 g/cc)'),
+    ('PIRM', 'OHMM', '07 120 44 00', 'Envir. corr., Phased ILM'),
+]
+NAMES = [curve[0] for curve in CURVES]
+
+# Lithologies: (probability, matrix density, PE, neutron offset in %, porosity range, shale volume range)
+LITHOLOGIES = {
+    'sand': (0.30, 2.65, 1.8, -4.0, (0.08, 0.28), (0.0, 0.25)),
+    'limestone': (0.25, 2.71, 5.1, 0.0, (0.02, 0.18), (0.0, 0.15)),
+    'dolomite': (0.10, 2.87, 3.1, 4.0, (0.02, 0.15), (0.0, 0.15)),
+    'shale': (0.35, 2.60, 3.4, 0.0, (0.04, 0.10), (0.65, 1.0)),
+}
+
+MEAN_BED_FEET = 8.0
+BED_BATCH = 1024                # beds generated at a time
+TOOL_RESOLUTION_FEET = 2.0
+BIT_SIZE = 8.75
+RW = 0.04                      # formation water resistivity, ohm.m
+RMF = 0.12                     # mud filtrate resistivity, ohm.m
+SHALE_RESISTIVITY = 4.0
+NULL_RUNS_PER_1000_ROWS = 0.2  # per curve
+MEAN_NULL_RUN = 40             # rows
+
+# Row format of the bundled file: depth in 9 characters, every other curve in 11, two decimals.
+DEPTH_WIDTH = 9
+CURVE_WIDTH = 11
+DECIMALS = 2
+
+
+class _MovingAverage:
+    """Trailing moving average over `width` rows that continues seamlessly from one block to the next."""
+
+    def __init__(self, width):
+        self.width = max(1, int(width))
+        self.tail = None
+
+    def __call__(self, x):
+        if self.width == 1:
+            return x
+        if self.tail is None:
+            self.tail = np.repeat(x[:1], self.width - 1, axis=0)
+        padded = np.concatenate([self.tail, x])
+        self.tail = padded[-(self.width - 1):]
+        sums = np.cumsum(padded, axis=0)
+        sums = np.concatenate([np.zeros((1,) + x.shape[1:]), sums])
+        return (sums[self.width:] - sums[:-self.width]) / self.width
+
+
+class _Generator:
+
+    def __init__(self, step, top, seed, nulls):
+        self.step = step
+        self.top = top
+        # Separate streams for beds, noise, null run starts and null run lengths. Each is drawn in the same order
+        # whatever the block size, so chunk_rows does not change the well.
+        streams = [np.random.default_rng([seed, i]) for i in range(4)]
+        self.bed_rng, self.noise_rng, self.null_rng, self.run_rng = streams
+        self.nulls = nulls
+        self.row = 0
+        self.pending = np.empty((0, 8))      # rows of beds generated but not yet used
+        rows_per_foot = 1.0 / step
+        self.smooth_beds = _MovingAverage(TOOL_RESOLUTION_FEET * rows_per_foot)
+        self.smooth_noise = _MovingAverage(max(1.0, 0.5 * rows_per_foot))
+        self.open_nulls = np.zeros(len(CURVES) - 1, dtype=np.int64)
+
+    def _bed_rows(self, n):
+        # Per-row bed properties for the next n rows: shale volume, porosity, water saturation, matrix density,
+        # PE, neutron offset, washout and the permeable flag, as columns of an (n, 8) array.
+        pieces = [self.pending]
+        available = self.pending.shape[0]
+        while available < n:
+            rows = self._beds(BED_BATCH)
+            pieces.append(rows)
+            available += rows.shape[0]
+        rows = np.concatenate(pieces) if len(pieces) > 1 else self.pending
+        self.pending = rows[n:]
+        return rows[:n]
+
+    def _beds(self, count):
+        # count beds, expanded to one row per depth sample.
+        rng = self.bed_rng
+        names = list(LITHOLOGIES)
+        probabilities = np.array([LITHOLOGIES[name][0] for name in names])
+        kind = rng.choice(len(names), size=count, p=probabilities)
+        thickness = np.maximum(1, np.rint(rng.exponential(MEAN_BED_FEET / self.step, count))).astype(np.int64)
+        properties = np.empty((count, 8))
+        for i, name in enumerate(names):
+            chosen = kind == i
+            _, density, pe, offset, porosity, shale = LITHOLOGIES[name]
+            properties[chosen, 0] = rng.uniform(*shale, chosen.sum())
+            properties[chosen, 1] = rng.uniform(*porosity, chosen.sum())
+            properties[chosen, 3] = density
+            properties[chosen, 4] = pe
+            properties[chosen, 5] = offset
+        # Hydrocarbons in some clean beds, water elsewhere.
+        clean = properties[:, 0] < 0.3
+        properties[:, 2] = np.where(clean & (rng.random(count) < 0.3), rng.uniform(0.15, 0.5, count),
+                                    rng.uniform(0.8, 1.0, count))
+        properties[:, 6] = rng.exponential(0.6, count) * properties[:, 0]
+        properties[:, 7] = clean & (properties[:, 1] > 0.08)
+        return np.repeat(properties, thickness, axis=0)
+
+    def block(self, n):
+        depth = self.top + self.step * (self.row + np.arange(n))
+        beds = self.smooth_beds(self._bed_rows(n))
+        vsh, phi, sw, rho_ma, pe_ma, offset, washout, permeable = beds.T
+        noise = self.smooth_noise(self.noise_rng.standard_normal((n, 12)))
+        noise *= np.sqrt(self.smooth_noise.width)  # back to unit variance after averaging
+
+        values = np.empty((n, len(CURVES)))
+        values[:, 0] = depth
+        columns = {name: i for i, name in enumerate(NAMES)}
+
+        def put(name, curve):
+            values[:, columns[name]] = curve
+
+        phi_eff = np.clip(phi * (1 - vsh), 0.005, None)
+        put('GR', 15 + 125 * vsh + 3.0 * noise[:, 0])
+        put('SP', 5 - 55 * (1 - vsh) * (0.5 + 0.5 * permeable) + 1.0 * noise[:, 1])
+        rhob = rho_ma * (1 - phi) + 1.0 * phi + 0.015 * noise[:, 2]
+        put('RHOB', rhob)
+        put('DPLS', (2.71 - rhob) / (2.71 - 1.0) * 100)
+        put('NPLS', np.clip(100 * phi + 30 * vsh + offset + 1.0 * noise[:, 3], -2, 60))
+        put('PE', pe_ma + 0.1 * noise[:, 4])
+
+        # Archie's law for the clean part, in parallel with shale.
+        rt_clean = RW / (phi_eff ** 2 * sw ** 2)
+        rt = 1 / ((1 - vsh) / rt_clean + vsh / SHALE_RESISTIVITY)
+        ild = np.clip(rt * np.exp(0.05 * noise[:, 5]), 0.2, 2000)
+        put('ILD', ild)
+        put('CILD', 1000 / ild)
+        put('PIRM', ild * np.exp(0.02 * noise[:, 6]))
+        rxo = RMF / (phi_eff ** 2 * np.clip(sw ** 0.2, 0.6, 1.0) ** 2)
+        rxo = 1 / ((1 - vsh) / rxo + vsh / SHALE_RESISTIVITY)
+        invaded = np.where(permeable > 0.5, 0.7, 0.0)
+        put('SFL', np.clip(ild * (1 - invaded) + rxo * invaded, 0.2, 2000) * np.exp(0.04 * noise[:, 7]))
+        minv = np.clip(np.where(permeable > 0.5, 0.6 * rxo, ild * 0.9), 0.2, 500) * np.exp(0.05 * noise[:, 8])
+        put('MINV', minv)
+        put('MNOR', minv * np.where(permeable > 0.5, 1.3, 1.0))
+
+        # Washouts in shale, a little mud cake in permeable beds.
+        caliper = BIT_SIZE + washout - 0.15 * permeable
+        put('CALM', caliper - 0.1 + 0.03 * noise[:, 9])
+        put('CALD', caliper + 0.05 + 0.03 * noise[:, 9])
+        put('CALN', caliper + 0.2 + 0.03 * noise[:, 10])
+        put('DRHO', 0.02 * (caliper - BIT_SIZE) + 0.01 * noise[:, 11])
+        put('LWTLB', 1040 + 60 * np.sin(depth / 500.0) + 5 * noise[:, 1])
+
+        values = np.round(values, DECIMALS)
+        if self.nulls:
+            values[:, 1:][self._null_mask(n)] = np.nan
+        self.row += n
+        return values
+
+    def _null_mask(self, n):
+        # (n, curves) True inside a null run. Runs that reach past the block carry on into the next one.
+        ncurves = len(CURVES) - 1
+        change = np.zeros((n + 1, ncurves), dtype=np.int64)
+        carried = np.minimum(self.open_nulls, n)
+        change[0] += carried > 0
+        change[carried, np.arange(ncurves)] -= carried > 0
+
+        starts = self.null_rng.random((n, ncurves)) < NULL_RUNS_PER_1000_ROWS / 1000
+        rows, curves = np.nonzero(starts)
+        lengths = self.run_rng.geometric(1 / MEAN_NULL_RUN, rows.size)
+        ends = rows + lengths
+        np.add.at(change, (rows, curves), 1)
+        np.add.at(change, (np.minimum(ends, n), curves), -1)
+        mask = np.cumsum(change[:-1], axis=0) > 0
+
+        self.open_nulls = np.maximum(self.open_nulls - n, 0)
+        beyond = ends > n
+        np.maximum.at(self.open_nulls, curves[beyond], ends[beyond] - n)
+        if self.row == 0:
+            mask[0] = True  # the bundled file starts with an all-null row
+        return mask
+
+
+def blocks(nrows, step=0.5, top=2830.0, seed=0, chunk_rows=1 << 18, nulls=True):
+    # Yields (rows, 18) float64 blocks, depth first and the curves in CURVES order, with NaN for nulls.
+    generator = _Generator(step, top, seed, nulls)
+    for start in range(0, int(nrows), chunk_rows):
+        yield generator.block(min(chunk_rows, int(nrows) - start))
+
+
+def header_text(nrows, step=0.5, top=2830.0, well='SYNTHETIC #1', field='SYNTHETIC', api='15-000-00000'):
+    stop = top + step * (int(nrows) - 1)
+    lines = [
+        '~Version Information',
+        'VERS.                 2.0:   CWLS log ASCII Standard -VERSION 2.0',
+        'WRAP.                  NO:   Single line per depth step',
+        '~Well Information Block',
+        '#MNEM.UNIT       Data Type    Information',
+        '#---------    -------------   -----------------------------',
+        f'STRT.F        {top:<32.3f}:',
+        f'STOP.F        {stop:<32.3f}:',
+        f'STEP.F        {step:<32.4f}:',
+        f'NULL.         {NULL:<32.4f}:',
+        f"COMP.         {'SYNTHETICLAS':<32}: COMPANY",
+        f'WELL.         {well:<32}: WELL',
+        f'FLD .         {field:<32}: FIELD',
+        f"LOC .         {'API: #' + api:<32}: LOCATION",
+        f"PROV.         {'KANSAS':<32}: PROVINCE",
+        f"SRVC.         {'SyntheticLas':<32}: SERVICE COMPANY",
+        '~Curve Information Block',
+        '#MNEM   .UNIT         API CODE      Curve Description',
+        '#-------.-------    -------------   -----------------------',
+    ]
+    lines += [f' {name:<7}.{unit:<12}{code}:   {descr}' for name, unit, code, descr in CURVES]
+    lines.append('~Ascii Log Data')
+    return '\n'.join(lines) + '\n'
+
+
+def format_block(values):
+    # Fixed-width text rows for a (rows, curves) block, byte for byte what
+    # np.savetxt(f, values, fmt=['%9.2f'] + ['%10.2f'] * (curves - 1)) writes for values already rounded to two
+    # decimals (apart from "-0.00", written as "0.00"). NaN becomes the null value.
+    values = np.where(np.isnan(values), NULL, values)
+    n = values.shape[0]
+    fields = [_format_fields(values[:, :1], DEPTH_WIDTH, 0), _format_fields(values[:, 1:], CURVE_WIDTH, 1),
+              np.full((n, 1), ord('\n'), dtype=np.uint8)]
+    return np.concatenate(fields, axis=1).tobytes()
+
+
+def _format_fields(values, width, gap):
+    # (rows, columns * width) characters of right-aligned "%{width}.2f" fields, written one character position
+    # at a time from the right, across the whole block at once. The first `gap` characters must stay blank so
+    # neighbouring fields never run together.
+    n, m = values.shape
+    scaled = np.rint(np.abs(values) * 10 ** DECIMALS)
+    largest = scaled.max() if scaled.size else 0
+    if largest >= 10 ** (width - gap - 1):
+        raise ValueError(f'value too wide for a {width}-character field')
+    remaining = scaled.astype(np.int32 if largest < 2 ** 31 else np.int64)
+    sign_pending = (values < 0) & (remaining > 0)
+    planes = np.empty((width, n, m), dtype=np.uint8)    # one plane per character position, for contiguous writes
+    for k in range(width):
+        position = width - 1 - k
+        if k == DECIMALS:
+            planes[position] = ord('.')
+            continue
+        remaining, digit = np.divmod(remaining, 10)
+        digit = digit.astype(np.uint8) + ord('0')
+        if k <= DECIMALS + 1:
+            planes[position] = digit                      # fraction digits and the units digit
+        else:
+            more = (remaining > 0) | (digit != ord('0'))
+            sign = sign_pending & ~more
+            planes[position] = np.where(more, digit, np.where(sign, ord('-'), ord(' ')))
+            sign_pending &= ~sign
+    if np.any(sign_pending) or np.any(planes[:gap] != ord(' ')):
+        raise ValueError(f'value too wide for a {width}-character field')
+    return planes.transpose(1, 2, 0).reshape(n, m * width)
+
+
+def write_las(path, nrows, step=0.5, top=2830.0, seed=0, chunk_rows=1 << 18, nulls=True, **well):
+    # Write an nrows-long synthetic well to path; well=... passes WELL/FLD/API values on to the header.
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header_text(nrows, step, top, **well).encode())
+        for block in blocks(nrows, step, top, seed, chunk_rows, nulls):
+            f.write(format_block(block))
+    os.replace(tmp, path)
+    return path
+
+
+def synthetic_las(nrows, step=0.5, top=2830.0, seed=0, nulls=True, **well):
+    # The same well as write_las() would write, as a LasFile without going through a file.
+    sections = LasReader.parse_header(header_text(nrows, step, top, **well))
+    table = np.concatenate(list(blocks(nrows, step, top, seed, nulls=nulls)) or [np.empty((0, len(CURVES)))])
+    data = {name: np.ascontiguousarray(table[:, i]) for i, name in enumerate(NAMES)}
+    return LasReader.LasFile(sections['version'], sections['well'], sections['curves'], sections['params'],
+                             sections['other'], data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic LAS file with realistic, correlated curves.')
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=float, default=1e5, help='depth samples, e.g. 1e6')
+    parser.add_argument('--step', type=float, default=0.5, help='depth step in feet')
+    parser.add_argument('--top', type=float, default=2830.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-nulls', action='store_true', help='leave out the null runs')
+    args = parser.parse_args(argv)
+    write_las(args.path, int(args.rows), args.step, args.top, args.seed, nulls=not args.no_nulls)
+    print(f'{args.path}: {int(args.rows):,} rows, {os.path.getsize(args.path) / 1e6:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
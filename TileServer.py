@@ -0,0 +1,543 @@
+# Depth Tile Server for Interactive Log Review
+#
+# Log Data Plot Viz.py draws a whole well into one static PNG; on a long well the detail is lost, and looking
+# closer means plotting again. This server cuts each track into a depth x zoom tile pyramid instead, the way web
+# maps do: at zoom level z the well's depth range is split into 2**z tiles of TILE_WIDTH x TILE_HEIGHT pixels,
+# so every zoom step doubles the vertical resolution. Panning and zooming in the viewer are then fetches of a
+# few fixed-size tiles, whatever the depth of the well.
+#
+# Tracks (same curves, colours and scales as LogPlots.log_tracks and LogPlots.shaded_gr_log):
+#
+#     gr          GR, 0-150 API
+#     ild         ILD, scaled to the well's range
+#     rhob-npls   RHOB (gray) with NPLS (red, 0-40) overlaid
+#     gr-shaded   GR with sand (yellow) / shale (gray) shading at the GR=50 cutoff
+#
+# Tiles are rendered on first request from the well's depth slice (LogDecimate envelope per pixel row) and kept
+# on disk in ".tile_cache" (TILE_CACHE_DIR, trimmed to TILE_CACHE_MAX_MB, least recently used first). Tile URLs
+# carry a digest of the LAS file and of the drawing code, so they are served with "Cache-Control: immutable" and
+# an ETag; a changed file or renderer gives new URLs instead of stale tiles.
+#
+# A tile request costs the same however large the library is: the directory is listed again only when its mtime
+# changes, the last MAX_WELLS wells used are kept loaded (each loaded by the first request that needs it, without
+# holding up requests for other wells), and /wells is built from the LAS headers without loading any curves.
+#
+# Usage:
+#     python TileServer.py Data --port 8765            # then open http://127.0.0.1:8765/
+#     python TileServer.py Data --warm 4               # render zoom levels 0-4 of every well up front
+#
+#     GET /                                            a minimal viewer
+#     GET /wells                                       the wells with their depth range and tile URL template
+#     GET /tiles/<well>/<digest>/<track>/<z>/<y>.png   one tile
+
+import argparse
+import collections
+import concurrent.futures
+import hashlib
+import http.server
+import inspect
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import urllib.parse
+
+import numpy as np
+from matplotlib import ticker
+from matplotlib.figure import Figure
+
+import LasCache
+import LasReader
+import LogDecimate
+import RenderCache
+
+
+DEFAULT_CACHE_DIR = '.tile_cache'
+DEFAULT_MAX_MB = 1024
+
+TILE_WIDTH = 256
+TILE_HEIGHT = 512
+TILE_DPI = 100
+
+# Bump to invalidate every stored tile.
+TILE_VERSION = 1
+
+CURVES = ['GR', 'ILD', 'RHOB', 'NPLS']
+TRACKS = ['gr', 'ild', 'rhob-npls', 'gr-shaded']
+GR_CUTOFF = 50
+
+# Store this many tiles between two passes of the eviction policy.
+EVICT_EVERY = 64
+
+# Wells kept loaded in memory, least recently used dropped first.
+MAX_WELLS = 16
+
+
+def cache_dir():
+    return os.environ.get('TILE_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+
+def max_cache_bytes():
+    return int(float(os.environ.get('TILE_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+
+
+_renderer_hash = None
+
+
+def renderer_hash():
+    # Digest of the tile drawing code and of everything RenderCache counts as the plotting environment.
+    global _renderer_hash
+    if _renderer_hash is None:
+        digest = hashlib.sha256()
+        digest.update(f'{TILE_VERSION} {TILE_WIDTH}x{TILE_HEIGHT}@{TILE_DPI}'.encode())
+        digest.update(RenderCache.environment_hash().encode())
+        digest.update(inspect.getsource(inspect.getmodule(renderer_hash)).encode())
+        _renderer_hash = digest.hexdigest()
+    return _renderer_hash
+
+
+def _padded_range(values, pad=0.05):
+    # The data range with a 5% margin, like matplotlib's autoscaling; shared by every tile of the track.
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return 0.0, 1.0
+    low, high = float(values.min()), float(values.max())
+    margin = (high - low) * pad or 0.5
+    return low - margin, high + margin
+
+
+def _grid_step(span, lines=4):
+    # A 1/2/5 x 10^n depth spacing giving about `lines` grid lines per tile. Grid lines sit on multiples of
+    # it, so they line up across neighbouring tiles.
+    raw = span / lines
+    power = 10 ** math.floor(math.log10(raw))
+    return next(step * power for step in (1, 2, 5, 10) if step * power >= raw)
+
+
+class Well:
+    """The curves of one LAS file, with its depth range and per-track x scales."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.stat = os.stat(path)
+        las = LasCache.load_las(path, lazy=True)  # only the track curves are read
+        self.depth = np.asarray(las[las.index_name], dtype=np.float64)
+        self.curves = {curve: np.asarray(las[curve], dtype=np.float64) for curve in CURVES if curve in las}
+        if self.depth.size > 1 and self.depth[0] > self.depth[-1]:
+            self.depth = self.depth[::-1]
+            self.curves = {curve: values[::-1] for curve, values in self.curves.items()}
+        self.top = float(np.nanmin(self.depth))
+        self.base = float(np.nanmax(self.depth))
+        self.xlim = {'GR': (0, 150), 'NPLS': (0, 40)}
+        for curve in ('ILD', 'RHOB'):
+            if curve in self.curves:
+                self.xlim[curve] = _padded_range(self.curves[curve])
+
+        self.digest = tile_digest(path)
+
+    @property
+    def max_zoom(self):
+        return max_zoom(self.depth.size)
+
+    def tile_range(self, z, y):
+        span = (self.base - self.top) / 2 ** z
+        return self.top + y * span, self.top + (y + 1) * span
+
+    def describe(self):
+        return describe(self.name, self.digest, self.top, self.base, self.depth.size, self.curves)
+
+    def has_track(self, track):
+        return has_track(track, self.curves)
+
+    def window(self, curve, top, base, n_rows):
+        # The samples of one curve inside [top, base] plus one on either side, so lines run on into the
+        # neighbouring tiles, reduced to a min/max envelope per pixel row.
+        first = max(int(np.searchsorted(self.depth, top, side='left')) - 1, 0)
+        last = min(int(np.searchsorted(self.depth, base, side='right')) + 1, self.depth.size)
+        return LogDecimate.envelope(self.depth[first:last], self.curves[curve][first:last], n_rows,
+                                    top=top, base=base)
+
+
+def tile_digest(path):
+    # Digest of the LAS file and the drawing code; part of every tile URL.
+    digest = hashlib.sha256()
+    digest.update(LasCache.file_hash(path).encode())
+    digest.update(renderer_hash().encode())
+    return digest.hexdigest()[:20]
+
+
+def max_zoom(samples):
+    # Deep enough that a tile holds no more than about one sample per pixel row.
+    return max(0, math.ceil(math.log2(max(1, samples) / TILE_HEIGHT)))
+
+
+def has_track(track, curves):
+    needed = {'gr': ['GR'], 'ild': ['ILD'], 'rhob-npls': ['RHOB', 'NPLS'], 'gr-shaded': ['GR']}[track]
+    return all(curve in curves for curve in needed)
+
+
+def describe(name, digest, top, base, samples, curves):
+    return {'name': name, 'top': top, 'base': base, 'samples': int(samples),
+            'tracks': [track for track in TRACKS if has_track(track, curves)], 'max_zoom': max_zoom(samples),
+            'tile_width': TILE_WIDTH, 'tile_height': TILE_HEIGHT,
+            'tile_url': f'/tiles/{urllib.parse.quote(name)}/{digest}/{{track}}/{{z}}/{{y}}.png'}
+
+
+def describe_header(name, path):
+    # The /wells entry of a LAS file from its header alone (STRT, STOP, STEP and the curve names), so listing
+    # the library does not load any curve data. None if the header has no regular depth step.
+    header = LasReader.read_header(path)
+    try:
+        start, stop, step = (float(header['well'][key].value) for key in ('STRT', 'STOP', 'STEP'))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not step or not math.isfinite(step) or not math.isfinite(start) or not math.isfinite(stop):
+        return None
+    samples = int(round(abs(stop - start) / abs(step))) + 1
+    return describe(name, tile_digest(path), min(start, stop), max(start, stop), samples, header['curves'])
+
+
+def render_tile(well, track, z, y):
+    # One tile as PNG bytes. No tick labels: the viewer draws the depth scale, the tiles only the data and a
+    # grid that lines up from tile to tile.
+    top, base = well.tile_range(z, y)
+    fig = Figure(figsize=(TILE_WIDTH / TILE_DPI, TILE_HEIGHT / TILE_DPI), dpi=TILE_DPI)
+    ax = fig.add_axes([0, 0, 1, 1])
+    n_rows = 2 * TILE_HEIGHT
+
+    if track in ('gr', 'gr-shaded'):
+        depth, gr = well.window('GR', top, base, n_rows)
+        if track == 'gr':
+            ax.plot(gr, depth, color='black')
+        else:
+            ax.plot(gr, depth, c='black', lw=0.5)
+            ax.fill_betweenx(depth, GR_CUTOFF, gr, where=gr <= GR_CUTOFF, facecolor='yellow')
+            ax.fill_betweenx(depth, gr, GR_CUTOFF, where=gr >= GR_CUTOFF, facecolor='gray')
+        ax.set_xlim(*well.xlim['GR'])
+    elif track == 'ild':
+        depth, ild = well.window('ILD', top, base, n_rows)
+        ax.plot(ild, depth, color='yellow')
+        ax.set_xlim(*well.xlim['ILD'])
+    elif track == 'rhob-npls':
+        depth, rhob = well.window('RHOB', top, base, n_rows)
+        ax.plot(rhob, depth, color='gray')
+        ax.set_xlim(*well.xlim['RHOB'])
+        twin = ax.twiny()
+        depth, npls = well.window('NPLS', top, base, n_rows)
+        twin.plot(npls, depth, color='red')
+        twin.set_xlim(*well.xlim['NPLS'])
+        twin.set_axis_off()
+    else:
+        raise KeyError(track)
+
+    ax.set_ylim(base, top)
+    ax.yaxis.set_major_locator(ticker.MultipleLocator(_grid_step(base - top)))
+    ax.xaxis.set_major_locator(ticker.MaxNLocator(5))
+    ax.grid(True)
+    ax.tick_params(labelbottom=False, labelleft=False, length=0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=TILE_DPI)
+    return buffer.getvalue()
+
+
+class TileStore:
+    """Wells under a directory, and their tiles, rendered on first use and kept on disk."""
+
+    def __init__(self, source, directory=None, max_bytes=None, max_wells=MAX_WELLS):
+        self.source = source
+        self.directory = directory or cache_dir()
+        self.max_bytes = max_cache_bytes() if max_bytes is None else max_bytes
+        self.max_wells = max_wells
+        self.wells = collections.OrderedDict()   # name -> ((path, size, mtime), Future of the Well), LRU order
+        self.descriptions = {}                    # path -> ((size, mtime), /wells entry read from the header)
+        self.listing = None                       # (directory mtime, {name: path})
+        self.lock = threading.Lock()
+        self.render_lock = threading.Lock()
+        self.stored = 0
+        self.hits = 0
+        self.misses = 0
+
+    def paths(self, refresh=False):
+        # {name: path} of the LAS files, listed again only when the directory has changed (or when asked to).
+        if os.path.isfile(self.source):
+            return {os.path.splitext(os.path.basename(self.source))[0]: self.source}
+        mtime = os.stat(self.source).st_mtime_ns
+        listing = self.listing
+        if refresh or listing is None or listing[0] != mtime:
+            listing = self.listing = (mtime, {os.path.splitext(name)[0]: os.path.join(self.source, name)
+                                              for name in sorted(os.listdir(self.source))
+                                              if name.lower().endswith('.las')})
+        return listing[1]
+
+    def path(self, name):
+        path = self.paths().get(name)
+        if path is None:
+            # A file added within the directory's mtime resolution; list once more before giving up.
+            path = self.paths(refresh=True).get(name)
+        if path is None:
+            raise KeyError(name)
+        return path
+
+    def well(self, name):
+        # The loaded well, re-loaded if its file changed since. A well is loaded by the first request that needs
+        # it, outside the store's lock; other requests for the same well wait for that load, and requests for
+        # other wells (and cached tiles) go on.
+        path = self.path(name)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime)
+        with self.lock:
+            loaded = self.wells.get(name)
+            if loaded is not None and loaded[0] == key:
+                self.wells.move_to_end(name)
+                future, owner = loaded[1], False
+            else:
+                future, owner = concurrent.futures.Future(), True
+                self.wells[name] = (key, future)
+                self.wells.move_to_end(name)
+                while len(self.wells) > self.max_wells:
+                    self.wells.popitem(last=False)
+        if owner:
+            try:
+                future.set_result(Well(name, path))
+            except BaseException as error:
+                future.set_exception(error)
+                with self.lock:
+                    if self.wells.get(name, (None, None))[1] is future:
+                        del self.wells[name]  # try again on the next request
+        return future.result()
+
+    def describe(self):
+        # The /wells list, from the LAS headers; only a well without a regular depth step is loaded.
+        wells, descriptions = [], {}
+        for name, path in self.paths().items():
+            try:
+                stat = os.stat(path)
+                known = self.descriptions.get(path)
+                if known is not None and known[0] == (stat.st_size, stat.st_mtime):
+                    description = known[1]
+                else:
+                    description = describe_header(name, path) or self.well(name).describe()
+                descriptions[path] = ((stat.st_size, stat.st_mtime), description)
+                wells.append(description)
+            except (OSError, ValueError, KeyError):
+                continue  # not a readable LAS file; leave it out of the list
+        self.descriptions = descriptions
+        return wells
+
+    def entry(self, well, track, z, y):
+        return os.path.join(self.directory, f'{well.digest}-{track}-{z}-{y}.png')
+
+    def tile(self, well, track, z, y):
+        # PNG bytes of one tile, from disk when it was rendered before.
+        if track not in TRACKS or not well.has_track(track):
+            raise KeyError(track)
+        if not (0 <= z <= well.max_zoom and 0 <= y < 2 ** z):
+            raise KeyError(f'{z}/{y}')
+        entry = self.entry(well, track, z, y)
+        data = self._read(entry)
+        if data is not None:
+            self.hits += 1
+            return data
+        with self.render_lock:
+            # matplotlib is not thread-safe; one tile at a time, and a tile asked for twice is drawn once.
+            data = self._read(entry)
+            if data is not None:
+                self.hits += 1
+                return data
+            data = render_tile(well, track, z, y)
+        self.misses += 1
+        self._store(entry, data)
+        return data
+
+    def _read(self, entry):
+        try:
+            with open(entry, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(entry)  # mark as recently used for the eviction policy
+        except FileNotFoundError:
+            pass
+        return data
+
+    def _store(self, entry, data):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, entry)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        with self.lock:
+            self.stored += 1
+            evict = self.stored % EVICT_EVERY == 0
+        if evict:
+            LasCache.evict(self.directory, self.max_bytes, pattern='.png')
+
+    def warm(self, max_zoom, names=None):
+        # Render zoom levels 0..max_zoom of every track ahead of time; returns the number of tiles.
+        count = 0
+        for name in names or self.paths():
+            well = self.well(name)
+            for z in range(min(max_zoom, well.max_zoom) + 1):
+                for track in TRACKS:
+                    if well.has_track(track):
+                        for y in range(2 ** z):
+                            self.tile(well, track, z, y)
+                            count += 1
+        return count
+
+
+VIEWER = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Well log tiles</title>
+<style>
+body { font-family: sans-serif; margin: 0; }
+#bar { padding: 6px; border-bottom: 1px solid #ccc; }
+#view { height: calc(100vh - 40px); overflow: auto; position: relative; }
+.track { position: absolute; top: 0; }
+.track img { display: block; }
+.scale { position: absolute; left: 0; top: 0; font-size: 11px; }
+.scale div { position: absolute; right: 4px; }
+</style></head><body>
+<div id="bar"><select id="well"></select> <button id="out">-</button> <button id="in">+</button>
+<span id="zoom"></span></div>
+<div id="view"></div>
+<script>
+const view = document.getElementById('view');
+let wells = [], well = null, z = 0;
+function draw() {
+  const size = well.tile_height * 2 ** z, tiles = 2 ** z, keep = view.scrollTop / (view.scrollHeight || 1);
+  document.getElementById('zoom').textContent = `zoom ${z} of ${well.max_zoom}`;
+  view.innerHTML = '';
+  const scale = document.createElement('div');
+  scale.className = 'scale'; scale.style.width = '60px'; scale.style.height = size + 'px';
+  const ticks = 8 * tiles;
+  for (let i = 0; i <= ticks; i++) {
+    const label = document.createElement('div');
+    label.style.top = (i * size / ticks - 6) + 'px';
+    label.textContent = (well.top + i * (well.base - well.top) / ticks).toFixed(1);
+    scale.appendChild(label);
+  }
+  view.appendChild(scale);
+  well.tracks.forEach((track, t) => {
+    const column = document.createElement('div');
+    column.className = 'track'; column.style.left = (64 + t * (well.tile_width + 8)) + 'px';
+    for (let y = 0; y < tiles; y++) {
+      const img = document.createElement('img');
+      img.loading = 'lazy'; img.width = well.tile_width; img.height = well.tile_height; img.title = track;
+      img.src = well.tile_url.replace('{track}', track).replace('{z}', z).replace('{y}', y);
+      column.appendChild(img);
+    }
+    view.appendChild(column);
+  });
+  view.scrollTop = keep * size;
+}
+document.getElementById('in').onclick = () => { if (z < well.max_zoom) { z++; draw(); } };
+document.getElementById('out').onclick = () => { if (z > 0) { z--; draw(); } };
+document.getElementById('well').onchange = (e) => { well = wells[e.target.value]; z = 0; draw(); };
+fetch('/wells').then(r => r.json()).then(list => {
+  wells = list;
+  list.forEach((w, i) => document.getElementById('well').add(new Option(w.name, i)));
+  if (list.length) { well = list[0]; draw(); }
+});
+</script></body></html>
+"""
+
+
+class TileHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without TCP_NODELAY a keep-alive client waits ~40 ms for the
+    # delayed ACK on every tile.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        parts = [part for part in path.split('/') if part]
+        try:
+            if not parts:
+                return self._send(200, VIEWER.encode(), 'text/html; charset=utf-8', 'no-cache')
+            if parts == ['wells']:
+                body = json.dumps(self.server.store.describe()).encode()
+                return self._send(200, body, 'application/json', 'no-cache')
+            if len(parts) == 6 and parts[0] == 'tiles' and parts[5].endswith('.png'):
+                return self._tile(parts[1], parts[2], parts[3], parts[4], parts[5][:-4])
+        except ConnectionError:
+            return  # the client went away mid-response
+        except (KeyError, ValueError, OSError):
+            pass  # unknown well or track, bad number, or a LAS file removed or replaced while being read
+        self._send(404, b'not found', 'text/plain')
+
+    def _tile(self, name, digest, track, z, y):
+        store = self.server.store
+        well = store.well(name)
+        if digest != well.digest:
+            # An old URL: the LAS file or the renderer changed since. The viewer re-reads /wells.
+            return self._send(404, b'stale tile url', 'text/plain')
+        etag = f'"{well.digest}-{track}-{z}-{y}"'
+        headers = {'ETag': etag}
+        cache_control = 'public, max-age=31536000, immutable'
+        if etag in (self.headers.get('If-None-Match') or ''):
+            return self._send(304, b'', None, cache_control, headers)
+        data = store.tile(well, track, int(z), int(y))
+        self._send(200, data, 'image/png', cache_control, headers)
+
+    def _send(self, status, body, content_type, cache_control=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if cache_control:
+            self.send_header('Cache-Control', cache_control)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+def make_server(store, host='127.0.0.1', port=8765, verbose=False):
+    server = http.server.ThreadingHTTPServer((host, port), TileHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve well log tracks as a depth x zoom tile pyramid.')
+    parser.add_argument('source', nargs='?', default='Data', help='a LAS file or a directory of LAS files')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--warm', type=int, default=None, metavar='ZOOM',
+                        help='render zoom levels 0..ZOOM of every well before serving')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    store = TileStore(args.source)
+    if args.warm is not None:
+        print(f'rendered {store.warm(args.warm)} tiles')
+    server = make_server(store, args.host, args.port, args.verbose)
+    print(f'serving {len(store.paths())} wells on http://{args.host}:{server.server_address[1]}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+# SQLite Well-Header Catalog
+#
+# The ~Well block of a LAS file already says who logged the well and where (COMP, WELL, FLD, LOC with the API
+# number, PROV, SRVC, DATE) and the ~Curve block lists every mnemonic it contains. The catalog scans a directory
+# of LAS files, reads only those header blocks (LasReader.read_header stops at ~A, so no curve data is parsed)
+# and stores them in an SQLite database. Questions like "all wells in field BITIKOFER that have RHOB and NPLS"
+# are then a single indexed query.
+#
+# Re-indexing is incremental: files whose size and mtime are unchanged are skipped without being opened; when
+# they changed, the file's SHA-256 is compared with the stored one and the header is only re-read if the
+# content really changed. Files that disappeared are dropped from the catalog.
+#
+# Usage:
+#
+#     import WellCatalog
+#     catalog = WellCatalog.WellCatalog('Data/catalog.sqlite')
+#     catalog.index('Data')                                   # {'added': 1, 'updated': 0, 'unchanged': 0, ...}
+#     for well in catalog.find(field='BITIKOFER', curves=['RHOB', 'NPLS']):
+#         print(well['path'], well['well'], well['api'])
+#
+# or from the command line:
+#     python WellCatalog.py index Data --db Data/catalog.sqlite
+#     python WellCatalog.py find --field BITIKOFER --curves RHOB NPLS --db Data/catalog.sqlite
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+import LasCache
+import LasReader
+
+
+DEFAULT_DB = 'catalog.sqlite'
+
+# ~Well mnemonics copied into their own columns of the wells table; every header item is also kept, as text,
+# in header_items.
+WELL_COLUMNS = {
+    'COMP': 'company',
+    'WELL': 'well',
+    'FLD': 'field',
+    'LOC': 'location',
+    'PROV': 'province',
+    'SRVC': 'service_company',
+    'DATE': 'log_date',
+    'UWI': 'uwi',
+    'STRT': 'strt',
+    'STOP': 'stop',
+    'STEP': 'step',
+    'NULL': 'null_value',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wells (
+    id              INTEGER PRIMARY KEY,
+    path            TEXT UNIQUE NOT NULL,
+    size            INTEGER,
+    mtime           REAL,
+    hash            TEXT,
+    indexed_at      REAL,
+    las_version     TEXT,
+    wrapped         INTEGER,
+    company         TEXT,
+    well            TEXT,
+    field           TEXT COLLATE NOCASE,
+    location        TEXT,
+    api             TEXT,
+    province        TEXT COLLATE NOCASE,
+    service_company TEXT,
+    log_date        TEXT,
+    uwi             TEXT,
+    strt            REAL,
+    stop            REAL,
+    step            REAL,
+    null_value      REAL
+);
+CREATE INDEX IF NOT EXISTS wells_field ON wells (field COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS wells_province ON wells (province COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS wells_api ON wells (api COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS curves (
+    well_id     INTEGER NOT NULL REFERENCES wells (id) ON DELETE CASCADE,
+    position    INTEGER NOT NULL,
+    mnemonic    TEXT NOT NULL COLLATE NOCASE,
+    unit        TEXT,
+    api_code    TEXT,
+    descr       TEXT,
+    PRIMARY KEY (well_id, position)
+);
+CREATE INDEX IF NOT EXISTS curves_mnemonic ON curves (mnemonic, well_id);
+
+CREATE TABLE IF NOT EXISTS header_items (
+    well_id     INTEGER NOT NULL REFERENCES wells (id) ON DELETE CASCADE,
+    section     TEXT NOT NULL,
+    mnemonic    TEXT NOT NULL COLLATE NOCASE,
+    unit        TEXT,
+    value       TEXT,
+    descr       TEXT
+);
+CREATE INDEX IF NOT EXISTS header_items_well ON header_items (well_id);
+"""
+
+# "API: #15-113-21342", "API 15-113-21342-00-00", ...
+API_PATTERN = re.compile(r'API\W*(\d[\d-]{5,})', re.IGNORECASE)
+
+
+def api_number(well):
+    # The API number from an API/UWI item, or embedded in LOC as the KGS files do.
+    for mnemonic in ('API', 'UWI'):
+        item = well.get(mnemonic)
+        if item is not None and str(item.value).strip():
+            return str(item.value).strip()
+    for item in well.values():
+        match = API_PATTERN.search(str(item.value))
+        if match:
+            return match.group(1)
+    return None
+
+
+def find_las_files(directory):
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name.lower().endswith('.las'):
+                yield os.path.join(root, name)
+
+
+class WellCatalog:
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------------------------------------------------------------------------------
+    # Indexing
+
+    def index(self, directory, prune=True):
+        # Bring the catalog up to date with the LAS files under directory. Returns counts of what happened.
+        counts = {'added': 0, 'updated': 0, 'touched': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        rows = self.connection.execute('SELECT id, path, size, mtime, hash FROM wells')
+        known = {row['path']: row for row in rows}
+        seen = set()
+
+        with self.connection:
+            for path in find_las_files(directory):
+                path = os.path.normpath(path)
+                seen.add(path)
+                try:
+                    counts[self._index_file(path, known.get(path))] += 1
+                except (OSError, ValueError, UnicodeError):
+                    counts['failed'] += 1
+
+            if prune:
+                root = os.path.normpath(directory)
+                for path, row in known.items():
+                    if path not in seen and (path == root or path.startswith(root + os.sep)):
+                        self.connection.execute('DELETE FROM wells WHERE id = ?', (row['id'],))
+                        counts['removed'] += 1
+        return counts
+
+    def _index_file(self, path, row):
+        stat = os.stat(path)
+        if row is not None and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime:
+            return 'unchanged'
+
+        digest = LasCache.file_hash(path)
+        if row is not None and row['hash'] == digest:
+            # Touched but identical content: only remember the new mtime.
+            self.connection.execute('UPDATE wells SET size = ?, mtime = ? WHERE id = ?',
+                                    (stat.st_size, stat.st_mtime, row['id']))
+            return 'touched'
+
+        header = LasReader.read_header(path)
+        self._write_header(path, stat, digest, header, row['id'] if row is not None else None)
+        return 'added' if row is None else 'updated'
+
+    def _write_header(self, path, stat, digest, header, well_id):
+        well = header['well']
+        version = header['version'].get('VERS')
+        columns = {
+            'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': digest, 'indexed_at': time.time(),
+            'las_version': None if version is None else str(version.value),
+            'wrapped': int(LasReader._is_wrapped(header['version'])),
+            'api': api_number(well),
+        }
+        for mnemonic, column in WELL_COLUMNS.items():
+            item = well.get(mnemonic)
+            value = None if item is None or item.value == '' else item.value
+            columns[column] = value
+
+        if well_id is not None:
+            # Replace the old row; ON DELETE CASCADE removes its curves and header items.
+            self.connection.execute('DELETE FROM wells WHERE id = ?', (well_id,))
+        names = ', '.join(columns)
+        marks = ', '.join('?' * len(columns))
+        cursor = self.connection.execute(f'INSERT INTO wells ({names}) VALUES ({marks})', list(columns.values()))
+        well_id = cursor.lastrowid
+
+        self.connection.executemany(
+            'INSERT INTO curves (well_id, position, mnemonic, unit, api_code, descr) VALUES (?, ?, ?, ?, ?, ?)',
+            [(well_id, i, item.mnemonic, item.unit, str(item.value), item.descr)
+             for i, item in enumerate(header['curves'].values())])
+        self.connection.executemany(
+            'INSERT INTO header_items (well_id, section, mnemonic, unit, value, descr) VALUES (?, ?, ?, ?, ?, ?)',
+            [(well_id, section, item.mnemonic, item.unit, str(item.value), item.descr)
+             for section in ('version', 'well', 'params') for item in header[section].values()])
+
+    # ---------------------------------------------------------------------------------------------------
+    # Queries
+
+    def find(self, field=None, curves=(), company=None, province=None, api=None, top=None, base=None):
+        # Wells matching every given condition, as dicts of the wells table columns. Text matches ignore case;
+        # curves=[...] requires all of the mnemonics; top/base keep wells whose STRT..STOP overlaps the window.
+        conditions, arguments = [], []
+        for column, value in (('field', field), ('company', company), ('province', province), ('api', api)):
+            if value is not None:
+                # Values are stripped when indexed; comparing the bare column lets the NOCASE indexes serve it.
+                conditions.append(f'{column} = ? COLLATE NOCASE')
+                arguments.append(str(value).strip())
+        if top is not None:
+            conditions.append('MAX(strt, stop) >= ?')
+            arguments.append(top)
+        if base is not None:
+            conditions.append('MIN(strt, stop) <= ?')
+            arguments.append(base)
+        curves = list(curves)
+        if curves:
+            marks = ', '.join('?' * len(curves))
+            conditions.append(f'id IN (SELECT well_id FROM curves WHERE mnemonic IN ({marks}) '
+                              f'GROUP BY well_id HAVING COUNT(DISTINCT mnemonic) = ?)')
+            arguments.extend(curves)
+            arguments.append(len({name.upper() for name in curves}))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.connection.execute(f'SELECT * FROM wells {where} ORDER BY path', arguments)
+        return [dict(row) for row in rows]
+
+    def curves(self, path):
+        rows = self.connection.execute(
+            'SELECT c.mnemonic, c.unit, c.descr FROM curves c JOIN wells w ON w.id = c.well_id '
+            'WHERE w.path = ? ORDER BY c.position', (os.path.normpath(path),))
+        return [dict(row) for row in rows]
+
+    def header(self, path, section='well'):
+        rows = self.connection.execute(
+            'SELECT h.mnemonic, h.value FROM header_items h JOIN wells w ON w.id = h.well_id '
+            'WHERE w.path = ? AND h.section = ?', (os.path.normpath(path), section))
+        return {row['mnemonic']: row['value'] for row in rows}
+
+    def mnemonics(self):
+        # {mnemonic: number of wells that have it}, most common first.
+        rows = self.connection.execute(
+            'SELECT mnemonic, COUNT(DISTINCT well_id) AS wells FROM curves GROUP BY mnemonic ORDER BY wells DESC')
+        return {row['mnemonic']: row['wells'] for row in rows}
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM wells').fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Catalog of LAS well headers in SQLite.')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    index = commands.add_parser('index', help='scan a directory of LAS files')
+    index.add_argument('directory')
+    index.add_argument('--keep-missing', action='store_true', help='keep wells whose files were deleted')
+
+    find = commands.add_parser('find', help='list wells matching a query')
+    find.add_argument('--field')
+    find.add_argument('--company')
+    find.add_argument('--province')
+    find.add_argument('--api')
+    find.add_argument('--curves', nargs='*', default=[])
+    find.add_argument('--top', type=float)
+    find.add_argument('--base', type=float)
+    args = parser.parse_args(argv)
+
+    with WellCatalog(args.db) as catalog:
+        if args.command == 'index':
+            start = time.perf_counter()
+            counts = catalog.index(args.directory, prune=not args.keep_missing)
+            summary = ', '.join(f'{name} {count}' for name, count in counts.items())
+            print(f'{summary} ({len(catalog)} wells, {time.perf_counter() - start:.2f} s)')
+        else:
+            wells = catalog.find(field=args.field, curves=args.curves, company=args.company,
+                                 province=args.province, api=args.api, top=args.top, base=args.base)
+            for well in wells:
+                print(f"{well['path']:<40} {well['well'] or '':<24} {well['field'] or '':<16} {well['api'] or ''}")
+            print(f'{len(wells)} wells')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,535 @@
+# Bulk Well Ingestion
+#
+# Downloads KGS-style well pages (like Data/KGS--Oil and Gas Wells--Specific Well--15-113-21342.html) and the LAS
+# files they link to, many at a time, instead of one by one through the browser. Each input is an API number, the
+# URL of a well page, or the URL of a LAS file. Pages are scanned for their "Download ... .las" links, and every
+# LAS file is parsed into the LasCache and QC'd (CurveQC) as soon as it has arrived, while the other downloads
+# carry on.
+#
+# Everything runs on one asyncio event loop:
+#   - connections are pooled and re-used (keep-alive), at most --per-host open to one server at a time
+#   - a token bucket per host keeps to --rate requests per second
+#   - connection errors, timeouts, 429 and 5xx answers are retried with exponential backoff (and Retry-After)
+#   - LAS files are written to <name>.las.part first; a retry or a later run asks for the missing bytes only
+#     (Range: bytes=<size>-) and the file is renamed to <name>.las when complete
+#
+# aiohttp is used when it is installed; otherwise the same requests go through http.client connections kept in
+# a small pool and driven from a thread pool, so the module works with the standard library alone.
+#
+# Usage:
+#
+#     import WellIngest
+#     summary = WellIngest.ingest(['15-113-21342', 'https://www.kgs.ku.edu/WellLogs/kcc_logs_2013/1044222726.las'],
+#                                 'Data/Downloads', concurrency=8, rate=4)
+#
+# or from the command line:
+#     python WellIngest.py 15-113-21342 15-113-21343 --out Data/Downloads --rate 4
+#     python WellIngest.py --from-file wells.txt --out Data/Downloads --catalog Data/catalog.sqlite
+#
+# API numbers are turned into page URLs with --page-url (or the WELL_PAGE_URL environment variable), a template
+# with an {api} field. Point it at a local stand-in server to test without touching the real site, as
+# Benchmarks/Ingest Benchmark.py does.
+
+import argparse
+import asyncio
+import concurrent.futures
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+import CurveQC
+import LasCache
+
+
+DEFAULT_PAGE_URL = 'https://chasm.kgs.ku.edu/ords/qualified.well_page.DisplayWell?f_api={api}'
+
+# Answers worth asking again for; anything else (404, 403, ...) fails at once.
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+CHUNK_SIZE = 1 << 16
+MAX_REDIRECTS = 5
+
+LAS_LINK = re.compile(r'''href\s*=\s*["']([^"']+?\.las)["']''', re.IGNORECASE)
+API_INPUT = re.compile(r'^\d{2}-\d{3}-\d{5}(-\d{2}){0,2}$')
+
+
+def page_url_template():
+    return os.environ.get('WELL_PAGE_URL', DEFAULT_PAGE_URL)
+
+
+def las_links(page, base_url):
+    # Absolute URLs of the LAS files a well page links to, in page order, without repeats.
+    links = []
+    for match in LAS_LINK.finditer(page):
+        url = urllib.parse.urljoin(base_url, match.group(1).strip())
+        if url not in links:
+            links.append(url)
+    return links
+
+
+def file_name(url):
+    return os.path.basename(urllib.parse.urlsplit(url).path) or 'index'
+
+
+class RetryableError(Exception):
+    """A response that should be retried (429, 5xx, a short body)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket: on average `rate` acquisitions per second, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# -------------------------------------------------------------------------------------------------------
+# HTTP clients. Both have the same coroutine:
+#
+#     status, headers, body = await client.get(url, headers, open_sink)
+#
+# open_sink(status, headers) is called once the response headers are in; when it returns a file object the
+# body is streamed into it (body is then None), otherwise the body is returned as bytes.
+
+class AiohttpClient:
+
+    def __init__(self, concurrency, per_host, timeout):
+        import aiohttp
+        self.errors = (aiohttp.ClientError,)
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+        timeouts = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+        # Bodies are written as sent: a decompressed body would not match Content-Length or Content-Range.
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeouts, auto_decompress=False)
+
+    async def get(self, url, headers=None, open_sink=None):
+        async with self.session.get(url, headers=headers or {}) as response:
+            sink = open_sink(response.status, response.headers) if open_sink else None
+            if sink is None:
+                return response.status, response.headers, await response.read()
+            with sink:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    sink.write(chunk)
+            return response.status, response.headers, None
+
+    async def close(self):
+        await self.session.close()
+
+
+class ThreadedClient:
+    # http.client connections, kept per (scheme, host) after each response has been read completely so the next
+    # request to the same server skips the TCP/TLS handshake. Requests run in a thread pool; the file writes
+    # happen in the same worker thread as the reads.
+
+    errors = (http.client.HTTPException,)
+
+    def __init__(self, concurrency, per_host, timeout):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency,
+                                                              thread_name_prefix='WellIngest')
+
+    def _connect(self, key):
+        # (connection, reused): an idle pooled connection to the server if there is one, else a new one.
+        with self.lock:
+            idle = self.idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, netloc = key
+        factory = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return factory(netloc, timeout=self.timeout), False
+
+    def _release(self, key, connection, response):
+        # Only a connection whose response was read to the end, and that the server keeps open, goes back.
+        if response.will_close or response.length:
+            connection.close()
+            return
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _send(self, key, target, headers):
+        connection, reused = self._connect(key)
+        try:
+            connection.request('GET', target, headers=headers)
+            return connection, connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+        # The server had closed the idle connection in the meantime; that is not a failed request.
+        connection, _ = self._connect(key)
+        connection.request('GET', target, headers=headers)
+        return connection, connection.getresponse()
+
+    def _get(self, url, headers, open_sink):
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            key = (parts.scheme, parts.netloc)
+            target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+            connection = None
+            try:
+                connection, response = self._send(key, target, headers or {})
+                location = response.getheader('Location')
+                if response.status in (301, 302, 303, 307, 308) and location:
+                    response.read()
+                    self._release(key, connection, response)
+                    url = urllib.parse.urljoin(url, location)
+                    continue
+                sink = open_sink(response.status, response.headers) if open_sink else None
+                if sink is None:
+                    body = response.read()
+                else:
+                    body = None
+                    with sink:
+                        for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                            sink.write(chunk)
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                raise
+            self._release(key, connection, response)
+            return response.status, response.headers, body
+        raise http.client.HTTPException(f'too many redirects for {url}')
+
+    async def get(self, url, headers=None, open_sink=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._get, url, headers, open_sink)
+
+    async def close(self):
+        self.executor.shutdown(wait=False)
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+
+def make_client(concurrency=8, per_host=4, timeout=30.0, use_aiohttp=None):
+    # aiohttp when available (or when asked for), the standard-library client otherwise.
+    if use_aiohttp is None:
+        try:
+            import aiohttp  # noqa: F401
+            use_aiohttp = True
+        except ImportError:
+            use_aiohttp = False
+    if use_aiohttp:
+        try:
+            return AiohttpClient(concurrency, per_host, timeout)
+        except ImportError as error:
+            raise ImportError('the aiohttp client needs aiohttp: pip install aiohttp') from error
+    return ThreadedClient(concurrency, per_host, timeout)
+
+
+def parse_and_cache(path):
+    # Runs in a worker process: parse the new LAS file into the LasCache, describe it and QC its curves.
+    las = LasCache.load_las(path)
+    depth = las[las.index_name]
+    qc = CurveQC.check(las)
+    return {'rows': int(depth.size), 'curves': len(las.curves),
+            'top': float(depth[0]) if depth.size else None, 'base': float(depth[-1]) if depth.size else None,
+            'qc': CurveQC.compact_report(qc), 'qc_flagged': qc.flagged()}
+
+
+# -------------------------------------------------------------------------------------------------------
+
+class Ingester:
+
+    def __init__(self, out_dir, concurrency=8, per_host=4, rate=None, burst=1, retries=4, backoff=0.5,
+                 timeout=30.0, page_url=None, parse=True, parse_workers=2, force=False, use_aiohttp=None):
+        self.out_dir = out_dir
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.page_url = page_url or page_url_template()
+        self.parse = parse
+        self.parse_workers = parse_workers
+        self.force = force
+        self.use_aiohttp = use_aiohttp
+        self.counts = {'pages': 0, 'files': 0, 'skipped': 0, 'resumed': 0, 'retries': 0, 'bytes': 0,
+                       'parsed': 0, 'failed': 0}
+
+    # ---------------------------------------------------------------------------------------------------
+    # Requests
+
+    def _host(self, url):
+        return urllib.parse.urlsplit(url).netloc
+
+    async def _request(self, url, headers=None, open_sink=None, before=None, after=None):
+        # One GET with the pool slot, the host's rate limit and retries around it. before() runs ahead of every
+        # attempt and returns that attempt's extra headers (used to ask for the bytes still missing); after()
+        # checks the response and raises RetryableError to have it asked for again.
+        host = self._host(url)
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                extra = dict(headers or {})
+                if before:
+                    extra.update(before())
+                async with self.slots, self.host_slots.setdefault(host, asyncio.Semaphore(self.per_host)):
+                    await self.limiters.setdefault(host, RateLimiter(self.rate, self.burst)).acquire()
+                    status, response_headers, body = await self.client.get(url, extra, open_sink)
+                if status in RETRY_STATUS:
+                    raise RetryableError(f'HTTP {status}', response_headers.get('Retry-After'))
+                if after:
+                    after(status, response_headers)
+                return status, response_headers, body
+            except (RetryableError, OSError, asyncio.TimeoutError) + self.client.errors as error:
+                if attempt == self.retries:
+                    raise
+                retry_after = getattr(error, 'retry_after', None)
+            self.counts['retries'] += 1
+            await asyncio.sleep(self._delay(attempt, retry_after))
+
+    def _delay(self, attempt, retry_after=None):
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), 60.0)
+        except ValueError:
+            pass  # an HTTP date; fall back to the backoff
+        return min(self.backoff * 2 ** attempt, 30.0) * (0.5 + random.random())
+
+    async def fetch_page(self, url):
+        status, headers, body = await self._request(url)
+        if status != 200:
+            raise OSError(f'{url}: HTTP {status}')
+        charset = headers.get('Content-Type', '').partition('charset=')[2].split(';')[0].strip()
+        self.counts['pages'] += 1
+        return body.decode(charset or 'latin-1', errors='replace')
+
+    async def download(self, url, path):
+        # Stream url into path through path + '.part', resuming whatever an earlier attempt left behind.
+        if os.path.exists(path) and not self.force:
+            self.counts['skipped'] += 1
+            return 'skipped'
+        part = path + '.part'
+        if self.force and os.path.exists(part):
+            os.remove(part)
+        state = {}
+
+        def before():
+            state['offset'] = os.path.getsize(part) if os.path.exists(part) else 0
+            state['total'] = None
+            return {'Range': f"bytes={state['offset']}-"} if state['offset'] else {}
+
+        def open_sink(status, headers):
+            if status == 206:
+                start, total = _content_range(headers.get('Content-Range'))
+                if start != state['offset']:
+                    raise RetryableError(f'asked for bytes {state["offset"]}- but got {start}-')
+                state['total'] = total
+                return open(part, 'ab')
+            if status == 200:
+                # No range support (or nothing to resume): start over.
+                length = headers.get('Content-Length')
+                state['total'] = int(length) if length is not None else None
+                state['offset'] = 0
+                return open(part, 'wb')
+            return None
+
+        def after(status, headers):
+            if status in (200, 206) and state['total'] is not None:
+                size = os.path.getsize(part)
+                if size != state['total']:
+                    # The connection ended early without an error; the next attempt resumes from here.
+                    raise RetryableError(f"got {size} of {state['total']} bytes")
+
+        # identity: the byte counts and ranges must be those of the file itself, not of a gzip encoding of it.
+        status, headers, _ = await self._request(url, {'Accept-Encoding': 'identity'}, open_sink=open_sink,
+                                                 before=before, after=after)
+        if status == 416 and state['offset']:
+            # Nothing left to send: the .part file is already complete if the server agrees on its size.
+            _, total = _content_range(headers.get('Content-Range'))
+            if total != state['offset']:
+                os.remove(part)
+                raise OSError(f'{url}: partial download does not match the server copy')
+        elif status not in (200, 206):
+            raise OSError(f'{url}: HTTP {status}')
+        else:
+            self.counts['bytes'] += os.path.getsize(part) - state['offset']
+            if state['offset'] and status == 206:
+                self.counts['resumed'] += 1
+        os.replace(part, path)
+        self.counts['files'] += 1
+        return 'downloaded'
+
+    # ---------------------------------------------------------------------------------------------------
+    # Wells
+
+    def resolve(self, source):
+        # (kind, url) for an API number, a well page URL or a LAS file URL.
+        source = source.strip()
+        if API_INPUT.match(source):
+            return 'page', self.page_url.format(api=source)
+        if urllib.parse.urlsplit(source).path.lower().endswith('.las'):
+            return 'las', source
+        return 'page', source
+
+    async def ingest_one(self, source):
+        result = {'source': source, 'page': None, 'las': [], 'ok': False, 'error': None}
+        try:
+            kind, url = self.resolve(source)
+            if kind == 'page':
+                page = await self.fetch_page(url)
+                name = re.sub(r'[^\w.-]+', '_', source.strip())[-100:]
+                result['page'] = os.path.join(self.out_dir, 'pages', f'{name}.html')
+                with open(result['page'], 'w', encoding='utf-8') as f:
+                    f.write(page)
+                urls = las_links(page, url)
+            else:
+                urls = [url]
+            result['las'] = await asyncio.gather(*(self.ingest_las(las_url) for las_url in urls))
+            result['ok'] = all(item['ok'] for item in result['las'])
+        except Exception as error:
+            result['error'] = f'{type(error).__name__}: {error}'
+        if not result['ok']:
+            self.counts['failed'] += 1
+        return result
+
+    async def ingest_las(self, url):
+        # Sources that lead to the same file (a well page and a direct link to its LAS file, say) share one
+        # download and parse; writing one .part file from two coroutines at once would corrupt it.
+        path = os.path.join(self.out_dir, file_name(url))
+        task = self.las_tasks.get(path)
+        if task is None:
+            task = self.las_tasks[path] = asyncio.ensure_future(self._ingest_las(url, path))
+        return dict(await task)
+
+    async def _ingest_las(self, url, path):
+        item = {'url': url, 'path': path, 'status': None, 'ok': False, 'error': None, 'info': None}
+        try:
+            item['status'] = await self.download(url, path)
+            if self.parse:
+                # Parsed as soon as it is on disk, while the other downloads continue.
+                loop = asyncio.get_running_loop()
+                item['info'] = await loop.run_in_executor(self.parsers, parse_and_cache, path)
+                self.counts['parsed'] += 1
+            item['ok'] = True
+        except Exception as error:
+            item['error'] = f'{type(error).__name__}: {error}'
+        return item
+
+    async def run(self, sources):
+        os.makedirs(os.path.join(self.out_dir, 'pages'), exist_ok=True)
+        self.client = make_client(self.concurrency, self.per_host, self.timeout, self.use_aiohttp)
+        self.slots = asyncio.Semaphore(self.concurrency)
+        self.host_slots = {}
+        self.limiters = {}
+        self.las_tasks = {}
+        self.parsers = None
+        if self.parse:
+            # spawn, not fork: the threaded client has threads running by the time the first worker starts.
+            self.parsers = concurrent.futures.ProcessPoolExecutor(max_workers=self.parse_workers,
+                                                                  mp_context=multiprocessing.get_context('spawn'))
+        start = time.perf_counter()
+        try:
+            results = await asyncio.gather(*(self.ingest_one(source) for source in sources))
+        finally:
+            await self.client.close()
+            if self.parsers:
+                self.parsers.shutdown()
+        return {'wells': len(results), 'wall_time': time.perf_counter() - start, 'counts': dict(self.counts),
+                'client': type(self.client).__name__, 'results': results}
+
+
+def _content_range(value):
+    # "bytes 100-199/1000" -> (100, 1000); "bytes */1000" -> (None, 1000); unknown parts are None.
+    match = re.match(r'bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)', value or '')
+    if not match:
+        return None, None
+    start, total = match.groups()
+    return (int(start) if start else None), (int(total) if total != '*' else None)
+
+
+def ingest(sources, out_dir, **options):
+    return asyncio.run(Ingester(out_dir, **options).run(list(sources)))
+
+
+def print_summary(summary):
+    counts = summary['counts']
+    print(f"Wells: {summary['wells']}   pages: {counts['pages']}   LAS files: {counts['files']} "
+          f"({counts['bytes'] / 1e6:.1f} MB, {counts['resumed']} resumed, {counts['skipped']} already there)   "
+          f"parsed: {counts['parsed']}   retries: {counts['retries']}   wall time: {summary['wall_time']:.1f} s")
+    for result in summary['results']:
+        errors = [result['error']] + [item['error'] for item in result['las']]
+        for error in filter(None, errors):
+            print(f"FAILED {result['source']}: {error}")
+        for item in result['las']:
+            if item['info'] and item['info']['qc_flagged']:
+                print(f"QC {item['path']}: check {', '.join(item['info']['qc_flagged'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Download well pages and LAS files concurrently.')
+    parser.add_argument('sources', nargs='*', help='API numbers, well page URLs or LAS file URLs')
+    parser.add_argument('--from-file', help='file with one API number or URL per line')
+    parser.add_argument('--out', default='Data/Downloads')
+    parser.add_argument('--concurrency', type=int, default=8, help='requests in flight at once')
+    parser.add_argument('--per-host', type=int, default=4, help='open connections per server')
+    parser.add_argument('--rate', type=float, default=None, help='requests per second per server')
+    parser.add_argument('--retries', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=30.0, help='connect/read timeout in seconds')
+    parser.add_argument('--page-url', default=None, help='well page URL template with an {api} field')
+    parser.add_argument('--no-parse', action='store_true', help='only download, do not fill the LAS cache')
+    parser.add_argument('--force', action='store_true', help='download files that are already there again')
+    parser.add_argument('--catalog', help='add the downloaded wells to this WellCatalog database')
+    args = parser.parse_args(argv)
+
+    sources = list(args.sources)
+    if args.from_file:
+        with open(args.from_file) as f:
+            sources.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if not sources:
+        parser.error('no API numbers or URLs given')
+
+    summary = ingest(sources, args.out, concurrency=args.concurrency, per_host=args.per_host, rate=args.rate,
+                     retries=args.retries, timeout=args.timeout, page_url=args.page_url,
+                     parse=not args.no_parse, force=args.force)
+    with open(os.path.join(args.out, 'ingest.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    print_summary(summary)
+
+    if args.catalog:
+        import WellCatalog
+        with WellCatalog.WellCatalog(args.catalog) as catalog:
+            counts = catalog.index(args.out, prune=False)
+        print('Catalog: ' + ', '.join(f'{name} {count}' for name, count in counts.items()))
+    return 0 if summary['counts']['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())